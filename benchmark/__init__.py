@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18.10.2026 20:25
+
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+
+Scaling benchmarks of the songbook generation. See benchmark.run and benchmark.compare
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-18'
+__all__ = []
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18.10.2026 21:20
+
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+
+Compare two result files of benchmark.run, e.g. from two commits:
+
+    python -m benchmark.compare before.json after.json
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-18'
+__all__ = ['compareResults']
+
+import argparse
+import json
+
+from .run import PHASES
+
+
+def compareResults(old: dict, new: dict) -> list:
+    """
+    Return the lines of a table comparing the timings of the phases for the songbook sizes present in both results
+    :param old: content of the baseline result file
+    :param new: content of the compared result file
+    """
+    lines = ["{:>6} {:<16} {:>10} {:>10} {:>8}".format("songs", "phase", "old [s]", "new [s]", "ratio")]
+    oldRuns = {run["songs"]: run for run in old["runs"]}
+    for run in new["runs"]:
+        if run["songs"] not in oldRuns:
+            continue
+        oldRun = oldRuns[run["songs"]]
+        for phase in PHASES + ["total"]:
+            a = oldRun["total"] if phase == "total" else oldRun["phases"].get(phase)
+            b = run["total"] if phase == "total" else run["phases"].get(phase)
+            if a is None or b is None:
+                continue
+            ratio = "{:8.2f}".format(b / a) if a > 0 else "       -"
+            lines.append("{:>6} {:<16} {:>10.3f} {:>10.3f} {}".format(run["songs"], phase, a, b, ratio))
+        a = oldRun["peak_rss_kb"].get(PHASES[-1])
+        b = run["peak_rss_kb"].get(PHASES[-1])
+        if a and b:
+            lines.append("{:>6} {:<16} {:>10} {:>10} {:8.2f}".format(run["songs"], "peak RSS [kB]", a, b, b / a))
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument('old', type=str, help="Baseline result file")
+    parser.add_argument('new', type=str, help="Compared result file")
+    args = parser.parse_args()
+
+    with open(args.old, "r", encoding="utf8") as f:
+        old = json.load(f)
+    with open(args.new, "r", encoding="utf8") as f:
+        new = json.load(f)
+    print("{} -> {}".format(old.get("commit"), new.get("commit")))
+    print("\n".join(compareResults(old, new)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18.10.2026 20:30
+
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-18'
+__all__ = ['generateCorpus']
+
+import os
+import random
+from xml.sax.saxutils import escape, quoteattr
+
+# Separator of the chords and the insertion character, as written to the settings of the generated songbook
+CS = ">"
+CI = "|"
+
+_words = ["road", "river", "night", "morning", "heart", "wind", "fire", "home", "stone", "rain", "sea", "star",
+          "summer", "winter", "dream", "light", "shadow", "bridge", "train", "mountain", "żagiel", "łąka", "ćma"]
+_firstNames = ["John", "Mike", "Anna", "J.", "Piotr", "Sam", "Kate", "Łukasz", "Zoë", "Bob"]
+_lastNames = ["Doe", "Moo", "Smith", "Composer", "Gradkowski", "Nowak", "Müller", "Brown", "Wiśniewski"]
+_bands = ["The Developers", "Led Zeppelin", "The Testers", "Czerwone Gitary", "Pink Floyd"]
+_chords = ["C", "G", "a", "e", "F", "D", "d", "E7", "A", "h7"]
+_chordModes = ["CHORDS_ABOVE", "CHORDS_BESIDE", "NO_CHORDS"]
+_parts = ["verse", "chorus", "verse", "bridge", "chorus"]
+
+
+def generateCorpus(directory: str, songs: int, seed: int = 0, sectionSize: int = 25,
+                   srcRatio: float = 0.3) -> str:
+    """
+    Write a synthetic songbook: the master XML with nested sections, songs defined inline and in separate files,
+    links between the songs (including the dead ones and the titles shared by several songs), various chord modes
+    and html attachments. The content is always the same for the same arguments.
+    :param directory: directory to write the songbook to. The songbook output directory is set to its "output"
+                      subdirectory
+    :param songs: number of songs
+    :param seed: seed of the random generator
+    :param sectionSize: number of songs in a subsection
+    :param srcRatio: fraction of songs defined in separate files
+    :return: path to the master XML file
+    """
+    rnd = random.Random(seed)
+    os.makedirs(os.path.join(directory, "songs"), exist_ok=True)
+    os.makedirs(os.path.join(directory, "html"), exist_ok=True)
+    with open(os.path.join(directory, "html", "songbook_text.css"), "w", encoding="utf8") as f:
+        f.write("p { font-style: italic; }\n")
+
+    titles = [_title(rnd, i) for i in range(songs)]
+    # Some titles are shared by several songs
+    for i in range(0, songs, 50):
+        if i + 1 < songs:
+            titles[i + 1] = titles[i]
+
+    lines = ['<?xml version="1.0" encoding="utf-8"?>',
+             '<songbook>',
+             '    <settings>',
+             '        <title>Benchmark Songbook</title>',
+             '        <output_dir>output</output_dir>',
+             '        <chord_separator>{}</chord_separator>'.format(escape(CS)),
+             '        <chord_insertion_character>{}</chord_insertion_character>'.format(escape(CI)),
+             '    </settings>']
+
+    subsectionsPerSection = 4
+    i = 0
+    nSection = 0
+    while i < songs:
+        nSection += 1
+        chordMode = ' chord_mode="{}"'.format(rnd.choice(_chordModes)) if nSection % 2 else ""
+        lines.append('    <section title="Section {}"{}>'.format(nSection, chordMode))
+        for nSub in range(1, subsectionsPerSection + 1):
+            if i >= songs:
+                break
+            lines.append('        <section title="Section {}.{}">'.format(nSection, nSub))
+            for _ in range(min(sectionSize, songs - i)):
+                lines.extend(_song(rnd, directory, i, titles, srcRatio))
+                i += 1
+            if nSub == 1:
+                lines.append('            <html src={}/>'.format(quoteattr(_attachment(directory, nSection))))
+            lines.append('        </section>')
+        lines.append('    </section>')
+    # The indexes close the last subsection
+    last = len(lines) - 1 - lines[::-1].index('        </section>')
+    lines[last:last] = ['            <index_of_authors title="Authors"/>',
+                       '            <index_of_songs title="Songs"/>']
+    lines.append('</songbook>')
+
+    master = os.path.join(directory, "songbook.xml")
+    with open(master, "w", encoding="utf8") as f:
+        f.write("\n".join(lines) + "\n")
+    return master
+
+
+def _title(rnd: random.Random, i: int) -> str:
+    words = rnd.sample(_words, rnd.randint(1, 3))
+    return "{} {}".format(" ".join(words).capitalize(), i)
+
+
+def _author(rnd: random.Random) -> str:
+    names = [rnd.choice(_firstNames) + " " + rnd.choice(_lastNames) for _ in range(rnd.randint(1, 2))]
+    return "; ".join(names)
+
+
+def _song(rnd: random.Random, directory: str, i: int, titles: list, srcRatio: float) -> list:
+    """Return the lines of the song element in the master XML. Write the separate file of the song, if needed"""
+    title = titles[i]
+    attributes = [("title", title)]
+    if rnd.random() < 0.8:
+        attributes.append(("lyrics", _author(rnd)))
+        attributes.append(("music", _author(rnd)))
+    if rnd.random() < 0.3:
+        attributes.append(("band", rnd.choice(_bands)))
+    if rnd.random() < 0.2:
+        attributes.append(("chord_mode", rnd.choice(_chordModes)))
+
+    links = []
+    for _ in range(rnd.choice([0, 0, 1, 1, 2])):
+        links.append(titles[rnd.randrange(len(titles))])
+    if rnd.random() < 0.02:
+        links.append("No such song {}".format(i))
+
+    content = ['<link title={}/>'.format(quoteattr(link)) for link in links]
+    for part in _parts[:rnd.randint(2, len(_parts))]:
+        mode = ' chord_mode="{}"'.format(rnd.choice(_chordModes)) if rnd.random() < 0.1 else ""
+        content.append("<{}{}>".format(part, mode))
+        content.extend(_lyrics(rnd))
+        content.append("</{}>".format(part))
+
+    indent = " " * 12
+    if rnd.random() < srcRatio:
+        fileName = "songs/song_{:05d}.xml".format(i)
+        with open(os.path.join(directory, fileName), "w", encoding="utf8") as f:
+            f.write('<?xml version="1.0" encoding="utf-8"?>\n')
+            f.write("<song {}>\n".format(_attributes(attributes)))
+            f.write("\n".join("    " + line for line in content) + "\n")
+            f.write("</song>\n")
+        return [indent + "<song {}/>".format(_attributes([("title", title), ("src", fileName)]))]
+
+    return ([indent + "<song {}>".format(_attributes(attributes))] +
+            [indent + "    " + line for line in content] +
+            [indent + "</song>"])
+
+
+def _lyrics(rnd: random.Random) -> list:
+    """Return the lines of a song part. Some lines have chords, some of them with the insertion points"""
+    lines = []
+    for _ in range(rnd.randint(2, 6)):
+        words = [rnd.choice(_words) for _ in range(rnd.randint(3, 7))]
+        r = rnd.random()
+        if r < 0.4:
+            chords = [rnd.choice(_chords) for _ in range(rnd.randint(1, 4))]
+            positions = sorted(rnd.sample(range(len(words)), min(len(chords), len(words))))
+            for p in reversed(positions):
+                words[p] = CI + words[p]
+            lines.append(" ".join(words) + "    " + CS + " " + " ".join(chords))
+        elif r < 0.7:
+            chords = [rnd.choice(_chords) for _ in range(rnd.randint(1, 4))]
+            lines.append(" ".join(words) + "    " + CS + " " + " ".join(chords))
+        else:
+            lines.append(" ".join(words))
+    return [escape(line) for line in lines]
+
+
+def _attachment(directory: str, n: int) -> str:
+    """Write an html attachment and return its path, relative to the directory"""
+    fileName = "html/attachment_{}.xhtml".format(n)
+    with open(os.path.join(directory, fileName), "w", encoding="utf8") as f:
+        f.write('<?xml version="1.0"?>\n'
+                '<html xmlns="http://www.w3.org/1999/xhtml">\n'
+                '    <head>\n'
+                '        <title>Attachment {0}</title>\n'
+                '        <link rel="stylesheet" type="text/css" href="./songbook_text.css"/>\n'
+                '    </head>\n'
+                '    <body>\n'
+                '        <p>Notes to the section {0}</p>\n'
+                '    </body>\n'
+                '</html>\n'.format(n))
+    return fileName
+
+
+def _attributes(attributes: list) -> str:
+    return " ".join("{}={}".format(name, quoteattr(value)) for name, value in attributes)
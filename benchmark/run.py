@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18.10.2026 21:00
+
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+
+Run the whole songbook generation on synthetic songbooks of growing size and write the timings of the phases and
+the peak memory usage to a JSON file. Example:
+
+    python -m benchmark.run --songs 100 1000 10000 --output results.json
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-18'
+__all__ = ['runBenchmark', 'peakRss']
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from .corpus import generateCorpus
+
+# Phases of the generation, in the order of execution
+PHASES = ["construct", "preprocess", "write_songs", "write_sections", "write_indexes", "write_toc",
+          "write_metadata", "finish"]
+
+
+def peakRss() -> int:
+    """Return the peak resident set size of this process in kilobytes, or None if it cannot be measured"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def runBenchmark(songs: int, directory: str, jobs: int = 1, serializer: str = "tixi", seed: int = 0) -> dict:
+    """
+    Generate a synthetic songbook and run all phases of the generation on it.
+    :param songs: number of songs in the songbook
+    :param directory: directory to write the songbook source and output to
+    :param jobs: number of processes rendering the songs (see SongBookGenerator.write_songs)
+    :param serializer: serializer of the pages (see SongBookGenerator)
+    :param seed: seed of the synthetic songbook generator
+    :return: dictionary with the timings (in seconds) of the phases and the peak RSS (in kB) after each phase
+    """
+    from src.tools.song_book_generator import SongBookGenerator
+
+    t0 = time.perf_counter()
+    master = generateCorpus(directory, songs, seed)
+    result = {"songs": songs,
+              "corpus": round(time.perf_counter() - t0, 4),
+              "phases": dict(),
+              "peak_rss_kb": dict()}
+
+    sg = None
+    for phase in PHASES:
+        t0 = time.perf_counter()
+        if phase == "construct":
+            sg = SongBookGenerator(master, preprocess=False, serializer=serializer)
+        elif phase == "preprocess":
+            sg._preprocess()
+        elif phase == "write_songs":
+            sg.write_songs(jobs=jobs)
+        else:
+            getattr(sg, phase)()
+        result["phases"][phase] = round(time.perf_counter() - t0, 4)
+        result["peak_rss_kb"][phase] = peakRss()
+
+    result["total"] = round(sum(result["phases"].values()), 4)
+    result["files"] = sum(len(files) for _, _, files in os.walk(sg.settings.dir_out))
+    return result
+
+
+def _runIsolated(args) -> dict:
+    """Run the benchmark of one size in a fresh process, so that the peak RSS is not affected by the other runs"""
+    songs, directory, jobs, serializer, seed = args
+    logging.basicConfig(level=logging.WARNING)
+    return runBenchmark(songs, directory, jobs, serializer, seed)
+
+
+def _commit() -> str:
+    """Return the current git commit of the repository, if available"""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(__file__),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the songbook generation on synthetic songbooks")
+    parser.add_argument('--songs', type=int, nargs="+", default=[100, 1000, 10000],
+                        help="Sizes of the songbooks (numbers of songs)")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="Number of processes rendering the song pages")
+    parser.add_argument('--serializer', type=str, choices=['tixi', 'stream'], default='tixi',
+                        help="Serializer of the pages")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="Seed of the synthetic songbook generator")
+    parser.add_argument('--workdir', type=str,
+                        help="Directory for the generated songbooks. A temporary directory, removed afterwards, "
+                             "by default")
+    parser.add_argument('--output', type=str, default="benchmark_results.json",
+                        help="Name of the JSON file with the results")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="songbook_benchmark_")
+    results = {"commit": _commit(),
+               "date": datetime.now().isoformat(timespec="seconds"),
+               "python": platform.python_version(),
+               "platform": platform.platform(),
+               "options": {"jobs": args.jobs, "serializer": args.serializer, "seed": args.seed},
+               "runs": []}
+    try:
+        for songs in args.songs:
+            directory = os.path.join(workdir, "songs_{}".format(songs))
+            shutil.rmtree(directory, ignore_errors=True)
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                run = pool.submit(_runIsolated, (songs, directory, args.jobs, args.serializer, args.seed)).result()
+            results["runs"].append(run)
+            print("{:>6} songs: {:8.2f} s, peak RSS {} kB".format(songs, run["total"],
+                                                                  run["peak_rss_kb"][PHASES[-1]]))
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, "w", encoding="utf8") as f:
+        json.dump(results, f, indent=1)
+    print("Results written to {}".format(os.path.abspath(args.output)))
+
+
+if __name__ == '__main__':
+    main()
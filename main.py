@@ -14,13 +14,27 @@ import os
 import pathlib
 import sys
 
-try:
-    # Enable importing modules from PATH environmental variable (Python 3.8+ on Windows)
-    _dllDirs = [os.add_dll_directory(d) for d in os.environ["PATH"].split(";") if os.path.isdir(d)]
-except AttributeError:
-    pass
+# The XML backend is selected when src.xml_backend is first imported, so the option must be read before the imports
+_backendParser = argparse.ArgumentParser(add_help=False)
+_backendParser.add_argument('--xml-backend', type=str, choices=['tixi', 'lxml'])
+_backend = _backendParser.parse_known_args()[0].xml_backend
+if _backend is not None:
+    os.environ["SONGBOOK_XML_BACKEND"] = _backend
 
+if _backend != "lxml":
+    try:
+        # Enable importing modules from PATH environmental variable (Python 3.8+ on Windows)
+        _dllDirs = [os.add_dll_directory(d) for d in os.environ["PATH"].split(";") if os.path.isdir(d)]
+    except AttributeError:
+        pass
+
+from src.config import SchemaRegistry
+from src.tools.build_profiler import BuildProfiler
+from src.tools.edition_builder import EditionBuilder
 from src.tools.song_book_generator import SongBookGenerator
+from src.tools.songbook_checker import SongbookChecker
+from src.tools.validation_cache import ValidationCache
+from src.tools.watch_builder import SourceWatcher, WatchBuilder
 
 
 def pre(argparser: argparse.ArgumentParser):
@@ -45,15 +59,68 @@ def main(argparser: argparse.ArgumentParser):
     sys.excepthook = print_exceptions
     args = argparser.parse_args()
 
+    SchemaRegistry.useSnapshots = args.schema_snapshot
+    ValidationCache.directory = args.validation_cache
     xsd_file = os.path.join(os.path.dirname(__file__), "config", "source_schema.xsd")
     if not os.path.isfile(xsd_file):
         xsd_file = None
-    sg = SongBookGenerator(args.input.buffer.raw.name, xsd_file)
-    sg.write_songs()
-    sg.write_sections()
-    sg.write_indexes()
-    sg.write_toc()
-    sg.write_metadata()
+    if args.check is not None:
+        checker = SongbookChecker(args.input.buffer.raw.name, xsd_file, jobs=args.jobs)
+        checker.run()
+        checker.save(args.check)
+        if checker.report()["errors"]:
+            sys.exit(1)
+        return
+    if args.watch:
+        if args.epub is not None:
+            argparser.error("--epub cannot be combined with --watch: the EPUB file is only complete after a full "
+                            "build. Build it without --watch once the sources are ready")
+        watcher = SourceWatcher(interval=args.watch_interval, debounce=args.watch_interval)
+        builder = WatchBuilder(args.input.buffer.raw.name, xsd_file, jobs=args.jobs, watcher=watcher,
+                               serializer=args.serializer, preview=args.preview, sample=args.sample,
+                               previewResources=args.with_resources, previewIndexes=args.with_indexes,
+                               link=args.link_resources)
+        try:
+            builder.run()
+        except KeyboardInterrupt:
+            logging.info("Watching stopped")
+        return
+
+    profiler = BuildProfiler(enabled=args.profile is not None, cprofileDir=args.cprofile)
+    if args.editions is not None:
+        builder = EditionBuilder(args.input.buffer.raw.name, xsd_file, editions=args.editions, epub=args.epub,
+                                 profiler=profiler, incremental=args.incremental, epub_level=args.epub_level,
+                                 serializer=args.serializer, preview=args.preview, sample=args.sample,
+                                 previewResources=args.with_resources, previewIndexes=args.with_indexes,
+                                 link=args.link_resources, writers=args.writers)
+        builder.build(jobs=args.jobs)
+        profiler.stop()
+        if args.profile is not None:
+            profiler.save(args.profile)
+        logging.info("DONE!")
+        return
+
+    with profiler.phase("construct"):
+        sg = SongBookGenerator(args.input.buffer.raw.name, xsd_file, incremental=args.incremental,
+                               epub=args.epub, epub_level=args.epub_level, serializer=args.serializer,
+                               profiler=profiler, preview=args.preview, sample=args.sample,
+                               previewResources=args.with_resources, previewIndexes=args.with_indexes,
+                               link=args.link_resources, writers=args.writers)
+    with profiler.phase("write_songs"):
+        sg.write_songs(jobs=args.jobs)
+    with profiler.phase("write_sections"):
+        sg.write_sections()
+    with profiler.phase("write_indexes"):
+        sg.write_indexes()
+    with profiler.phase("write_toc"):
+        sg.write_toc()
+    with profiler.phase("write_metadata"):
+        sg.write_metadata()
+    with profiler.phase("finish"):
+        sg.finish()
+    profiler.stop()
+    if args.profile is not None:
+        profiler.save(args.profile)
     logging.info("DONE!")
 
 
@@ -77,6 +144,14 @@ def post(argparser: argparse.ArgumentParser):
     stdout, stderr = p.communicate()
 
 
+def non_negative_int(value: str) -> int:
+    """Argument type: an integer, not less than 0"""
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError("{} is negative".format(value))
+    return number
+
+
 def print_exceptions(etype, value, tb):
     import traceback
     text = "\n".join(traceback.format_exception(etype, value, tb))
@@ -95,6 +170,85 @@ if __name__ == '__main__':
                         default='info',
                         help="Level of logged information")
 
+    parser.add_argument('--jobs', type=non_negative_int, default=1,
+                        help="Number of processes rendering the song pages, or of threads validating the song source "
+                             "files with --check (only with the lxml backend - with TiXI, --check validates them one "
+                             "after another). 0 uses all available CPUs")
+
+    parser.add_argument('--incremental', action='store_true',
+                        help="Keep the output directory and only rewrite the files whose inputs have changed since the "
+                             "previous build. Files of the removed songs and sections are deleted")
+
+    parser.add_argument('--epub', type=str,
+                        help="Name of the EPUB file to be written. The generated files are packed into it on the fly, "
+                             "so no external archiver is needed in the postprocessing. The output directory is still "
+                             "written as well. With --incremental, the files of the previous build are carried over "
+                             "to the new EPUB file")
+    parser.add_argument('--epub-level', type=int, choices=range(10), default=6, metavar="0-9",
+                        help="Deflate compression level of the EPUB file")
+
+    parser.add_argument('--serializer', type=str, choices=['tixi', 'stream'], default='tixi',
+                        help="How the pages are built. 'stream' writes them directly, without building and exporting "
+                             "a Tixi document. The output is the same")
+
+    parser.add_argument('--xml-backend', type=str, choices=['tixi', 'lxml'],
+                        help="Implementation of the XML documents: the TiXI library or the pure Python one, based on "
+                             "lxml. TiXI by default, if it is installed")
+
+    parser.add_argument('--schema-snapshot', action='store_true',
+                        help="Store the defaults and types read from the XSD schemas in a JSON file next to the "
+                             "schema, and reuse it in the next runs, as long as the schemas do not change")
+
+    parser.add_argument('--validation-cache', type=str, metavar="DIR",
+                        help="Store the documents validated with the XSD schemas in DIR, and reuse them in the next "
+                             "runs instead of validating the unchanged input files again")
+
+    parser.add_argument('--link-resources', type=str, choices=['hardlink', 'reflink'],
+                        help="Link the html documents and their resources into the output directory instead of copying "
+                             "them. Falls back to copying where linking is not possible")
+
+    parser.add_argument('--writers', type=int, metavar="N",
+                        help="Write the generated files on N background threads, while the next pages are rendered. "
+                             "Write errors are reported at the end of the build. Ignored in the watch mode")
+
+    parser.add_argument('--editions', type=str, nargs='*', metavar="NAME",
+                        help="Build the editions of the songbook defined in the <editions> element of the input file, "
+                             "all of them if no NAME is given. The input is parsed and validated only once. With "
+                             "--epub, the name of each edition is appended to the name of the EPUB file")
+
+    parser.add_argument('--check', type=str, nargs='?', const="-", metavar="REPORT",
+                        help="Only run the consistency checks (schemas, ambiguous content, attribute conflicts, "
+                             "missing files, title mismatches, duplicate output names, dead links) without writing the "
+                             "songbook. All problems are written as JSON to REPORT, or to the standard output. The "
+                             "exit code is 1 if any errors are found")
+
+    parser.add_argument('--watch', action='store_true',
+                        help="Keep running and rebuild the songbook whenever the master XML, the song source files or "
+                             "the html documents change. If only the content of some songs has changed, only their "
+                             "pages are written again. Implies --incremental. Cannot be combined with --epub")
+    parser.add_argument('--watch-interval', type=float, default=0.5, metavar="SECONDS",
+                        help="How often the sources are checked for changes in the watch mode. A rebuild starts once "
+                             "the sources have not changed for the same time")
+
+    parser.add_argument('--preview', type=non_negative_int, metavar="N",
+                        help="Build a draft songbook quickly: only the first N songs (overrides max_songs), without "
+                             "copying the resources of the html documents and without the indexes. 0 keeps all songs, "
+                             "e.g. for a draft with --sample only")
+    parser.add_argument('--sample', type=non_negative_int, metavar="K",
+                        help="Build a draft songbook with only the first K songs of each section. Can be combined "
+                             "with --preview. 0 keeps all songs of each section")
+    parser.add_argument('--with-resources', action='store_true',
+                        help="Copy the resources of the html documents in the draft (--preview/--sample) build")
+    parser.add_argument('--with-indexes', action='store_true',
+                        help="Write the indexes in the draft (--preview/--sample) build")
+
+    parser.add_argument('--profile', type=str, metavar="REPORT",
+                        help="Record the wall time, CPU time and memory peak of each phase of the build and of each "
+                             "song, and write them to the REPORT JSON file. Tracing the memory slows the build down")
+    parser.add_argument('--cprofile', type=str, metavar="DIR",
+                        help="With --profile, also profile each phase with cProfile and dump the statistics to "
+                             "DIR/<phase>.prof")
+
     parser.add_argument('--preproc', type=str,
                         help="Name of the preprocessing script. For example one that will produce and copy some "
                              "additional files requird to generate the songbook")
@@ -5,7 +5,10 @@ Created on Sat Nov 14 18:18:26 2020
 @author: Piotr Gradkowski <grotsztaksel@o2.pl>
 """
 
-__all__ = ['EpubSongbookConfig', 'ChordMode']
+__all__ = ['EpubSongbookConfig', 'ChordMode', 'SchemaRegistry',
+           'OutputSink', 'DirectorySink', 'MemorySink', 'ZipSink', 'TeeSink', 'AsyncSink']
 __authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
 __date__ = '2020-11-14'
-from .epubsongbookconfig import EpubSongbookConfig, ChordMode
\ No newline at end of file
+from .epubsongbookconfig import EpubSongbookConfig, ChordMode
+from .schema_registry import SchemaRegistry
+from .output_sink import OutputSink, DirectorySink, MemorySink, ZipSink, TeeSink, AsyncSink
@@ -10,14 +10,19 @@ __authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
 __date__ = '2020-11-14'
 
 import getpass
+import hashlib
+import json
 import logging
 import os
 import shutil
 from enum import Enum
 from typing import Any
 
+from .output_sink import OutputSink, DirectorySink
+from .schema_registry import SchemaRegistry
+
 try:
-    from src.tixi import Tixi, TixiException, ReturnCode
+    from src.xml_backend import Tixi, TixiException, ReturnCode
 except Exception:
     pth = os.environ["PATH"].split(";")
     print(os.path.isfile(os.path.join(pth[-2], "tixi3.dll")))
@@ -61,13 +66,15 @@ class EpubSongbookConfig():
         This class is NOT responsible for writing the content of the songbook
      """
 
-    def __init__(self, tixi: Tixi):
+    def __init__(self, tixi: Tixi, edition: str = None):
         """
 
         :param tixi: input tixi to find the <settings> element
-        :param xsd_file: XSD schema file (to take default values)
+        :param edition: name of the edition (/songbook/editions/edition/@name). Its settings override the ones from the
+                        <settings> element
         """
         self.tixi = tixi
+        self.edition = edition
 
         self.xsd_elements_2_settings_map = {"username": "user",
                                             "title": "title",
@@ -84,20 +91,49 @@ class EpubSongbookConfig():
                                             "lyrics_string": "lyrics_string",
                                             "music_string": "music_string",
                                             "unknown_author": "unknown_author",
+                                            "author_aliases": "author_aliases",
                                             "prefered_chord_mode": "chordType",
                                             "chord_separator": "CS",
                                             "chord_insertion_character": "CI"}
 
-        xsd_file = os.path.join(os.path.dirname(__file__), "source_schema.xsd")
-        self.xsd_song = os.path.join(os.path.dirname(__file__), "song_schema.xsd")
-        self.xsd = Tixi()
-        self.xsd.open(xsd_file)
-        self.xsd.registerNamespacesFromDocument()
-        self.xsd_spath = '/xs:schema/xs:complexType[@name="settings"]/xs:all/xs:element'
+        # Defaults and types of the settings, parsed from the XSD schemas only once per process
+        self.schema = SchemaRegistry.get()
+        self.xsd_song = self.schema.song_xsd
 
         self._setup_defaults()
 
         self._getSettings()
+        if edition is not None:
+            path = EpubSongbookConfig.editionPath(tixi, edition)
+            if path is None:
+                raise ValueError("Edition {} is not defined in {}".format(edition, tixi.getDocumentPath()))
+            self._getSettings(path)
+        self._checkAuthorAliases()
+
+    #
+    @staticmethod
+    def editions(tixi: Tixi) -> list:
+        """Return the names of the editions defined in the input tixi, in the document order"""
+        return [tixi.getTextAttribute(path, "name")
+                for path in tixi.xPathExpressionGetAllXPaths("/songbook/editions/edition[@name]")]
+
+    #
+    @staticmethod
+    def editionPath(tixi: Tixi, edition: str) -> str:
+        """Return the path to the element of the edition in the input tixi, or None if it is not defined"""
+        for path in tixi.xPathExpressionGetAllXPaths("/songbook/editions/edition[@name]"):
+            if tixi.getTextAttribute(path, "name") == edition:
+                return path
+        return None
+
+    #
+    def __getstate__(self):
+        """Allow sending the settings to worker processes. The Tixi handles cannot be pickled and are not needed
+        there - the workers only read the plain settings values"""
+        state = self.__dict__.copy()
+        state["tixi"] = None
+        state["_sink"] = None
+        return state
 
     def _setup_defaults(self):
         """Set up defaults"""
@@ -105,22 +141,19 @@ class EpubSongbookConfig():
         # copy the keys of self.xsd_elements_2_settings_map to later make sure that all have been defined in xsd
         settings = list(self.xsd_elements_2_settings_map.keys())
 
-        for setting in self.xsd.xPathExpressionGetAllXPaths(self.xsd_spath):
-            name = self.xsd.getTextAttribute(setting, "name")
+        for name, setting in self.schema.settings.items():
             # If setting is not in self.xsd_elements_2_settings_map, this will throw an error
             try:
                 settings.remove(name)
             except ValueError:
-                xsd_file = self.xsd.getDocumentPath()
+                xsd_file = self.schema.source_xsd
                 raise ValueError("EpubSongbookConfig.xsd_elements_2_settings_map "
                                  "does not have {}, which is present in {}. xsd_elements_2_settings_map must agree with"
                                  "settings listed in the {}".format(name, xsd_file, xsd_file))
 
             # Set the default value if it is defined in XSD
-            if self.xsd.checkAttribute(setting, "default"):
-                a = self.xsd.getTextAttribute(setting, "default")
-
-                defvalue = self.type(setting, a)
+            if setting["default"] is not None:
+                defvalue = self.type(name, setting["default"])
             else:
                 defvalue = None
             setattr(self, self.xsd_elements_2_settings_map[name], defvalue)
@@ -131,24 +164,28 @@ class EpubSongbookConfig():
                              "\n".join(settings))
 
         # Special treatment to some variables that could not have their default defined
-        xsd_path = self.xsd.xPathExpressionGetXPath('{}[@name="{}"]'.format(self.xsd_spath, "prefered_chord_mode"), 1)
-        self.chordType = ChordMode.get(self.xsd.getTextAttribute(xsd_path, "default"))
+        self.chordType = ChordMode.get(self.schema.settings["prefered_chord_mode"]["default"])
         self.user = getpass.getuser()
         self.template_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../", "template"))
         self.dir_text = None
-
-    def type(self, xsd_path: str, value: str) -> Any:
-        """Return the value of an attribute in the appropriate type. List of types is taken from
+        self.serializer = "tixi"  # how the pages are built: "tixi" or "stream" (see HtmlWriter)
+        self.metadata = None  # content of the metadata.opf template with the settings substituted
+        self.toc = None  # content of the toc.ncx template, if the template directory has one
+        self.sample = 0  # maximum number of songs taken from each section (preview builds). 0 means all
+        self.copyResources = True  # copy the resources (images, stylesheets, linked pages) of the html documents
+        self.writeIndexes = True  # write the index pages
+        self._sink = None
+        self._fileHashes = dict()  # file name -> ((mtime, size), hash of the content)
+
+    def type(self, name: str, value: str) -> Any:
+        """Return the value of a setting in the appropriate type. List of types is taken from
             https://www.w3.org/TR/xmlschema-2/
+        :param name: name of the setting (element) in the XSD
+        :param value: text value of the setting
         """
-        if self.xsd.checkAttribute(xsd_path, "type"):
-            tp = self.xsd.getTextAttribute(xsd_path, "type").lstrip("xs:").lstrip("xsd:")
-        else:
-            # Maybe it is a simple type with some restrictions?
-            paths = self.xsd.xPathExpressionGetAllXPaths('{}/xs:simpleType/xs:restriction[@base]'.format(xsd_path))
-            if len(paths) != 1:
-                return value
-            tp = self.xsd.getTextAttribute(paths[0], "base").lstrip("xs:").lstrip("xsd:")
+        tp = self.schema.settings[name]["type"]
+        if tp is None:
+            return value
 
         # Simple types
         if tp in ["byte", "int", "integer", "long", "negativeInteger", "nonNegativeInteger", "nonPositiveInteger",
@@ -169,22 +206,26 @@ class EpubSongbookConfig():
         return value
 
     #
-    def _getSettings(self):
+    def _getSettings(self, spath: str = "/songbook/settings"):
         """Try reading the settings written in the input file.
-        If a given setting is present, override the default one """
-
-        spath = "/songbook/settings"
+        If a given setting is present, override the default one
+        :param spath: path to the element containing the settings: <settings> or <edition>
+        """
 
         for xmlName, myName in self.xsd_elements_2_settings_map.items():
             path = spath + "/" + xmlName
-            xpath = '{}[@name="{}"]'.format(self.xsd_spath, xmlName)
             if self.tixi.checkElement(path):
                 value = self.tixi.getTextElement(path)
-                value = self.type(xpath, value)
+                value = self.type(xmlName, value)
                 if xmlName == "encoding" and value == "":
                     value = None
                 setattr(self, myName, value)
 
+        if self.author_aliases is not None and not os.path.isabs(self.author_aliases) and self.tixi.getDocumentPath():
+            # Relative to the input file
+            inputDir = os.path.dirname(os.path.abspath(self.tixi.getDocumentPath()))
+            self.author_aliases = os.path.normpath(os.path.join(inputDir, self.author_aliases))
+
         # ToDo: Need to find a better way to loop over these attributes
         path = spath + "/max_songs"
         if self.tixi.checkElement(path):
@@ -200,8 +241,10 @@ class EpubSongbookConfig():
                  "NO_CHORDS": ChordMode.NO_CHORDS}[self.tixi.getTextElement(path)]
 
     #
-    def defineOutputDir(self):
+    def defineOutputDir(self, incremental=False):
         """Use the settings to create output directory and place the essential files in it
+        :param incremental: keep the content of the output directory, so that the files from the previous build can be
+                            reused
         """
 
         if not os.path.isabs(self.dir_out):
@@ -210,34 +253,102 @@ class EpubSongbookConfig():
             # Get the absolute path built from the input file location and the dir_out
             self.dir_out = os.path.normpath(os.path.join(file, rel))
 
-        shutil.rmtree(self.dir_out, ignore_errors=True)
+        if not incremental:
+            shutil.rmtree(self.dir_out, ignore_errors=True)
         self.dir_text = os.path.join(self.dir_out, "text")
 
     #
     def placeEssentialFiles(self):
+        """Write the template files through the output sink. The metadata.opf and toc.ncx templates are only kept in
+        memory (self.metadata, self.toc): they are written by the SongBookGenerator, once their content is complete
+        """
 
         # Do not check for template existence. If it does not, an error will be thrown
         logging.debug(f"Copying essential files from {self.template_dir} to {self.dir_out}")
-        shutil.copytree(self.template_dir, self.dir_out)
-        logging.debug(f"Creating directory {self.dir_text}")
-        os.makedirs(self.dir_text, exist_ok=True)
 
         # Write the mimetype from scratch. It's not too long after all...
-        with open(os.path.join(self.dir_out, "mimetype"), "w") as mime:
-            mime.write("application/epub+zip")
+        self.sink.write("mimetype", b"application/epub+zip")
+
+        for dirpath, dirnames, filenames in os.walk(self.template_dir):
+            dirnames.sort()
+            for name in sorted(filenames):
+                source = os.path.join(dirpath, name)
+                target = os.path.relpath(source, self.template_dir).replace("\\", "/")
+                if target not in ["metadata.opf", "toc.ncx"]:
+                    self.sink.copyFile(target, source)
 
         # Slurp the metadata.opf
-        meta = os.path.join(self.dir_out, "metadata.opf")
-        with open(meta, "r", encoding='utf8') as f:
+        with open(os.path.join(self.template_dir, "metadata.opf"), "r", encoding='utf8') as f:
             metadata = f.read()
 
         metadata = metadata.replace("${user}", self.user)
         metadata = metadata.replace("${title}", self.title)
         metadata = metadata.replace("${language}", self.lang)
+        self.metadata = metadata
+
+        toc = os.path.join(self.template_dir, "toc.ncx")
+        if os.path.isfile(toc):
+            with open(toc, "r", encoding='utf8') as f:
+                self.toc = f.read()
+
+    #
+    def outputName(self, fileName: str) -> str:
+        """Return the name of a file in the output directory, as used by the output sink: relative to dir_out"""
+        return os.path.relpath(os.path.abspath(fileName), os.path.abspath(self.dir_out)).replace("\\", "/")
+
+    #
+    @property
+    def sink(self) -> OutputSink:
+        """Output sink receiving all files of the songbook. Unless set otherwise, the files are written to dir_out"""
+        if self._sink is None:
+            self._sink = DirectorySink(self.dir_out)
+        return self._sink
 
-        # Rewrite the file
-        with open(meta, "w", encoding='utf8') as f:
-            f.write(metadata)
+    #
+    @sink.setter
+    def sink(self, sink: OutputSink):
+        self._sink = sink
+
+    #
+    def fingerprint(self) -> str:
+        """Return a text representing the values of all settings. Used to detect the changes of the settings between
+        the builds"""
+        values = {name: str(getattr(self, name)) for name in self.xsd_elements_2_settings_map.values()}
+        # The content of the alias file changes the author names in the pages, not only its name
+        values["author_aliases_content"] = self._fileHash(self.author_aliases)
+        return json.dumps(values, sort_keys=True)
+
+    #
+    def _checkAuthorAliases(self):
+        """Make sure that the author alias file, if set, can be read. Raise ValueError otherwise, before anything is
+        written"""
+        if self.author_aliases is None:
+            return
+        if not os.path.isfile(self.author_aliases):
+            raise ValueError("Author alias file {} not found".format(self.author_aliases))
+        try:
+            Tixi().open(self.author_aliases)
+        except TixiException as e:
+            raise ValueError("Author alias file {} is not a valid XML file: {}".format(
+                self.author_aliases, getattr(e, "error", None) or e))
+
+    #
+    def _fileHash(self, fileName: str) -> str:
+        """Return the hash of the content of the file, or an empty string if there is no file. The file is only read
+        again if its modification time or size changed"""
+        if fileName is None:
+            return ""
+        try:
+            stat = os.stat(fileName)
+        except OSError:
+            return ""
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = self._fileHashes.get(fileName)
+        if cached is None or cached[0] != stamp:
+            with open(fileName, "rb") as f:
+                cached = (stamp, hashlib.sha1(f.read()).hexdigest())
+            self._fileHashes[fileName] = cached
+        return cached[1]
 
     #
     def setupAttributes(self):
@@ -0,0 +1,422 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18.10.2026 13:40
+
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-18'
+__all__ = ['OutputSink', 'DirectorySink', 'MemorySink', 'ZipSink', 'TeeSink', 'AsyncSink']
+
+import filecmp
+import logging
+import os
+import queue
+import shutil
+import threading
+import zipfile
+from collections import Counter
+
+# ioctl request cloning the content of a file (Linux: btrfs, xfs and others with reflink support)
+_FICLONE = 0x40049409
+
+
+class OutputSink(object):
+    """
+    Destination of all files of the songbook. The files are identified by their names relative to the root of the
+    book (e.g. "text/sng_song.xhtml", "metadata.opf"), always with "/" as separator.
+    """
+    # Can the files be written from several threads at once
+    threadSafe = False
+
+    #
+    def write(self, name: str, data: bytes):
+        """Write the file with the given content"""
+        raise NotImplementedError
+
+    #
+    def copyFile(self, name: str, source: str):
+        """Write the file with the content of an existing file source"""
+        with open(source, "rb") as f:
+            self.write(name, f.read())
+
+    #
+    def exists(self, name: str) -> bool:
+        """Return True if the file has been written (possibly by a previous build)"""
+        return False
+
+    #
+    def read(self, name: str) -> bytes:
+        """Return the content of a written file"""
+        raise NotImplementedError
+
+    #
+    def remove(self, name: str):
+        """Remove the file, if it exists"""
+        pass
+
+    #
+    def keep(self, name: str):
+        """Declare, that the file written by a previous build is still a part of the book"""
+        pass
+
+    #
+    def flush(self):
+        """Make sure that all files written so far are stored"""
+        pass
+
+    #
+    def close(self):
+        """Finalize the output. No files may be written afterwards"""
+        pass
+
+
+class DirectorySink(OutputSink):
+    """Write the files to a directory. Copied files that are identical to the ones already in the directory are not
+    copied again. Optionally, the files can be hardlinked or reflinked (cloned) instead of copied"""
+    threadSafe = True
+
+    def __init__(self, directory: str, link: str = None):
+        """
+        :param directory: output directory
+        :param link: how the files are copied: None (a regular copy), "hardlink" or "reflink". If linking is not
+                     possible (e.g. the source is on another file system), the file is copied
+        """
+        self.directory = directory
+        self.link = link
+
+    #
+    def path(self, name: str) -> str:
+        """Return the path of the file in the directory"""
+        return os.path.join(self.directory, name)
+
+    #
+    def write(self, name: str, data: bytes):
+        file = self.path(name)
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        if self.link is not None and os.path.isfile(file):
+            # Never write through a link to the source file
+            os.remove(file)
+        with open(file, "wb") as f:
+            f.write(data)
+
+    #
+    def copyFile(self, name: str, source: str):
+        file = self.path(name)
+        if DirectorySink.identical(source, file):
+            logging.debug("{} is up to date".format(file))
+            return
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        if os.path.isfile(file):
+            os.remove(file)
+        if self.link == "hardlink":
+            try:
+                os.link(source, file)
+                return
+            except OSError as e:
+                logging.debug("Could not hardlink {} ({}). Copying".format(source, e))
+        elif self.link == "reflink":
+            try:
+                import fcntl
+                with open(source, "rb") as src, open(file, "wb") as trg:
+                    fcntl.ioctl(trg.fileno(), _FICLONE, src.fileno())
+                shutil.copystat(source, file)
+                return
+            except (ImportError, OSError) as e:
+                logging.debug("Could not reflink {} ({}). Copying".format(source, e))
+        shutil.copy2(source, file)
+
+    #
+    @staticmethod
+    def identical(source: str, target: str) -> bool:
+        """Return True if the target file exists and has the same content as the source. The files of the same size
+        and modification time are considered identical. Otherwise, the content is compared"""
+        try:
+            sourceStat = os.stat(source)
+            targetStat = os.stat(target)
+        except OSError:
+            return False
+        if sourceStat.st_size != targetStat.st_size:
+            return False
+        if sourceStat.st_mtime_ns == targetStat.st_mtime_ns or os.path.samefile(source, target):
+            return True
+        return filecmp.cmp(source, target, shallow=False)
+
+    #
+    def exists(self, name: str) -> bool:
+        return os.path.isfile(self.path(name))
+
+    #
+    def read(self, name: str) -> bytes:
+        with open(self.path(name), "rb") as f:
+            return f.read()
+
+    #
+    def remove(self, name: str):
+        if self.exists(name):
+            os.remove(self.path(name))
+
+
+class MemorySink(OutputSink):
+    """Keep the files in a dictionary {name: content}. Nothing is written to the disk"""
+    threadSafe = True
+
+    def __init__(self):
+        self.files = dict()
+
+    #
+    def write(self, name: str, data: bytes):
+        self.files[name] = data
+
+    #
+    def exists(self, name: str) -> bool:
+        return name in self.files
+
+    #
+    def read(self, name: str) -> bytes:
+        return self.files[name]
+
+    #
+    def remove(self, name: str):
+        self.files.pop(name, None)
+
+
+class ZipSink(OutputSink):
+    """
+    Write the files directly to an EPUB container (a zip file), as soon as they are produced, so no separate archiver
+    run is needed.
+
+    As the EPUB specification requires, the "mimetype" entry is written as the first one and is not compressed.
+    Every file can be written only once. Further writes of the same file are ignored
+
+    If the EPUB file already exists, the new one is written next to it and replaces it once closed. The files kept from
+    the previous build in the incremental mode (see keep) are carried over from the old container
+    """
+    MIMETYPE = "application/epub+zip"
+
+    def __init__(self, fileName: str, compresslevel: int = 6):
+        """
+        :param fileName: name of the EPUB file to create
+        :param compresslevel: deflate compression level, from 0 (no compression) to 9 (best compression)
+        """
+        self.fileName = fileName
+        logging.info("Packaging the songbook to {}".format(os.path.abspath(fileName)))
+        self.previous = ZipSink._openPrevious(fileName)
+        self.partName = fileName + ".part" if self.previous is not None else fileName
+        self.zip = zipfile.ZipFile(self.partName, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=compresslevel)
+        self.zip.writestr(zipfile.ZipInfo("mimetype"), ZipSink.MIMETYPE, compress_type=zipfile.ZIP_STORED)
+        self.names = {"mimetype"}
+
+    #
+    def write(self, name: str, data: bytes):
+        if self._register(name):
+            self.zip.writestr(name, data)
+
+    #
+    def copyFile(self, name: str, source: str):
+        if self._register(name):
+            self.zip.write(source, name)
+
+    #
+    def exists(self, name: str) -> bool:
+        return name in self.names or (self.previous is not None and name in self.previous.NameToInfo)
+
+    #
+    def keep(self, name: str):
+        # Carry the file over from the previous container, unless it has been written again
+        if self.previous is None or name not in self.previous.NameToInfo or not self._register(name):
+            return
+        info = self.previous.getinfo(name)
+        self.zip.writestr(zipfile.ZipInfo(name, info.date_time), self.previous.read(name),
+                          compress_type=info.compress_type, compresslevel=self.zip.compresslevel)
+
+    #
+    def close(self):
+        if self.zip is None:
+            return
+        self.zip.close()
+        self.zip = None
+        if self.previous is not None:
+            self.previous.close()
+            self.previous = None
+            os.replace(self.partName, self.fileName)
+        logging.info("Written {} ({} files)".format(os.path.abspath(self.fileName), len(self.names)))
+
+    #
+    @staticmethod
+    def _openPrevious(fileName: str):
+        """Open the container written by the previous build. None if there is none, or if it cannot be read"""
+        if not os.path.isfile(fileName):
+            return None
+        try:
+            return zipfile.ZipFile(fileName, "r")
+        except (OSError, zipfile.BadZipFile):
+            logging.warning("Could not read the previous {}. It is written from scratch".format(fileName))
+            return None
+
+    #
+    def _register(self, name: str) -> bool:
+        """Return True if the file has not been added to the container yet"""
+        if name in self.names:
+            logging.debug("{} already packaged".format(name))
+            return False
+        self.names.add(name)
+        return True
+
+
+class TeeSink(OutputSink):
+    """Write the files to several sinks at once. The first one (primary) is used to read the files"""
+
+    def __init__(self, primary: OutputSink, *others: OutputSink):
+        self.sinks = [primary] + list(others)
+        self.threadSafe = all(sink.threadSafe for sink in self.sinks)
+
+    #
+    def write(self, name: str, data: bytes):
+        for sink in self.sinks:
+            sink.write(name, data)
+
+    #
+    def copyFile(self, name: str, source: str):
+        for sink in self.sinks:
+            sink.copyFile(name, source)
+
+    #
+    def exists(self, name: str) -> bool:
+        return self.sinks[0].exists(name)
+
+    #
+    def read(self, name: str) -> bytes:
+        return self.sinks[0].read(name)
+
+    #
+    def remove(self, name: str):
+        for sink in self.sinks:
+            sink.remove(name)
+
+    #
+    def keep(self, name: str):
+        # The file exists in the primary sink only. Pass it to the others
+        data = self.sinks[0].read(name)
+        for sink in self.sinks[1:]:
+            sink.write(name, data)
+
+    #
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+    #
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+class AsyncSink(OutputSink):
+    """
+    Pass the files to another sink on background writer threads, so that the rendering does not wait for the disk.
+    The queues are bounded: if the writers fall behind, writing blocks until there is space in the queue.
+    All writes of the same file are done by the same thread, in the order of submission. If the wrapped sink is not
+    thread safe, a single writer thread is used.
+
+    Errors of the writers are logged and the first one is raised when the sink is closed
+    """
+    threadSafe = True
+
+    def __init__(self, sink: OutputSink, threads: int = 2, queueSize: int = 64):
+        """
+        :param sink: the sink that actually stores the files
+        :param threads: number of writer threads
+        :param queueSize: maximum number of files waiting in the queue of each thread
+        """
+        self.sink = sink
+        n = max(1, threads) if sink.threadSafe else 1
+        self.queues = [queue.Queue(queueSize) for _ in range(n)]
+        self.lock = threading.Lock()
+        self.pending = Counter()  # name -> number of queued writes of the file
+        self.errors = list()  # (name, exception)
+        self.threads = [threading.Thread(target=self._run, args=(q,), name="SinkWriter-{}".format(i), daemon=True)
+                        for i, q in enumerate(self.queues)]
+        for thread in self.threads:
+            thread.start()
+
+    #
+    def write(self, name: str, data: bytes):
+        self._submit(name, self.sink.write, data)
+
+    #
+    def copyFile(self, name: str, source: str):
+        self._submit(name, self.sink.copyFile, source)
+
+    #
+    def exists(self, name: str) -> bool:
+        with self.lock:
+            if self.pending[name]:
+                return True
+        return self.sink.exists(name)
+
+    #
+    def read(self, name: str) -> bytes:
+        self.flush()
+        return self.sink.read(name)
+
+    #
+    def remove(self, name: str):
+        self.flush()
+        self.sink.remove(name)
+
+    #
+    def keep(self, name: str):
+        self.flush()
+        self.sink.keep(name)
+
+    #
+    def flush(self):
+        for q in self.queues:
+            q.join()
+        self.sink.flush()
+
+    #
+    def close(self):
+        if self.threads is None:
+            return
+        for q in self.queues:
+            q.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = None
+        self.sink.close()
+        for name, error in self.errors:
+            logging.error("Could not write {}: {}".format(name, error))
+        if self.errors:
+            raise self.errors[0][1]
+
+    #
+    def _submit(self, name: str, method, argument):
+        if self.threads is None:
+            raise RuntimeError("Cannot write {}, the sink is closed".format(name))
+        with self.lock:
+            self.pending[name] += 1
+        self.queues[hash(name) % len(self.queues)].put((name, method, argument))
+
+    #
+    def _run(self, q: queue.Queue):
+        """Main loop of a writer thread"""
+        while True:
+            item = q.get()
+            if item is None:
+                q.task_done()
+                return
+            name, method, argument = item
+            try:
+                method(name, argument)
+            except Exception as e:
+                with self.lock:
+                    self.errors.append((name, e))
+            finally:
+                with self.lock:
+                    self.pending[name] -= 1
+                    if not self.pending[name]:
+                        del self.pending[name]
+                q.task_done()
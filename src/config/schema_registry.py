@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18.10.2026 16:20
+
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-18'
+__all__ = ['SchemaRegistry']
+
+import hashlib
+import json
+import logging
+import os
+
+from src.xml_backend import Tixi
+
+
+class SchemaRegistry(object):
+    """
+    Metadata of the source and song XSD schemas (default values, types and enumerations of the settings and of the
+    song attributes) as plain Python data. Each pair of schema files is parsed only once per process - use
+    SchemaRegistry.get() to obtain the registry.
+
+    Optionally, the metadata can be stored as a JSON snapshot next to the source schema file, so that the next
+    process does not have to parse the schemas at all. The snapshot is only used if the schema files did not change.
+    """
+    SNAPSHOT_SUFFIX = ".snapshot.json"
+
+    # Read and write the snapshots. Set to True (e.g. by the main script) to enable
+    useSnapshots = False
+
+    _registries = dict()  # (source xsd, song xsd) -> SchemaRegistry
+
+    def __init__(self, source_xsd: str, song_xsd: str):
+        """
+        Do not use directly - use SchemaRegistry.get()
+        :param source_xsd: schema of the songbook source file
+        :param song_xsd: schema of the song source file
+        """
+        self.source_xsd = source_xsd
+        self.song_xsd = song_xsd
+        self.snapshot = source_xsd + SchemaRegistry.SNAPSHOT_SUFFIX
+
+        self.enumerations = dict()  # name of the simple type -> list of allowed values
+        self.settings = dict()  # setting name -> {"type": ..., "default": ...}, in the order of the schema
+        self.songAttributes = dict()  # song attribute name -> {"type": ..., "default": ..., "use": ...}
+
+    #
+    @staticmethod
+    def get(source_xsd: str = None, song_xsd: str = None) -> "SchemaRegistry":
+        """
+        Return the registry for the given schema files. By default, the schemas from the config directory are used
+        """
+        if source_xsd is None:
+            source_xsd = os.path.join(os.path.dirname(__file__), "source_schema.xsd")
+        if song_xsd is None:
+            song_xsd = os.path.join(os.path.dirname(__file__), "song_schema.xsd")
+        key = (os.path.abspath(source_xsd), os.path.abspath(song_xsd))
+        if key not in SchemaRegistry._registries:
+            registry = SchemaRegistry(*key)
+            if not (SchemaRegistry.useSnapshots and registry.loadSnapshot()):
+                registry.parse()
+                if SchemaRegistry.useSnapshots:
+                    registry.saveSnapshot()
+            SchemaRegistry._registries[key] = registry
+        return SchemaRegistry._registries[key]
+
+    #
+    @property
+    def songDefaults(self) -> dict:
+        """Default values of the song attributes, as added by validating a song with defaults"""
+        return {name: a["default"] for name, a in self.songAttributes.items() if a["default"] is not None}
+
+    #
+    def parse(self):
+        """Read the metadata from the schema files"""
+        logging.debug("Parsing schemas {} and {}".format(self.source_xsd, self.song_xsd))
+        for xsd in [self.song_xsd, self.source_xsd]:
+            tixi = SchemaRegistry._open(xsd)
+            for path in tixi.xPathExpressionGetAllXPaths("/xs:schema/xs:simpleType[@name]"):
+                values = [tixi.getTextAttribute(p, "value") for p in
+                          tixi.xPathExpressionGetAllXPaths(path + "/xs:restriction/xs:enumeration[@value]")]
+                self.enumerations[tixi.getTextAttribute(path, "name")] = values
+
+            if xsd == self.song_xsd:
+                xPath = '/xs:schema/xs:complexType[@name="song"]/xs:attribute[@name]'
+                for path in tixi.xPathExpressionGetAllXPaths(xPath):
+                    attribute = SchemaRegistry._describe(tixi, path)
+                    attribute["use"] = tixi.getTextAttribute(path, "use") if tixi.checkAttribute(path, "use") \
+                        else "optional"
+                    self.songAttributes[tixi.getTextAttribute(path, "name")] = attribute
+            else:
+                xPath = '/xs:schema/xs:complexType[@name="settings"]/xs:all/xs:element[@name]'
+                for path in tixi.xPathExpressionGetAllXPaths(xPath):
+                    self.settings[tixi.getTextAttribute(path, "name")] = SchemaRegistry._describe(tixi, path)
+
+    #
+    def loadSnapshot(self) -> bool:
+        """Read the metadata from the snapshot. Return False if there is no valid snapshot for the schema files"""
+        if not os.path.isfile(self.snapshot):
+            return False
+        try:
+            with open(self.snapshot, "r", encoding="utf8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("hash") != self._hash():
+            return False
+        self.enumerations = data["enumerations"]
+        self.settings = data["settings"]
+        self.songAttributes = data["songAttributes"]
+        return True
+
+    #
+    def saveSnapshot(self):
+        """Write the metadata to the snapshot file. Failure (e.g. read-only installation) is not an error"""
+        data = {"hash": self._hash(),
+                "enumerations": self.enumerations,
+                "settings": self.settings,
+                "songAttributes": self.songAttributes}
+        try:
+            with open(self.snapshot, "w", encoding="utf8") as f:
+                json.dump(data, f, indent=1)
+        except OSError as e:
+            logging.debug("Could not write the schema snapshot {}: {}".format(self.snapshot, e))
+
+    #
+    def _hash(self) -> str:
+        """Hash of the content of both schema files"""
+        h = hashlib.sha1()
+        for xsd in [self.source_xsd, self.song_xsd]:
+            with open(xsd, "rb") as f:
+                h.update(f.read())
+        return h.hexdigest()
+
+    #
+    @staticmethod
+    def _open(xsd: str) -> Tixi:
+        tixi = Tixi()
+        tixi.open(xsd)
+        tixi.registerNamespacesFromDocument()
+        return tixi
+
+    #
+    @staticmethod
+    def _describe(tixi: Tixi, path: str) -> dict:
+        """Return the type and default value of the xs:element or xs:attribute at path. The type is either the name
+        given in the "type" attribute, or the base of the restriction of the anonymous simple type, without the
+        namespace prefix"""
+        if tixi.checkAttribute(path, "type"):
+            tp = tixi.getTextAttribute(path, "type")
+        else:
+            paths = tixi.xPathExpressionGetAllXPaths('{}/xs:simpleType/xs:restriction[@base]'.format(path))
+            tp = tixi.getTextAttribute(paths[0], "base") if len(paths) == 1 else None
+        if tp is not None:
+            tp = tp.split(":")[-1]
+        default = tixi.getTextAttribute(path, "default") if tixi.checkAttribute(path, "default") else None
+        return {"type": tp, "default": default}
@@ -9,7 +9,7 @@ import os
 import re
 import sys
 
-from src.tixi import Tixi, TixiException
+from src.xml_backend import Tixi, TixiException
 from src.tools import UtfUtils
 
 
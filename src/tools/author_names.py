@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19.10.2026 16:40
+
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-19'
+__all__ = ['AuthorNames']
+
+import os
+import re
+
+from src.xml_backend import Tixi
+
+
+class AuthorNames(object):
+    """
+    Normalization of the author names found in the lyrics, music and band attributes of the songs. A lyrics or music
+    attribute may contain several authors separated with semicolons.
+
+    Spelling variants of a name are mapped to its canonical form with an optional alias file:
+
+    <authors>
+        <author name="John Doe">
+            <alias>J. Doe</alias>
+            <alias>Johnny Doe</alias>
+        </author>
+    </authors>
+
+    The variants are matched regardless of the word order ("John Doe" and "Doe, John"), case, dots and commas.
+    Each distinct attribute value is normalized only once, and there is one AuthorNames object per alias file
+    (see AuthorNames.get), shared by the index of authors and all song writers in the process.
+    """
+
+    _instances = dict()  # absolute path to the alias file, or None -> ((mtime, size), AuthorNames)
+
+    #
+    @staticmethod
+    def get(aliasFile: str = None) -> "AuthorNames":
+        """
+        Return the shared AuthorNames object. The alias file is read again if it changed
+        :param aliasFile: path to the alias file. None if there are no aliases
+        """
+        stamp = None
+        if aliasFile is not None:
+            aliasFile = os.path.abspath(aliasFile)
+            stat = os.stat(aliasFile)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = AuthorNames._instances.get(aliasFile)
+        if cached is None or cached[0] != stamp:
+            aliases = AuthorNames.read(aliasFile) if aliasFile is not None else None
+            cached = (stamp, AuthorNames(aliases))
+            AuthorNames._instances[aliasFile] = cached
+        return cached[1]
+
+    #
+    @staticmethod
+    def read(aliasFile: str) -> dict:
+        """Read the alias file and return the dictionary: variant -> canonical name"""
+        tixi = Tixi()
+        tixi.open(aliasFile)
+        aliases = dict()
+        for path in tixi.xPathExpressionGetAllXPaths("/authors/author[@name]"):
+            name = tixi.getTextAttribute(path, "name")
+            for alias in tixi.xPathExpressionGetAllXPaths(path + "/alias"):
+                aliases[tixi.getTextElement(alias).strip()] = name
+        return aliases
+
+    #
+    def __init__(self, aliases: dict = None):
+        """
+        :param aliases: dictionary: variant of the name -> canonical name
+        """
+        self.aliases = dict()  # loose form of a variant -> canonical name
+        for variant, name in (aliases or dict()).items():
+            for n in [name, variant]:
+                self.aliases[AuthorNames._loose(n)] = name
+                self.aliases[AuthorNames._loose(AuthorNames.standardize(n))] = name
+        self._split = dict()  # (attribute value, is band) -> list of tuples (author as written, canonical name)
+        self._indexNames = dict()  # (canonical name, is band) -> name in the index
+
+    #
+    @staticmethod
+    def standardize(name: str, isBandName: bool = False) -> str:
+        """Standardize author name:
+        - "J. Doe" translates to "Doe, J."
+        - "John Doe" translates to "Doe, John"
+        - "Doe, John" remains "Doe, John"
+        - "Cher" remains "Cher"
+        - "J.F. Kennedy" translates to "Kennedy, J. F."  (note the missing space in 'J.F. K...')
+
+        If input argument isBandName is True, then the order of words is not kept
+        """
+
+        # Initial modifications and standarizations
+        name = name.replace(".", ". ")  # Add space after dot
+        name = name.replace(",", ", ")  # Add space after comma
+        name = re.sub(r' +', ' ', name)  # Replace multiplem spaces with one
+
+        names = name.split(" ")
+
+        if isBandName:
+            return name
+        if names[0][-1] == ",":
+            return name
+
+        if len(names) <= 1:
+            return name
+
+        newName = []
+        newName.append(names.pop(-1) + ",")
+        newName.extend(names)
+        return " ".join(newName)
+
+    #
+    def split(self, authors: str, isBand: bool = False) -> list:
+        """
+        Return the authors found in the attribute value
+        :param authors: value of the lyrics, music or band attribute. None is allowed
+        :param isBand: the value is the name of a band: it is not split and the word order is kept
+        :return: list of tuples (author as written, canonical name), each author as written listed once
+        """
+        if authors is None:
+            return []
+        key = (authors, isBand)
+        result = self._split.get(key)
+        if result is None:
+            written = [authors.strip()] if isBand else [a.strip() for a in authors.strip().split(";")]
+            result = list(dict.fromkeys((author, self.canonical(author, isBand)) for author in written if author))
+            self._split[key] = result
+        return result
+
+    #
+    def canonical(self, author: str, isBand: bool = False) -> str:
+        """Return the canonical name of the author: from the alias file, or the name as written"""
+        name = self.aliases.get(AuthorNames._loose(author))
+        if name is None and not isBand:
+            name = self.aliases.get(AuthorNames._loose(AuthorNames.standardize(author)))
+        return name if name is not None else author
+
+    #
+    def indexName(self, name: str, isBand: bool = False) -> str:
+        """Return the name of the author as listed in the index of authors, e.g. "Doe, John" """
+        key = (name, isBand)
+        indexName = self._indexNames.get(key)
+        if indexName is None:
+            indexName = AuthorNames.standardize(self.canonical(name, isBand), isBand)
+            self._indexNames[key] = indexName
+        return indexName
+
+    #
+    def songsByAuthor(self, songs: list, standardized: dict = None) -> dict:
+        """
+        Collect the songs of each author in a single pass
+        :param songs: SongRecord objects, e.g. SongCatalog.songs
+        :param standardized: if given, filled with the names of the authors as written -> names in the index
+        :return: dictionary: name in the index -> {song title: xhtml file}
+        """
+        result = dict()
+        for song in songs:
+            title = song.title
+            xhtml = song.xhtml
+            for attr in ["lyrics", "music", "band"]:
+                isBand = attr == "band"
+                for author, name in self.split(getattr(song, attr), isBand):
+                    indexName = self.indexName(name, isBand)
+                    if standardized is not None:
+                        standardized[author] = indexName
+                    result.setdefault(indexName, dict())[title] = xhtml
+        return result
+
+    #
+    @staticmethod
+    def _loose(name: str) -> str:
+        """Return the form of the name used to match the variants: lower case, without dots, commas and extra spaces"""
+        return " ".join(re.sub(r"[.,]", " ", name).casefold().split())
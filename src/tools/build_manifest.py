@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18.10.2026 11:05
+
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-18'
+__all__ = ['BuildManifest']
+
+import hashlib
+import json
+import logging
+import os
+
+from src.config import OutputSink
+
+
+class BuildManifest(object):
+    """
+    Record of the files generated in the output directory together with the fingerprints of the inputs they were
+    built from. Used in the incremental mode to skip the files whose inputs did not change since the previous build,
+    and to remove the files that are not generated anymore (e.g. for songs removed from the songbook)
+    """
+    FILE_NAME = ".songbook_manifest.json"
+
+    # Increase whenever the way of rendering the files changes, so that the old outputs are not reused
+    VERSION = 1
+
+    def __init__(self, dir_out: str, sink: OutputSink):
+        """
+        :param dir_out: output directory. The manifest is stored in it
+        :param sink: output sink, to which the files are written
+        """
+        self.dir_out = dir_out
+        self.sink = sink
+        self.path = os.path.join(dir_out, BuildManifest.FILE_NAME)
+        self.previous = dict()  # file name -> fingerprint, as read from the manifest of the previous build
+        self.current = dict()  # file name -> fingerprint of the files that are part of the current build
+        self.rebuilt = 0
+        self.skipped = 0
+        self.load()
+
+    #
+    def load(self):
+        """Read the manifest of the previous build. Missing or broken manifest means that everything is rebuilt"""
+        if not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            logging.warning("Could not read the build manifest {}. Rebuilding all files".format(self.path))
+            return
+        if data.get("version") != BuildManifest.VERSION:
+            return
+        self.previous = data.get("files", dict())
+
+    #
+    def save(self):
+        """Write the manifest of the current build"""
+        with open(self.path, "w", encoding="utf8") as f:
+            json.dump({"version": BuildManifest.VERSION, "files": self.current}, f, indent=1, sort_keys=True)
+
+    #
+    def update(self, fileName: str, fingerprint: str) -> bool:
+        """
+        Register the file as a part of the current build.
+        :param fileName: name of the output file, as used by the sink
+        :param fingerprint: fingerprint of all the inputs that the file is built from (see BuildManifest.fingerprint)
+        :return: True if the file must be (re)built, False if the file from the previous build can be kept
+        """
+        self.current[fileName] = fingerprint
+        if self.previous.get(fileName) == fingerprint and self.sink.exists(fileName):
+            logging.debug("Up to date: {}".format(fileName))
+            self.skipped += 1
+            return False
+        self.rebuilt += 1
+        return True
+
+    #
+    def prune(self):
+        """Remove the files generated by the previous build, that are not a part of the current build anymore"""
+        for fileName in sorted(set(self.previous.keys()) - set(self.current.keys())):
+            if self.sink.exists(fileName):
+                logging.info("Removing obsolete file {}".format(fileName))
+                self.sink.remove(fileName)
+
+    #
+    @staticmethod
+    def fingerprint(*inputs) -> str:
+        """Return a fingerprint (hash) of the given inputs. The inputs are converted to strings"""
+        h = hashlib.sha1()
+        for item in inputs:
+            h.update(str(item).encode("utf8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    #
+    @staticmethod
+    def fileHash(fileName: str) -> str:
+        """Return a hash of the file content"""
+        h = hashlib.sha1()
+        with open(fileName, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                h.update(chunk)
+        return h.hexdigest()
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18.10.2026 21:45
+
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-18'
+__all__ = ['BuildProfiler']
+
+import cProfile
+import json
+import logging
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class _Record(object):
+    """Measurements of a single phase or song"""
+    __slots__ = ("name", "wall", "cpu", "peak", "children")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.peak = 0
+        self.children = list()
+
+    def asDict(self) -> dict:
+        result = {"name": self.name,
+                  "wall": round(self.wall, 6),
+                  "cpu": round(self.cpu, 6),
+                  "peak_bytes": self.peak}
+        if self.children:
+            result["children"] = [child.asDict() for child in self.children]
+        return result
+
+
+class BuildProfiler(object):
+    """
+    Record the wall time, the CPU time and the peak of the memory allocated by Python (tracemalloc) of the phases of
+    the build, their sub-steps and of the individual songs. Phases can be nested. Optionally, each top level phase
+    is also profiled with cProfile and the statistics are dumped to a separate file.
+
+    A disabled profiler (the default one of the SongBookGenerator) records nothing, so the phases can be marked
+    unconditionally.
+    """
+
+    def __init__(self, enabled: bool = True, cprofileDir: str = None):
+        """
+        :param enabled: record the measurements. If False, all methods do nothing
+        :param cprofileDir: directory, to which the cProfile statistics of the top level phases are dumped
+                            (<phase>.prof). None disables cProfile
+        """
+        self.enabled = enabled
+        self.cprofileDir = cprofileDir
+        self.phases = list()  # top level phase records
+        self.songs = list()  # song records
+        self._stack = list()  # records of the currently open phases
+        self._ownsTracemalloc = False
+
+    #
+    def start(self):
+        """Start tracing the memory allocations. Called automatically by the first phase"""
+        if self.enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._ownsTracemalloc = True
+
+    #
+    def stop(self):
+        """Stop tracing the memory allocations, if they were started by this profiler"""
+        if self._ownsTracemalloc:
+            tracemalloc.stop()
+            self._ownsTracemalloc = False
+
+    #
+    @contextmanager
+    def phase(self, name: str):
+        """Context manager measuring a phase of the build. If another phase is open, this one is its sub-step"""
+        if not self.enabled:
+            yield
+            return
+        record = _Record(name)
+        (self._stack[-1].children if self._stack else self.phases).append(record)
+
+        profile = None
+        if self.cprofileDir is not None and not self._stack:
+            profile = cProfile.Profile()
+        with self._measure(record):
+            if profile is not None:
+                profile.enable()
+            try:
+                yield
+            finally:
+                if profile is not None:
+                    profile.disable()
+        if profile is not None:
+            os.makedirs(self.cprofileDir, exist_ok=True)
+            profile.dump_stats(os.path.join(self.cprofileDir, "{}.prof".format(name)))
+
+    #
+    @contextmanager
+    def song(self, name: str):
+        """Context manager measuring the rendering of a single song"""
+        if not self.enabled:
+            yield
+            return
+        record = _Record(name)
+        self.songs.append(record)
+        with self._measure(record):
+            yield
+
+    #
+    def addSong(self, name: str, wall: float, cpu: float):
+        """Add the measurement of a song rendered elsewhere, e.g. in a worker process. Its memory peak is unknown"""
+        if not self.enabled:
+            return
+        record = _Record(name)
+        record.wall = wall
+        record.cpu = cpu
+        record.peak = None
+        self.songs.append(record)
+
+    #
+    @contextmanager
+    def _measure(self, record: _Record):
+        self.start()
+        # The peak is reset for each measured block. The peak seen so far is kept by the enclosing block
+        outer = self._stack[-1] if self._stack else None
+        if outer is not None:
+            outer.peak = max(outer.peak, BuildProfiler._peak())
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        self._stack.append(record)
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            record.wall = time.perf_counter() - wall
+            record.cpu = time.process_time() - cpu
+            record.peak = max(record.peak, BuildProfiler._peak())
+            self._stack.pop()
+            if outer is not None:
+                outer.peak = max(outer.peak, record.peak)
+
+    #
+    @staticmethod
+    def _peak() -> int:
+        """Return the peak of the traced memory since it was last reset. Before Python 3.9 the peak cannot be reset,
+        so the memory traced at the moment is returned instead: the peaks are only estimated from the ends of
+        the measured blocks"""
+        current, peak = tracemalloc.get_traced_memory()
+        return peak if hasattr(tracemalloc, "reset_peak") else current
+
+    #
+    def report(self, slowest: int = None) -> dict:
+        """
+        Return the measurements as a dictionary. Times are in seconds, the memory peaks in bytes
+        :param slowest: number of the slowest songs to include. All songs by default
+        """
+        songs = sorted(self.songs, key=lambda r: r.wall, reverse=True)
+        if slowest is not None:
+            songs = songs[:slowest]
+        return {"phases": [record.asDict() for record in self.phases],
+                "songs": [record.asDict() for record in songs],
+                "songs_total": {"count": len(self.songs),
+                                "wall": round(sum(r.wall for r in self.songs), 6),
+                                "cpu": round(sum(r.cpu for r in self.songs), 6)}}
+
+    #
+    def save(self, fileName: str):
+        """Write the report to a JSON file and log the summary of the top level phases"""
+        for record in self.phases:
+            logging.info("Phase {}: {:.3f} s wall, {:.3f} s CPU, peak {:.1f} MB".format(
+                record.name, record.wall, record.cpu, record.peak / 1024 / 1024))
+        with open(fileName, "w", encoding="utf8") as f:
+            json.dump(self.report(), f, indent=1, ensure_ascii=False)
+        logging.info("Profile written to {}".format(os.path.abspath(fileName)))
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19.10.2026 09:10
+
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-19'
+__all__ = ['ChordTokenizer', 'ChordLine', 'SongPart']
+
+from collections import namedtuple
+
+# A single line of a verse or chorus:
+#  text   - the lyrics, with the chord insertion characters
+#  plain  - the lyrics without the chord insertion characters, as written when the chords are not shown
+#  chunks - the lyrics split on the chord insertion characters
+#  chords - the chords of the line, None if the line has no chords
+ChordLine = namedtuple("ChordLine", ["text", "plain", "chunks", "chords"])
+
+
+class SongPart(object):
+    """A verse or chorus split into lines, chunks and chords. The result of ChordTokenizer.tokenize"""
+    __slots__ = ("lines", "hasChords", "blocks")
+
+    def __init__(self, lines: list, hasChords: bool):
+        """
+        :param lines: list of ChordLine
+        :param hasChords: True if any of the lines has the chords
+        """
+        self.lines = lines
+        self.hasChords = hasChords
+        # The lines with chords, while the neighboring lines without chords are merged into lists
+        self.blocks = list()
+        for line in lines:
+            if line.chords is not None:
+                self.blocks.append(line)
+            elif self.blocks and isinstance(self.blocks[-1], list):
+                self.blocks[-1].append(line)
+            else:
+                self.blocks.append([line])
+
+
+class ChordTokenizer(object):
+    """
+    Parse the text of a verse or chorus once into a structure used by all chord modes of the SongWriter.
+    In the text, the chords of a line follow the chord separator (CS) and are separated with spaces. Each chord
+    is played at the next chord insertion character (CI) of the line
+    """
+
+    def __init__(self, CS: str, CI: str):
+        """
+        :param CS: chord separator
+        :param CI: chord insertion character
+        """
+        self.CS = CS
+        self.CI = CI
+
+    #
+    def tokenize(self, text: str) -> SongPart:
+        """
+        :param text: the text of the verse or chorus
+        :return: SongPart
+        """
+        text = text.strip()
+        lines = list()
+        for line in text.split("\n"):
+            parts = line.strip().split(self.CS)
+            lyrics = parts[0].strip()
+            chords = tuple(parts[1].strip().split(" ")) if len(parts) > 1 else None
+            lines.append(ChordLine(lyrics, parts[0].replace(self.CI, ""), tuple(lyrics.split(self.CI)), chords))
+        return SongPart(lines, self.CS in text)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19.10.2026 15:40
+
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-19'
+__all__ = ['Collation']
+
+import unicodedata
+
+
+class Collation(object):
+    """
+    Sorting of the titles and author names according to the alphabet of the songbook language, e.g. in Polish
+    "Łza" comes after "Lato" and before "Mama", not after "Zima".
+
+    The letters of the alphabet are sorted in its order. Other letters are sorted as their base letters (e.g. "é" as
+    "e"), so do the letters with diacritics in the languages that do not treat them as separate letters (e.g. "ü" in
+    German). The case is only taken into account if the texts are otherwise equal. Spaces and digits precede the
+    letters, the punctuation is ignored.
+
+    The sort key and heading of each text are computed only once, and there is one Collation object per language
+    (see Collation.get), so the keys are shared by all indexes and all builds in the process.
+    """
+
+    # Alphabets of the languages that have letters with diacritics sorted separately. The other languages use LATIN
+    ALPHABETS = {"pl": "aąbcćdeęfghijklłmnńoópqrsśtuvwxyzźż"}
+    LATIN = "abcdefghijklmnopqrstuvwxyz"
+
+    _instances = dict()  # language -> Collation
+
+    #
+    @staticmethod
+    def get(lang: str) -> "Collation":
+        """Return the shared Collation of the language, e.g. "pl" or "pl-PL". """
+        lang = (lang or "").split("-")[0].split("_")[0].lower()
+        if lang not in Collation._instances:
+            Collation._instances[lang] = Collation(lang)
+        return Collation._instances[lang]
+
+    #
+    def __init__(self, lang: str):
+        """
+        :param lang: language code, e.g. "pl". Only the primary subtag is used
+        """
+        self.lang = lang
+        self.alphabet = Collation.ALPHABETS.get(lang, Collation.LATIN)
+        # Weights of the characters: the space first, then the digits, then the letters of the alphabet
+        self._weights = {" ": "\x01"}
+        for i, c in enumerate("0123456789" + self.alphabet):
+            self._weights[c] = chr(0x20 + i)
+        self._keys = dict()  # text -> sort key
+        self._headings = dict()  # text -> heading
+
+    #
+    def key(self, text: str) -> tuple:
+        """Return the sort key of the text"""
+        key = self._keys.get(text)
+        if key is None:
+            folded = text.casefold()
+            key = ("".join(self._weight(c) for c in folded), folded, text)
+            self._keys[text] = key
+        return key
+
+    #
+    def sorted(self, texts) -> list:
+        """Return the texts sorted according to the alphabet"""
+        return sorted(texts, key=self.key)
+
+    #
+    def heading(self, text: str) -> str:
+        """Return the letter under which the text is listed in an index: the first letter (or digit) of the text,
+        capitalized, as a letter of the alphabet, e.g. "Ł" for "Łza" in Polish, but "U" for "Über" in German.
+        The first character of the text, if it has no letters or digits"""
+        heading = self._headings.get(text)
+        if heading is None:
+            heading = text[:1]
+            for c in text.casefold():
+                weight = self._weight(c)
+                if weight and weight != self._weights[" "]:
+                    heading = self._letter(c).upper()
+                    break
+            self._headings[text] = heading
+        return heading
+
+    #
+    def _letter(self, c: str) -> str:
+        """Return the character as a letter of the alphabet: itself, or its base letter"""
+        if c in self._weights:
+            return c
+        return "".join(b for b in unicodedata.normalize("NFKD", c) if b in self._weights) or c
+
+    #
+    def _weight(self, c: str) -> str:
+        """Return the primary weight of the character. Empty for the ignored characters"""
+        weight = self._weights.get(c)
+        if weight is not None:
+            return weight
+        if c.isspace():
+            return self._weights[" "]
+        # The letters out of the alphabet are sorted as their base letters. The letters of other scripts follow the
+        # alphabet in the order of their code points. The other characters are ignored
+        weight = "".join(self._weights.get(b, "") for b in unicodedata.normalize("NFKD", c))
+        if not weight and c.isalnum():
+            weight = chr(0x100 + ord(c))
+        return weight
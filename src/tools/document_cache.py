@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18.10.2026 15:10
+
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-18'
+__all__ = ['DocumentCache', 'SourceDocument']
+
+import logging
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import src.xml_backend
+from src.xml_backend import Tixi, TixiException, ReturnCode
+from .validation_cache import ValidationCache
+
+
+class SourceDocument(object):
+    """
+    A song source file, parsed once. Keeps the raw (not validated) attributes and links of the <song> element,
+    as needed by the preprocessing, and the Tixi validated with the song schema defaults, as needed by the SongWriter.
+    """
+
+    def __init__(self, fileName: str, size: int):
+        self.fileName = fileName
+        self.size = size
+        self.tixi = Tixi()
+        self.tixi.open(fileName)
+
+        # Snapshot of the raw content, taken before the document is escaped and validated with defaults
+        self.attributes = self.tixi.getAttributes("/song")
+        self.links = list()  # titles of the /song/link elements. None if the link has no title
+        for path in self.tixi.xPathExpressionGetAllXPaths("/song/link"):
+            if self.tixi.checkAttribute(path, "title"):
+                self.links.append(self.tixi.getTextAttribute(path, "title"))
+            else:
+                self.links.append(None)
+
+        self._validated = False
+        self._error = None
+
+    #
+    def attribute(self, name: str) -> str:
+        """Return the raw value of the attribute of the <song> element. Raise TixiException if it does not exist"""
+        if name not in self.attributes:
+            e = TixiException(ReturnCode.ATTRIBUTE_NOT_FOUND)
+            e.error = "/song/@{} not found in file {}".format(name, self.fileName)
+            raise e
+        return self.attributes[name]
+
+    #
+    def validated(self, xsd: str) -> Tixi:
+        """
+        Return the Tixi validated with the defaults of the xsd schema.
+        The validation is only done once (or not at all, if the result is in the ValidationCache). If it fails,
+        the same exception is raised on every call
+        """
+        if not self._validated:
+            self._validated = True
+            try:
+                self.tixi = ValidationCache.validated(self.tixi, xsd, self.fileName)
+            except TixiException as e:
+                e.error += " in file {}".format(self.fileName)
+                self._error = e
+        if self._error is not None:
+            raise self._error
+        return self.tixi
+
+
+class DocumentCache(object):
+    """
+    Cache of the parsed song source files, so that each of them is opened, parsed and validated only once per build.
+    The documents are identified by the absolute path, and are parsed again if their modification time or size
+    changed. The total size of the cached files is limited: if it is exceeded, the least recently used documents
+    are evicted.
+    """
+
+    def __init__(self, maxSize: int = 64 * 1024 * 1024):
+        """
+        :param maxSize: maximum total size (in bytes) of the source files kept in the cache
+        """
+        self.maxSize = maxSize
+        self.size = 0
+        self.documents = OrderedDict()  # absolute path -> ((mtime, size), SourceDocument)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    #
+    def get(self, fileName: str) -> SourceDocument:
+        """
+        Return the parsed document. Raise TixiException if the file cannot be opened
+        """
+        path = os.path.abspath(fileName)
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        if path in self.documents:
+            cachedStamp, document = self.documents[path]
+            if cachedStamp == stamp:
+                self.hits += 1
+                self.documents.move_to_end(path)
+                return document
+            # The file has changed
+            self._remove(path)
+
+        self.misses += 1
+        document = SourceDocument(path, stat.st_size)
+        self._add(path, stamp, document)
+        return document
+
+    #
+    def preload(self, fileNames, xsd: str = None, jobs: int = None) -> dict:
+        """
+        Parse the files not cached yet on a thread pool, and optionally validate them, and add them to the cache.
+        Only the lxml backend parses on several threads. TiXI keeps the documents in a registry of the C library,
+        which is not known to be thread safe, so with TiXI the files are parsed one after another
+        :param fileNames: paths to the song source files
+        :param xsd: song schema. If given, the documents are also validated with its defaults
+        :param jobs: number of threads. By default, depends on the number of CPUs
+        :return: dictionary: absolute path -> TixiException, for the files that could not be parsed or are not valid
+        """
+        paths = [path for path in dict.fromkeys(os.path.abspath(f) for f in fileNames) if path not in self.documents]
+
+        def load(path):
+            stat = os.stat(path)
+            document = None
+            try:
+                document = SourceDocument(path, stat.st_size)
+                if xsd is not None:
+                    document.validated(xsd)
+            except TixiException as e:
+                if document is None:
+                    e.error = "{} in file {}".format(getattr(e, "error", "") or "Could not parse", path)
+                return path, stat, document, e
+            return path, stat, document, None
+
+        if DocumentCache.threadSafe() and jobs != 1 and len(paths) > 1:
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                results = list(pool.map(load, paths))
+        else:
+            results = [load(path) for path in paths]
+
+        errors = dict()
+        for path, stat, document, error in results:
+            if document is not None:
+                self.misses += 1
+                self._add(path, (stat.st_mtime_ns, stat.st_size), document)
+            if error is not None:
+                errors[path] = error
+        return errors
+
+    #
+    @staticmethod
+    def threadSafe() -> bool:
+        """Return True if the documents can be parsed and validated on several threads at once"""
+        return src.xml_backend.BACKEND == "lxml"
+
+    #
+    def stats(self) -> dict:
+        """Return the statistics of the cache usage"""
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "documents": len(self.documents),
+                "size": self.size}
+
+    #
+    def clear(self):
+        """Remove all documents from the cache"""
+        self.documents.clear()
+        self.size = 0
+
+    #
+    def _add(self, path, stamp, document):
+        self.documents[path] = (stamp, document)
+        self.size += document.size
+        while self.size > self.maxSize and len(self.documents) > 1:
+            self._remove(next(iter(self.documents)))
+            self.evictions += 1
+
+    #
+    def _remove(self, path):
+        stamp, document = self.documents.pop(path)
+        self.size -= document.size
+        logging.debug("Removed {} from the document cache".format(path))
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19.10.2026 10:05
+
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-19'
+__all__ = ['EditionBuilder']
+
+import logging
+import os
+
+from src.config import EpubSongbookConfig
+from .build_profiler import BuildProfiler
+from .document_cache import DocumentCache
+from .general import TixiCopy
+from .song_book_generator import SongBookGenerator
+from .validation_cache import ValidationCache
+
+
+class EditionBuilder(object):
+    """
+    Build several editions of the songbook in one process. The editions are declared in the master XML:
+
+    <editions>
+        <edition name="lyrics">
+            <prefered_chord_mode>NO_CHORDS</prefered_chord_mode>
+            <output_dir>./lyrics</output_dir>
+        </edition>
+    </editions>
+
+    and each of them overrides some of the settings. The master XML is parsed and validated only once. The part of the
+    preprocessing that does not depend on the settings (pulling the attributes and links from the song source files)
+    is run once as well, and only the rest of it is run for each edition, on its copy of the master. The song source
+    files are parsed and validated only once for all editions.
+    """
+
+    def __init__(self, input_file: str, xsd_file: str = None, editions: list = None, epub: str = None,
+                 profiler: BuildProfiler = None, **options):
+        """
+        :param input_file: master XML file
+        :param xsd_file: XSD schema file to validate the input_file
+        :param editions: names of the editions to build. All editions defined in the input_file by default
+        :param epub: name of the EPUB file. If given, each edition is also packed to its own EPUB container, with the
+                     name of the edition appended to the name of the file
+        :param profiler: BuildProfiler. The phases of all editions are recorded, prefixed with the edition name
+        :param options: other arguments of the SongBookGenerator
+        """
+        self.profiler = profiler if profiler is not None else BuildProfiler(enabled=False)
+        with self.profiler.phase("parse"):
+            self.master = ValidationCache.open(input_file, xsd_file, recursive=True)
+
+        defined = EpubSongbookConfig.editions(self.master)
+        if not defined:
+            raise ValueError("No editions defined in {}".format(input_file))
+        self.editions = list(editions) if editions else defined
+        for edition in self.editions:
+            if edition not in defined:
+                raise ValueError("Edition {} is not defined in {}".format(edition, input_file))
+
+        # Each edition must have its own output directory, otherwise one would remove the files of the other
+        outputDirs = dict()
+        for edition in self.editions:
+            settings = EpubSongbookConfig(self.master, edition)
+            dir_out = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(input_file)), settings.dir_out))
+            if dir_out in outputDirs:
+                raise ValueError("Editions {} and {} have the same output directory {}".format(
+                    outputDirs[dir_out], edition, dir_out))
+            outputDirs[dir_out] = edition
+
+        self.input_file = input_file
+        self.epub = epub
+        self.options = options
+        self.documents = self.options.pop("documents", None) or DocumentCache()
+
+    #
+    def build(self, jobs: int = 1):
+        """
+        Build all editions
+        :param jobs: number of processes rendering the songs
+        """
+        with self.profiler.phase("preprocessSources"):
+            # Dry run: the generator only preprocesses the master. No edition: none of the settings is applied to it
+            sg = SongBookGenerator(self.input_file, master=self.master, documents=self.documents, preprocess=False,
+                                   dryRun=True, profiler=self.profiler)
+            if not sg.preprocessSources(limits=False):
+                raise RuntimeError
+        for edition in self.editions:
+            logging.info("Building edition {}".format(edition))
+            with self.profiler.phase("{}.construct".format(edition)):
+                master = TixiCopy(self.master.exportDocumentAsString(), self.master.getDocumentPath())
+                sg = SongBookGenerator(self.input_file, master=master, edition=edition, documents=self.documents,
+                                       preprocessed=True, epub=self.epubName(edition), profiler=self.profiler,
+                                       **self.options)
+            with self.profiler.phase("{}.write_songs".format(edition)):
+                sg.write_songs(jobs=jobs)
+            with self.profiler.phase("{}.write_sections".format(edition)):
+                sg.write_sections()
+            with self.profiler.phase("{}.write_indexes".format(edition)):
+                sg.write_indexes()
+            with self.profiler.phase("{}.write_toc".format(edition)):
+                sg.write_toc()
+            with self.profiler.phase("{}.write_metadata".format(edition)):
+                sg.write_metadata()
+            with self.profiler.phase("{}.finish".format(edition)):
+                sg.finish()
+        logging.debug("Song source files cache after {} editions: {hits} hits, {misses} misses".format(
+            len(self.editions), **self.documents.stats()))
+
+    #
+    def epubName(self, edition: str) -> str:
+        """Return the name of the EPUB file of the edition, or None if no EPUB is written"""
+        if self.epub is None:
+            return None
+        base, ext = os.path.splitext(self.epub)
+        return "{}_{}{}".format(base, edition, ext or ".epub")
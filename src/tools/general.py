@@ -8,45 +8,46 @@ A collection of general purpose utils that can be used in each class
 
 """
 
-__all__ = ['escapeQuoteMarks']
+__all__ = ['exportWithEncoding', 'TixiCopy']
 __date__ = '2021-06-05'
 __authors__ = ["Piotr Gradkowski <grotsztaksel@o2.pl>"]
 
 import re
 
-from src.tixi import Tixi
+from src.config.schema_registry import SchemaRegistry
+from src.xml_backend import Tixi
 
 
-def escapeQuoteMarks(tixi: Tixi):
+def exportWithEncoding(tixi: Tixi, encoding="utf-8") -> str:
     """
-    Replace all single and double quotes in attributes with &apos; and &quot; , respectively
+    Return the content of the tixi as text. If the XML declaration does not define the encoding, add it
     """
-    for path in tixi.xPathExpressionGetAllXPaths("//*[@*]"):
-        # xpath expression means all elements that have any attributes
-        for i in range(tixi.getNumberOfAttributes(path)):
-            attr = tixi.getAttributeName(path, i + 1)
-            value = tixi.getTextAttribute(path, attr)
-            value1 = value.replace("'", "&apos;")
-            value1 = value1.replace('"', "&quot;")
-            if value == value1:
-                continue
-            tixi.addTextAttribute(path, attr, value1)
+    text = tixi.exportDocumentAsString()
+    if text.startswith('<?xml version="1.0"?>'):
+        text = text[:19] + ' encoding="{}"'.format(encoding) + text[19:]
+    return text
+
+
+class TixiCopy(Tixi):
+    """
+    Document opened from a text, e.g. an in-memory copy of another document. It reports the path of the original
+    document, so that the relative paths in it are resolved the same way as in the original
+    """
+
+    def __init__(self, text: str, documentPath: str):
+        super(TixiCopy, self).__init__()
+        self.openString(text)
+        self.documentPath = documentPath
+
+    #
+    def getDocumentPath(self):
+        return self.documentPath
 
 
 def getDefaultSongAttributes(xsd):
     """ Return a dictionary of default values of attributes of <song>
-    Create an empty song Tixi and validate it with defaults so that the default attributes are created.
-    Then collect the attributes"""
-
-    song = Tixi()
-    song.create("song")
-    # This is a required attribute
-    song.addTextAttribute("/song", "title", "dummy")
-
-    song.schemaValidateWithDefaultsFromFile(xsd)
-    defaultAttributes = song.getAttributes("/song")
-    defaultAttributes.pop("title")
-    return defaultAttributes
+    The values are taken from the schema registry, so the schema is only parsed once"""
+    return dict(SchemaRegistry.get(song_xsd=xsd).songDefaults)
 
 
 def tixi_noXMLNS(xmlFile):
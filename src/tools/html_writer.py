@@ -14,7 +14,8 @@ import os
 import re
 
 from src.config import EpubSongbookConfig
-from src.tixi import Tixi
+from src.xml_backend import Tixi
+from .xhtml_document import XhtmlDocument
 
 
 class HtmlWriter(object):
@@ -23,17 +24,17 @@ class HtmlWriter(object):
     def __init__(self, tixi: Tixi, settings: EpubSongbookConfig):
         self.src_tixi = tixi
         self.settings = settings
-        self.tixi = Tixi()
-        self.tixi.create("html")
-        self.tixi.addTextAttribute("/html", "xmlns", "http://www.w3.org/1999/xhtml")
-        self.tixi.createElement("/html", "head")
-
-        headPath = "/html/head"
+        if settings.serializer == "stream":
+            self.tixi = XhtmlDocument("html")
+        else:
+            self.tixi = Tixi()
+            self.tixi.create("html")
+        self.root = "/html"
+        self.tixi.addTextAttribute(self.root, "xmlns", "http://www.w3.org/1999/xhtml")
+        headPath = self.tixi.createElement(self.root, "head")
 
         self.tixi.addTextElement(headPath, "title", self.settings.title)
-        self.tixi.createElement(headPath, "link")
-
-        linkPath = headPath + "/link"
+        linkPath = self.tixi.createElement(headPath, "link")
 
         attrs = {"rel": "stylesheet",
                  "type": "text/css",
@@ -41,10 +42,16 @@ class HtmlWriter(object):
         for a in attrs:
             self.tixi.addTextAttribute(linkPath, a, attrs[a])
 
-        self.root = "/html"
-
     def saveFile(self, fileName):
         """Apply specific formatting and save the content of the self.self.tixi to a file filename"""
+        HtmlWriter.writeHtml(self.settings, fileName, self.exportHtml())
+
+    def exportHtml(self) -> str:
+        """Apply specific formatting to the content of the self.tixi and return it as text ready to be saved"""
+        if isinstance(self.tixi, XhtmlDocument):
+            # Already written in the final formatting
+            return self.tixi.exportHtml(self.settings.encoding)
+
         text = self.tixi.exportDocumentAsString()
 
         # First of all, add encoding if present
@@ -62,9 +69,11 @@ class HtmlWriter(object):
         text = re.sub(r"(<\/?t[dr].*?>)\s+(<\/?t[dr])", r"\1\2", text)
         # repeat to catch also the overlapping tokens: possible if td is empty (<td/>)
         text = re.sub(r"(<\/?t[dr].*?>)\s+(<\/?t[dr])", r"\1\2", text)
+        return text
 
+    @staticmethod
+    def writeHtml(settings: EpubSongbookConfig, fileName, text):
+        """Write the already formatted text (see exportHtml) to the file fileName through the output sink"""
         logging.debug("Writing HTML file: {}".format(os.path.abspath(fileName)))
-        file = open(os.path.join(fileName), "w", encoding='utf8')
-        file.write(text)
-        file.close()
+        settings.sink.write(settings.outputName(fileName), text.encode("utf8"))
         logging.debug("   -- OK")
@@ -8,18 +8,27 @@ __authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
 __date__ = '2020-11-27'
 __all__ = ['AuthorsWriter']
 
-import re
-
 from src.config import EpubSongbookConfig
-from src.tixi import Tixi
+from src.xml_backend import Tixi
+from .author_names import AuthorNames
+from .collation import Collation
 from .html_writer import HtmlWriter
+from .song_catalog import SongCatalog
 
 
 class AuthorsWriter(HtmlWriter):
     """Class responsible for writing the index of authors"""
 
-    def __init__(self, tixi: Tixi, settings: EpubSongbookConfig):
+    def __init__(self, tixi: Tixi, settings: EpubSongbookConfig, catalog: SongCatalog = None):
+        """
+        :param tixi: the songbook tixi
+        :param settings: songbook settings
+        :param catalog: catalog of the songs in the tixi. If None, it is created from the tixi
+        """
         super(AuthorsWriter, self).__init__(tixi, settings)
+        self.catalog = catalog if catalog is not None else SongCatalog(tixi)
+        self.collation = Collation.get(settings.lang)
+        self.authors = AuthorNames.get(settings.author_aliases)
         # This the author strings to standardized author names to appear in the index
 
         self.standardized_author_names = dict()
@@ -29,63 +38,15 @@ class AuthorsWriter(HtmlWriter):
     #
     @staticmethod
     def standardize_author_name(name, isBandName=False):
-        """Standardize author name:
-        - "J. Doe" translates to "Doe, J."
-        - "John Doe" translates to "Doe, John"
-        - "Doe, John" remains "Doe, John"
-        - "Cher" remains "Cher"
-        - "J.F. Kennedy" translates to "Kennedy, J. F."  (note the missing space in 'J.F. K...')
-
-        If input argument isBandName is True, then the order of words is not kept
-        """
-
-        # Initial modifications and standarizations
-        name = name.replace(".", ". ")  # Add space after dot
-        name = name.replace(",", ", ")  # Add space after comma
-        name = re.sub(r' +', ' ', name)  # Replace multiplem spaces with one
-
-        names = name.split(" ")
-
-        if isBandName:
-            return name
-        if names[0][-1] == ",":
-            return name
-
-        if len(names) <= 1:
-            return name
-
-        newName = []
-        newName.append(names.pop(-1) + ",")
-        newName.extend(names)
-        return " ".join(newName)
+        """Standardize author name, e.g. "John Doe" translates to "Doe, John". See AuthorNames.standardize"""
+        return AuthorNames.standardize(name, isBandName)
 
     #
     def findSongsByAuthors(self):
-        """For each author name in the dictionary, find the songs associated with that name. Then, find
-           the standardized name and create a list (so that it can be sorted) of tuples (title, file)
+        """For each author name, find the songs associated with that name, under the standardized canonical name
+        of the author (see AuthorNames)
         """
-        for path in self.src_tixi.xPathExpressionGetAllXPaths("//song[@lyrics or @music or @band]"):
-            for attr in ["lyrics", "music", "band"]:
-                isBand = attr == "band"
-                # For each of these attributes, if exist and not yet in the dictionary,
-                # Standardize te name. If it is a band, make sure not to alter the word order
-                if self.src_tixi.checkAttribute(path, attr):
-                    authors = self.src_tixi.getTextAttribute(path, attr).strip()
-                    if isBand:
-                        authors = [authors]
-                    else:
-                        authors = authors.split(";")
-
-                    for a in authors:
-                        author = a.strip()
-                        stdName = AuthorsWriter.standardize_author_name(author, isBand)
-                        self.standardized_author_names[author] = stdName
-
-                        title = self.src_tixi.getTextAttribute(path, "title")
-                        file = self.src_tixi.getTextAttribute(path, "xhtml")
-                        if stdName not in self.songs_by_author:
-                            self.songs_by_author[stdName] = dict()
-                        self.songs_by_author[self.standardized_author_names[author]][title] = file
+        self.songs_by_author = self.authors.songsByAuthor(self.catalog.songs, self.standardized_author_names)
 
     #
     def write_index(self):
@@ -94,18 +55,18 @@ class AuthorsWriter(HtmlWriter):
         self.tixi.addTextElement(bPath, "h2", self.settings.authors_index_title)
 
         I = ""  # Initial
-        for author in sorted(self.songs_by_author.keys()):
+        for author in self.collation.sorted(self.songs_by_author.keys()):
             hisOrHerSongs = self.songs_by_author[author]
             if not hisOrHerSongs:
                 continue
-            if author[0] > I:
-                I = author[0]
+            if self.collation.heading(author) != I:
+                I = self.collation.heading(author)
                 self.tixi.addTextElement(bPath, "h3", I)
 
             self.tixi.addTextElement(bPath, "h4", author)
             ulPath = self.tixi.createElement(bPath, "ul")
 
-            for song in sorted(hisOrHerSongs.keys()):
+            for song in self.collation.sorted(hisOrHerSongs.keys()):
                 liPath = self.tixi.createElement(ulPath, "li")
                 file = hisOrHerSongs[song]
 
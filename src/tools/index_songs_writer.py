@@ -12,15 +12,24 @@ __all__ = ['SongsIndexWriter']
 from datetime import date
 
 from src.config import EpubSongbookConfig
-from src.tixi import Tixi
+from src.xml_backend import Tixi
+from .collation import Collation
 from .html_writer import HtmlWriter
+from .song_catalog import SongCatalog
 
 
 class SongsIndexWriter(HtmlWriter):
     """Class responsible for writing the alphabetical index of songs"""
 
-    def __init__(self, tixi: Tixi, settings: EpubSongbookConfig):
+    def __init__(self, tixi: Tixi, settings: EpubSongbookConfig, catalog: SongCatalog = None):
+        """
+        :param tixi: the songbook tixi
+        :param settings: songbook settings
+        :param catalog: catalog of the songs in the tixi. If None, it is created from the tixi
+        """
         super(SongsIndexWriter, self).__init__(tixi, settings)
+        self.catalog = catalog if catalog is not None else SongCatalog(tixi)
+        self.collation = Collation.get(settings.lang)
 
         self.songs = list()
 
@@ -30,11 +39,9 @@ class SongsIndexWriter(HtmlWriter):
         """
         Build a list containing song titles and the songs' html file names.
         """
-        for path in self.src_tixi.xPathExpressionGetAllXPaths("//song[@title and @xhtml]"):
-            title = self.src_tixi.getTextAttribute(path, "title")
-            file = self.src_tixi.getTextAttribute(path, "xhtml")
-            self.songs.append((title, file))
-        self.songs.sort(key=lambda x: x[0])
+        for song in self.catalog.published():
+            self.songs.append((song.title, song.xhtml))
+        self.songs.sort(key=lambda x: (self.collation.key(x[0]), x[1]))
 
     def write_index(self):
         bPath = self.tixi.createElement("/html", "body")
@@ -43,8 +50,8 @@ class SongsIndexWriter(HtmlWriter):
 
         I = ""  # Initial
         for title, file in self.songs:
-            if title[0] > I:
-                I = title[0]
+            if self.collation.heading(title) != I:
+                I = self.collation.heading(title)
                 self.tixi.addTextElement(bPath, "h3", I)
 
             ulPath = self.tixi.createElement(bPath, "ul")
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18.10.2026 18:30
+
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-18'
+__all__ = ['LinkGraph']
+
+import logging
+from collections import deque
+
+from src.xml_backend import Tixi
+
+
+class LinkGraph(object):
+    """
+    Graph of the <link> elements between the songs of the songbook.
+
+    The songs and links are read from the tixi once. Then the links are made two-way: if a song A links to the title
+    B, every song titled B gets a link to A (and, in turn, every song titled A gets a link to B). Links to titles
+    that no song has (dead links) are removed. All changes are computed in memory and applied to the tixi at once.
+    """
+
+    def __init__(self, tixi: Tixi):
+        """
+        :param tixi: the songbook tixi
+        """
+        self.tixi = tixi
+        self.titles = dict()  # song path -> title, in the document order
+        self.byTitle = dict()  # title -> list of paths of songs having that title
+        self.links = dict()  # song path -> list of tuples (link path, linked title)
+
+        self.toCreate = list()  # tuples (song path, linked title) of the links missing in the tixi
+        self.toRemove = list()  # paths of the dead links, in the document order
+
+        for path in tixi.xPathExpressionGetAllXPaths("//song[@title]"):
+            title = tixi.getTextAttribute(path, "title")
+            self.titles[path] = title
+            self.links[path] = list()
+            self.byTitle.setdefault(title, list()).append(path)
+
+        for path in tixi.xPathExpressionGetAllXPaths("//song/link[@title]"):
+            songPath = Tixi.parent(path)
+            if songPath in self.links:
+                self.links[songPath].append((path, tixi.getTextAttribute(path, "title")))
+
+        self._compute()
+
+    #
+    def _compute(self):
+        """Find the missing and the dead links"""
+        linked = {path: set(title for _, title in links) for path, links in self.links.items()}
+
+        # Each link (song path, linked title) taken from the queue makes all songs with the linked title link back.
+        # Every link enters the queue once, so the number of steps is proportional to the number of links
+        queue = deque()
+        for path, links in self.links.items():
+            for linkPath, title in links:
+                if title in self.byTitle:
+                    queue.append((path, title))
+                else:
+                    self.toRemove.append(linkPath)
+
+        while queue:
+            path, title = queue.popleft()
+            ownTitle = self.titles[path]
+            for target in self.byTitle[title]:
+                if ownTitle not in linked[target]:
+                    linked[target].add(ownTitle)
+                    self.toCreate.append((target, ownTitle))
+                    queue.append((target, ownTitle))
+
+    #
+    def apply(self):
+        """Write the changes to the tixi: remove the dead links and create the missing ones"""
+        # The dead links are removed from the last one, so that the paths of the remaining ones stay valid. Only then
+        # new links are appended - otherwise a path of a single link (without index) could become ambiguous
+        for path in reversed(self.toRemove):
+            logging.warning("Removing link to a non-existing song: {}/@title = {}".format(
+                path, self.tixi.getTextAttribute(path, "title")))
+            self.tixi.removeElement(path)
+        for songPath, title in self.toCreate:
+            path = self.tixi.createElement(songPath, "link")
+            self.tixi.addTextAttribute(path, "title", title)
+
+    #
+    def components(self) -> int:
+        """Return the number of groups of titles connected with links. Songs without links are not counted"""
+        parent = dict()
+
+        def root(title):
+            while parent[title] != title:
+                parent[title] = parent[parent[title]]
+                title = parent[title]
+            return title
+
+        for path, links in self.links.items():
+            for _, title in links:
+                if title not in self.byTitle:
+                    continue
+                for t in [self.titles[path], title]:
+                    parent.setdefault(t, t)
+                parent[root(title)] = root(self.titles[path])
+
+        return len(set(root(t) for t in parent))
+
+    #
+    def stats(self) -> dict:
+        """Return the statistics of the graph"""
+        return {"songs": len(self.titles),
+                "links": sum(len(links) for links in self.links.values()),
+                "created": len(self.toCreate),
+                "dangling": len(self.toRemove),
+                "components": self.components()}
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18.10.2026 23:30
+
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-18'
+__all__ = ['ResourceCopier']
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from src.config import OutputSink
+
+
+class ResourceCopier(object):
+    """
+    Collect the files (html documents and their resources) to be copied to the songbook and copy them all at once.
+    A file referenced from several documents is copied only once. If the sink allows it, the files are copied on
+    a thread pool. Files that are already identical in the output are skipped by the sink (see DirectorySink)
+    """
+
+    def __init__(self, sink: OutputSink, jobs: int = None):
+        """
+        :param sink: output sink, to which the files are copied
+        :param jobs: number of copying threads. By default, depends on the number of CPUs
+        """
+        self.sink = sink
+        self.jobs = jobs if jobs is not None else min(8, (os.cpu_count() or 1) + 4)
+        self.pending = dict()  # name of the file in the sink -> source file
+        self.copied = dict()  # the same, for the files already copied
+
+    #
+    def add(self, name: str, source: str) -> bool:
+        """
+        Schedule copying of the source file to the sink.
+        :param name: name of the file in the sink
+        :param source: path to the source file
+        :return: True if the file is scheduled. False if it has already been scheduled before (from another document),
+                 or if another source file has been scheduled under the same name. The first one is kept then
+        """
+        source = os.path.abspath(source)
+        known = self.pending.get(name) or self.copied.get(name)
+        if known is not None:
+            if known != source:
+                logging.warning("{} and {} are both copied to {}. Keeping the first one".format(known, source, name))
+            return False
+        self.pending[name] = source
+        return True
+
+    #
+    def flush(self) -> bool:
+        """
+        Copy all scheduled files.
+        :return: True if all files have been copied successfully
+        """
+        tasks = list(self.pending.items())
+        self.pending = dict()
+        if not tasks:
+            return True
+
+        if self.sink.threadSafe and self.jobs > 1 and len(tasks) > 1:
+            with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+                errors = list(pool.map(self._copy, tasks))
+        else:
+            errors = [self._copy(task) for task in tasks]
+
+        success = True
+        for (name, source), error in zip(tasks, errors):
+            if error is None:
+                self.copied[name] = source
+                continue
+            logging.error("Could not copy {} to {}{}".format(source, name, error))
+            success = False
+        logging.debug("Copied {} resource files".format(len(tasks)))
+        return success
+
+    #
+    def _copy(self, task) -> str:
+        """Copy a single file. Return None on success, otherwise the description of the error"""
+        name, source = task
+        try:
+            self.sink.copyFile(name, source)
+        except PermissionError:
+            return " - Permission denied"
+        except OSError as e:
+            return " - {}".format(e.strerror or e)
+        return None
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19.10.2026 08:20
+
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-19'
+__all__ = ['ResourceCrawler', 'Resource']
+
+import logging
+import mimetypes
+import os
+from collections import OrderedDict, deque
+
+from src.xml_backend import Tixi, TixiException
+from .general import tixi_noXMLNS
+
+# Element of a reference -> (attribute with the referenced file, type of the resource)
+_referenceTypes = {"link": ("href", "stylesheet"),
+                   "img": ("src", "image"),
+                   "a": ("href", "page")}
+
+_mediaTypes = {".xhtml": "application/xhtml+xml",
+               ".html": "application/xhtml+xml",
+               ".htm": "application/xhtml+xml",
+               ".css": "text/css"}
+
+
+class Resource(object):
+    """A file referenced from the html documents, to be copied to the songbook"""
+    __slots__ = ("name", "file", "type", "referrers")
+
+    def __init__(self, name: str, file: str, type: str):
+        self.name = name  # path in the output, relative to the text directory, with "/" as separator
+        self.file = file  # absolute path to the source file
+        self.type = type  # "stylesheet", "image" or "page"
+        self.referrers = list()  # absolute paths to the html documents referencing the file
+
+    #
+    @property
+    def mediaType(self) -> str:
+        """Media type of the file, as required in the OPF manifest"""
+        ext = os.path.splitext(self.file)[1].lower()
+        if ext in _mediaTypes:
+            return _mediaTypes[ext]
+        return mimetypes.guess_type(self.file)[0] or "application/octet-stream"
+
+
+class ResourceCrawler(object):
+    """
+    Find the resources (stylesheets, images and linked pages) of the html documents included in the songbook.
+    The linked pages are followed breadth-first, each of them is parsed and searched only once. The result is
+    the manifest of the resources, used to copy them and to list them in the OPF.
+
+    REMARK: Only relative paths are supported, as the HTML files are copied to the output directory, and so will
+    be their resource files. The resources keep their location relative to the crawled document they were found from.
+    The pages linked from several crawled documents in different directories are searched once for each directory,
+    so that the resources are found under the names each of the documents refers to them with
+    """
+
+    def __init__(self):
+        self.resources = OrderedDict()  # name -> Resource, in the order of discovery
+        self.pages = dict()  # absolute path of a html document -> parsed Tixi, None if it is not a valid html
+        # (absolute path to the directory of the crawled document, absolute path of a html document) already searched
+        # for references
+        self.visited = set()
+
+    #
+    def crawl(self, html_path: str, tixi: Tixi = None, all_required: bool = True) -> bool:
+        """
+        Find the resources of the html document and of all pages linked from it.
+        :param html_path: path to the html document
+        :param tixi: the document, if already parsed with tixi_noXMLNS
+        :param all_required: if True, any missing resource file or invalid linked page is an error. Otherwise
+                             a warning is logged
+        :return: True if all required resources are available and all linked pages are valid html documents
+        """
+        root = os.path.abspath(html_path)
+        if tixi is not None:
+            self.pages[root] = tixi
+        rootDir = os.path.dirname(root)
+        success = True
+
+        queue = deque([root])
+        while queue:
+            page = queue.popleft()
+            if (rootDir, page) in self.visited:
+                continue
+            self.visited.add((rootDir, page))
+            tixi = self._parse(page)
+            if tixi is None:
+                continue
+            xPath = "//*[(self::link and @rel='stylesheet' and @href) or (self::img and @src) or (self::a and @href)]"
+            for path in tixi.xPathExpressionGetAllXPaths(xPath):
+                attribute, type = _referenceTypes[Tixi.elementName(path)]
+                src = tixi.getTextAttribute(path, attribute).split("#")[0]
+                if not src or ":" in src.split("/")[0]:
+                    # A link within the page, or an external one (http:, mailto: etc.)
+                    continue
+                file = os.path.normpath(os.path.join(os.path.dirname(page), src))
+                if type == "page":
+                    if file == page:
+                        # Avoid infinite loops if the file has a link to itself
+                        continue
+                    if os.path.isfile(file) and self._parse(file) is None:
+                        success &= ResourceCrawler._report(
+                            f'- {page} {attribute}="{file}" - source is not a valid HTML file!', all_required)
+                        continue
+                    if (rootDir, file) not in self.visited:
+                        queue.append(file)
+
+                if not os.path.isfile(file):
+                    success &= ResourceCrawler._report("Resource file {} not found".format(src), all_required)
+                    continue
+
+                name = os.path.relpath(file, rootDir).replace("\\", "/")
+                resource = self.resources.get(name)
+                if resource is None:
+                    resource = Resource(name, file, type)
+                    self.resources[name] = resource
+                elif resource.file != file:
+                    # Both files would be copied to the same place
+                    logging.error("Resources {} and {} have the same name {}".format(resource.file, file, name))
+                    success = False
+                    continue
+                if page not in resource.referrers:
+                    resource.referrers.append(page)
+        return success
+
+    #
+    def manifest(self) -> list:
+        """Return the resources as a list of dictionaries (name, file, type, media type, referrers)"""
+        return [{"name": r.name, "file": r.file, "type": r.type, "media-type": r.mediaType,
+                 "referrers": list(r.referrers)} for r in self.resources.values()]
+
+    #
+    @staticmethod
+    def _report(message: str, required: bool) -> bool:
+        """Log the problem as an error, if it concerns a required resource, or as a warning otherwise
+        :return: False if the problem is an error"""
+        if required:
+            logging.error(message)
+            return False
+        logging.warning(message)
+        return True
+
+    #
+    def _parse(self, file: str) -> Tixi:
+        """Return the parsed html document, or None if it is not valid. Each document is parsed only once"""
+        if file not in self.pages:
+            try:
+                self.pages[file] = tixi_noXMLNS(file)
+            except TixiException:
+                self.pages[file] = None
+        return self.pages[file]
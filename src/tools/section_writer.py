@@ -12,7 +12,7 @@ __all__ = ['SectionWriter']
 import os
 
 from src.config.epubsongbookconfig import EpubSongbookConfig
-from src.tixi import Tixi
+from src.xml_backend import Tixi
 from .html_writer import HtmlWriter
 import logging
 
@@ -37,8 +37,7 @@ class SectionWriter(HtmlWriter):
     #
     def write_toc(self):
         # <body/>
-        self.tixi.createElement(self.root, "body")
-        bpath = self.root + "/body"
+        bpath = self.tixi.createElement(self.root, "body")
         if self.src_tixi.getTextAttribute(self.src_path, "title"):
             title = self.src_tixi.getTextAttribute(self.src_path, "title")
         else:
@@ -46,29 +45,22 @@ class SectionWriter(HtmlWriter):
 
         self.tixi.addTextElement(bpath, "h2", title)
 
-        self.tixi.createElement(bpath, "p")
-
-        ppath = bpath + "/p"
+        ppath = self.tixi.createElement(bpath, "p")
         self._createUl(ppath, self.src_path)
 
     #
     def _createUl(self, targetPath, sourcePath):
         """Recursively create the <li> and nested <ul> elements for each
            item in section"""
-        self.tixi.createElement(targetPath, "ul")
-        nul = self.tixi.getNamedChildrenCount(targetPath, "ul")
-        ulPath = "{}/ul[{}]".format(targetPath, nul)
+        ulPath = self.tixi.createElement(targetPath, "ul")
         xPath = sourcePath + "/*[self::section or self::song or self::html]"
 
         for path in self.src_tixi.xPathExpressionGetAllXPaths(xPath):
             title = self.src_tixi.getTextAttribute(path, "title")
             xhtml = self.src_tixi.getTextAttribute(path, "xhtml")
 
-            self.tixi.createElement(ulPath, "li")
-            nli = self.tixi.getNamedChildrenCount(ulPath, "li")
-            liPath = "{}/li[{}]".format(ulPath, nli)
-            self.tixi.addTextElement(liPath, "a", title)
-            aPath = "{}/a".format(liPath)
+            liPath = self.tixi.createElement(ulPath, "li")
+            aPath = self.tixi.addTextElement(liPath, "a", title)
 
             self.tixi.addTextAttribute(aPath, "href", xhtml)
             if Tixi.elementName(path) == "section":
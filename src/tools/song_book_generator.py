@@ -9,102 +9,260 @@ __authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
 __date__ = '2020-11-20'
 __all__ = ['SongBookGenerator']
 
+import json
 import os
-import re
-import shutil
 import logging
+from datetime import date
 
-from src.config import EpubSongbookConfig
-from src.tixi import Tixi, TixiException, ReturnCode
+from src.config import EpubSongbookConfig, DirectorySink, MemorySink, ZipSink, TeeSink, AsyncSink
+from src.xml_backend import Tixi, TixiException, ReturnCode
+from .build_manifest import BuildManifest
+from .build_profiler import BuildProfiler
+from .document_cache import DocumentCache
 from .index_authors_writer import AuthorsWriter
 from .index_songs_writer import SongsIndexWriter
+from .link_graph import LinkGraph
+from .resource_copier import ResourceCopier
+from .resource_crawler import ResourceCrawler
 from .section_writer import SectionWriter
+from .song_catalog import SongCatalog
 from .song_writer import SongWriter
+from .song_render_pool import SongRenderPool, songPayload
+from .html_writer import HtmlWriter
 from .utf_utils import UtfUtils
-from .general import escapeQuoteMarks, getDefaultSongAttributes, tixi_noXMLNS
+from .validation_cache import ValidationCache
+from .general import exportWithEncoding, getDefaultSongAttributes, tixi_noXMLNS
 
 
 class SongBookGenerator(object):
-    def __init__(self, input_file, xsd_file=None, preprocess=True):
+    def __init__(self, input_file, xsd_file=None, preprocess=True, incremental=False, epub=None, epub_level=6,
+                 sink=None, serializer=None, profiler=None, preview=None, sample=None, previewResources=False,
+                 previewIndexes=False, documents=None, link=None, writers=None, edition=None, master=None,
+                 dryRun=False, preprocessed=False):
         """
         Master class aggregating all other tools
         :param input_file: input xml file.
         :param xsd_file: XSD schema file to validate the input_file and take default values.
         :param preprocess: run the preprocessing. True by default. Set to False in tests
+        :param incremental: keep the output directory and only rewrite the files, whose inputs have changed since
+                            the previous build
+        :param epub: name of the EPUB file. If given, all generated files are also packed to this EPUB container
+        :param epub_level: deflate compression level (0-9) of the EPUB container
+        :param sink: OutputSink to which the songbook files are written. By default, they are written to the output
+                     directory
+        :param serializer: how the pages are built: "tixi" (a Tixi document, exported and formatted) or "stream"
+                           (written directly in the final formatting). The output is the same
+        :param profiler: BuildProfiler recording the duration and memory of the preprocessing steps and of the songs
+        :param preview: build a draft songbook with at most this number of songs (overrides max_songs). 0 means all
+        :param sample: build a draft songbook with at most this number of songs from each section
+        :param previewResources: copy the resources of the html documents in the preview build
+        :param previewIndexes: write the indexes in the preview build
+        :param documents: DocumentCache of the song source files, e.g. kept from the previous build in the watch mode
+        :param link: "hardlink" or "reflink" to link the html documents and their resources to the output directory,
+                     instead of copying them
+        :param writers: number of background threads writing the generated files (see AsyncSink). None writes
+                        the files directly. The write errors are raised by finish()
+        :param edition: name of the edition to build. Its settings override the ones from the <settings> element
+        :param master: the master XML already opened and validated, e.g. shared by the editions (see EditionBuilder).
+                       It is modified by the generator. If given, input_file is not opened and xsd_file is not used
+        :param dryRun: do not touch the output directory. The files are only kept in memory (see SongbookChecker)
+        :param preprocessed: the master has already been preprocessed with preprocessSources, e.g. once for all editions
+                             (see EditionBuilder). Only the preprocessing that depends on the settings is run
         """
-        self.tixi = Tixi()
-        self.tixi.open(input_file, recursive=True)
-
-        if xsd_file is not None:
-            self.tixi.schemaValidateWithDefaultsFromFile(xsd_file)
+        self.profiler = profiler if profiler is not None else BuildProfiler(enabled=False)
+        if master is not None:
+            self.tixi = master
+        else:
+            self.tixi = ValidationCache.open(input_file, xsd_file, recursive=True)
 
         self.tixi.registerNamespacesFromDocument()
-        self.settings = EpubSongbookConfig(self.tixi)
-        self.settings.defineOutputDir()
+        self.settings = EpubSongbookConfig(self.tixi, edition)
+        if serializer is not None:
+            self.settings.serializer = serializer
+        self.settings.defineOutputDir(incremental or dryRun)
+        if dryRun:
+            sink = MemorySink()
+        elif sink is None:
+            sink = DirectorySink(self.settings.dir_out, link)
+        if epub is not None:
+            sink = TeeSink(sink, ZipSink(epub, epub_level))
+        if writers:
+            sink = AsyncSink(sink, writers)
+        self.settings.sink = sink
         self.settings.placeEssentialFiles()
-        self.settings.setupAttributes()
-        self.N = self.settings.maxsongs  # definitely a shorter notation
+        if preview is not None or sample is not None:
+            self.settings.sample = sample or 0
+            self.settings.copyResources = previewResources
+            self.settings.writeIndexes = previewIndexes
+        self.N = self.settings.maxsongs if preview is None else preview  # definitely a shorter notation
 
         self.id = None
 
-        # HTML files that have been checked with regard to their resources and the resources have been copied for them
-        self.htmlsWithResourcesCopied = set()
+        # In the incremental mode, the record of the files generated in the previous build and in the current one
+        self.manifest = BuildManifest(self.settings.dir_out, self.settings.sink) if incremental else None
+
+        # Parsed song source files, shared by the preprocessing and the song writers
+        self.documents = documents if documents is not None else DocumentCache()
+
+        # Titles and authors of the songs, read once the preprocessing is complete
+        self.catalog = None
+
+        # Resources of the html documents: stylesheets, images and linked pages
+        self.crawler = ResourceCrawler()
+        # The html documents and their resources to be copied to the output
+        self.resources = ResourceCopier(self.settings.sink)
 
         # Hardwired names of index files.
         self.indexes = {"index_of_authors": "idx_authors.xhtml",
                         "index_of_songs": "idx_songs.xhtml"}
+        self.preprocessed = preprocessed
         if preprocess:
             self._preprocess()
 
     #
     def _preprocess(self):
-        self._removeIgnoredContent()
-        success = True
-        success &= self._findAmbiguousSongsContent()
-        success &= self._pullAttributesFromSRCs()
+        with self.profiler.phase("preprocess"):
+            # The settings are applied here and not in the constructor: the master shared by the editions must not
+            # get the attributes of any of them while it is preprocessed (see preprocessSources)
+            self.settings.setupAttributes()
+            if self.preprocessed:
+                with self.profiler.phase("removeIgnoredContent"):
+                    self._removeIgnoredContent()
+                success = True
+            else:
+                success = self.preprocessSources()
 
-        for path in self.tixi.xPathExpressionGetAllXPaths("//html"):
-            success &= self.setHTMLtitle(path)
+            with self.profiler.phase("setHTMLtitles"):
+                for path in self.tixi.xPathExpressionGetAllXPaths("//html"):
+                    success &= self.setHTMLtitle(path)
 
-        success &= self._assignXHTMLattributes()
+            with self.profiler.phase("copyResources"):
+                success &= self.resources.flush()
 
-        if not success:
-            raise RuntimeError
+            with self.profiler.phase("assignXHTMLattributes"):
+                success &= self._assignXHTMLattributes()
 
-        self._exposeLinks()
+            if not success:
+                raise RuntimeError
 
-        escapeQuoteMarks(self.tixi)
+            with self.profiler.phase("createTwoWayLinks"):
+                self.createTwoWayLinks()
 
-        self.createTwoWayLinks()
+            with self.profiler.phase("catalog"):
+                self.catalog = SongCatalog(self.tixi)
+
+    #
+    def preprocessSources(self, limits: bool = True) -> bool:
+        """
+        Run the part of the preprocessing that does not depend on the settings of an edition: remove the ignored
+        content, check the songs and pull their attributes and links from the song source files. The EditionBuilder
+        runs it only once, on the master shared by all editions.
+        The songs with include="false" in their source files are removed after their attributes have been pulled.
+        The limits are applied before, so that a preview does not read all song source files: such songs are counted
+        to the max number of songs and to the sample in a plain build, but not in an edition, which applies the limits
+        to the already preprocessed master
+        :param limits: also remove the songs exceeding the max number of songs or the sample, and the indexes not
+                       written in the preview. If False, only the elements with include="false" and the sections left
+                       empty are removed, so that the result can be shared by the editions
+        :return: True if everything is fine. The errors are logged
+        """
+        with self.profiler.phase("removeIgnoredContent"):
+            self._removeIgnoredContent(limits=limits)
+        success = True
+        with self.profiler.phase("findAmbiguousSongsContent"):
+            success &= self._findAmbiguousSongsContent()
+        with self.profiler.phase("pullAttributesFromSRCs"):
+            success &= self._pullAttributesFromSRCs(limits)
+        with self.profiler.phase("removeIgnoredContent"):
+            # Now also the songs excluded in their source files
+            self._removeIgnoredContent(limits=False)
+        if success:
+            with self.profiler.phase("exposeLinks"):
+                self._exposeLinks()
+        return success
 
-    def _removeIgnoredContent(self, tixi: Tixi = None):
+    #
+    def _removeIgnoredContent(self, tixi: Tixi = None, limits: bool = True):
         """Remove elements that should not be taken into account while processing the data:
-            -   those with attribute ignore="true"
-            -   those that exceed the max number of songs to be processed
+            -   those with attribute include="false"
+            -   those that exceed the max number of songs to be processed, or the number of songs sampled from each
+                section in the preview mode
+            -   the indexes, in the preview mode, unless requested
             -   sections that are empty after previous operations
+        All of them are found in a single walk through the document, and then removed in the reversed document order,
+        so that the paths of the elements not yet removed remain valid
+        :param tixi: document to process. The master by default
+        :param limits: if False, keep all songs and indexes: only the elements with include="false" and the sections
+                       left empty are removed
         """
         if tixi is None:
             tixi = self.tixi
 
-        # First remove the items that have attribute include="false"
-        xPathToRemove = "//*[@include='false']"
-        for path in reversed(tixi.xPathExpressionGetAllXPaths(xPathToRemove)):
-            # reversed order, in order to prevent modification of the paths of elements that are not yet deleted
-            tixi.removeElement(path)
-        xPath = "//song[@title]"
-        n = tixi.xPathEvaluateNodeNumber(xPath)
-        logging.info("Found {} songs".format(n))
-        if self.N > 0 and n < self.N or self.N == 0:
-            self.N = n
-        # Remove the abundant songs
-        while tixi.xPathEvaluateNodeNumber(xPath) > self.N:
-            path = tixi.xPathExpressionGetXPath(xPath, self.N + 1)
-            logging.info("Max song number set to {}. Ignoring {}".format(self.N, path))
-            tixi.removeElement(path)
-        # Now remove sections that do not have songs inside
-        xPath_emptySection = "//section[not(descendant::song or descendant::html)]"
-        for path in reversed(tixi.xPathExpressionGetAllXPaths(xPath_emptySection)):
-            logging.info(f"Ignoring empty section {path}")
+        xPath = "//*[self::section or self::song or self::html or self::index_of_authors or self::index_of_songs " \
+                "or @include='false']"
+        excluded = set(tixi.xPathExpressionGetAllXPaths("//*[@include='false']"))
+        titled = set(tixi.xPathExpressionGetAllXPaths("//song[@title]"))
+
+        toRemove = []  # in the document order
+        sections = []  # the sections enclosing the current element: [path, does it have any content left]
+        perSection = dict()  # number of songs kept in the section
+        skip = None  # subtree, whose removal has already been decided
+        ignoredSongs = []  # log messages
+        ignoredSections = []
+        found = 0
+        kept = 0
+
+        def closeSection():
+            path, hasContent = sections.pop()
+            if hasContent:
+                if sections:
+                    sections[-1][1] = True
+                return
+            ignoredSections.append(f"Ignoring empty section {path}")
+            # The removed descendants are at the end of the list. The section will remove them anyway
+            while toRemove and toRemove[-1].startswith(path + "/"):
+                toRemove.pop()
+            toRemove.append(path)
+
+        for path in tixi.xPathExpressionGetAllXPaths(xPath):
+            if skip is not None and path.startswith(skip + "/"):
+                continue
+            while sections and not path.startswith(sections[-1][0] + "/"):
+                closeSection()
+            name = Tixi.elementName(path)
+            if path in excluded or (limits and name in self.indexes and not self.settings.writeIndexes):
+                toRemove.append(path)
+                skip = path
+            elif name == "section":
+                sections.append([path, False])
+            elif name == "song" and path in titled:
+                found += 1
+                parent = Tixi.parent(path)
+                if limits and 0 < self.settings.sample <= perSection.get(parent, 0):
+                    ignoredSongs.append("Sampling {} songs per section. Ignoring {}".format(self.settings.sample, path))
+                elif limits and 0 < self.N <= kept:
+                    ignoredSongs.append("Max song number set to {}. Ignoring {}".format(self.N, path))
+                else:
+                    perSection[parent] = perSection.get(parent, 0) + 1
+                    kept += 1
+                    if sections:
+                        sections[-1][1] = True
+                    continue
+                toRemove.append(path)
+                skip = path
+            elif name in ["song", "html"]:
+                if sections:
+                    sections[-1][1] = True
+        while sections:
+            closeSection()
+
+        if limits:
+            logging.info("Found {} songs".format(found))
+            self.N = kept
+        for message in ignoredSongs + ignoredSections:
+            logging.info(message)
+
+        for path in reversed(toRemove):
             tixi.removeElement(path)
 
     def _findAmbiguousSongsContent(self):
@@ -122,16 +280,18 @@ class SongBookGenerator(object):
             wrongPaths[parent] = title
         return not wrongPaths
 
-    def _pullAttributesFromSRCs(self):
+    def _pullAttributesFromSRCs(self, limits: bool = True):
         """
         Get all attributes from the separate song file to which path is provided in the src attributes of song elements
         and copy them to the elements. This allows for collecting all attributes in one element, and also for accessing
         the inherited attributes (like chord_mode) that can be defined higher in the XML tree.
 
         Moreover, check if songs in src files don't have different attributes than song elements in toplevel tixi
-        and copy these attributes, because that is considered an unambiguity"""
+        and copy these attributes, because that is considered an unambiguity
+        :param limits: whether the limits of the number of songs have been applied to the master
+                       (see _removeIgnoredContent)
+        """
         xPath = "//song[@src]"
-        spath = "/song"
         missingFiles = dict()
         defaultAttributes = getDefaultSongAttributes(self.settings.xsd_song)
 
@@ -139,7 +299,7 @@ class SongBookGenerator(object):
         # values is needed...
         unv_tixi.open(self.tixi.getDocumentPath())
         # Raw, but without ignored content, to avoid non-unique paths while resolving xPath Expressions
-        self._removeIgnoredContent(unv_tixi)
+        self._removeIgnoredContent(unv_tixi, limits)
         success = True
 
         for path in self.tixi.xPathExpressionGetAllXPaths(xPath):
@@ -152,14 +312,13 @@ class SongBookGenerator(object):
                 logging.error(f"Source file {src} not found ({path})")
                 success = False
                 continue
-            tmp_tixi = Tixi()
             try:
-                tmp_tixi.open(file)
+                document = self.documents.get(file)
             except TixiException:
                 missingFiles[path] = src
                 continue
 
-            for attrName, attrValue in tmp_tixi.getAttributes(spath).items():
+            for attrName, attrValue in document.attributes.items():
                 if not self.tixi.checkAttribute(path, attrName):
                     self.tixi.addTextAttribute(path, attrName, attrValue)
                 else:
@@ -186,7 +345,7 @@ class SongBookGenerator(object):
         simplifying the UTF characters to ASCII. If file name is already used, the the new will have an increased
         number appended
         """
-        usedFileNames = []
+        usedFileNames = set()
         success = True
 
         usedXhtmlNames = {}  # If more than one song or section has the same xhtml attribute, collect them and throw an
@@ -207,10 +366,14 @@ class SongBookGenerator(object):
             self.tixi.addTextAttribute(xmlPath, "xhtml", os.path.join(dir, base).replace("\\", "/"))
 
         xPath = "//*[self::song or self::section or self::html or self::next]"
+        xmlPaths = self.tixi.xPathExpressionGetAllXPaths(xPath)
 
-        for xmlPath in self.tixi.xPathExpressionGetAllXPaths(xPath):
-            if self.tixi.elementName(xmlPath) != "next":
-                title = self.tixi.getTextAttribute(xmlPath, "title")
+        # The titles of all songs and sections are transliterated to the file names at once
+        titled = [xmlPath for xmlPath in xmlPaths if Tixi.elementName(xmlPath) in ["song", "section"]]
+        titles = [self.tixi.getTextAttribute(xmlPath, "title") for xmlPath in titled]
+        fileNameBases = dict(zip(titled, [t.replace(" ", "_").lower() for t in UtfUtils.toAsciiAll(titles)]))
+
+        for xmlPath in xmlPaths:
             if self.tixi.checkAttribute(xmlPath, "xhtml"):
                 xhtml = self.tixi.getTextAttribute(xmlPath, "xhtml")
                 if xhtml not in usedXhtmlNames.keys():
@@ -233,7 +396,7 @@ class SongBookGenerator(object):
             elif self.tixi.elementName(xmlPath) == "next":
                 file_name_base = self.tixi.getTextAttribute(xmlPath, "src")
             else:
-                file_name_base = UtfUtils.toAscii(title).replace(" ", "_").lower()
+                file_name_base = fileNameBases[xmlPath]
             suffix = ""
 
             fileNameTaken = True
@@ -245,7 +408,7 @@ class SongBookGenerator(object):
                     number = 0
                 number += 1
                 suffix = "_" + str(number)
-            usedFileNames.append(fileName)
+            usedFileNames.add(fileName)
 
             self.tixi.addTextAttribute(xmlPath, "xhtml", fileName)
         if not success:
@@ -259,7 +422,7 @@ class SongBookGenerator(object):
     def _exposeLinks(self):
         """
         For all songs defined in separate files, copy their <link> children to the master XML so that it is
-        visible to all song writers
+        visible to all song writers. The links back to these songs are created by createTwoWayLinks
         """
         # First, check if the songs written in separate files have links
         xPathSrc = "//song[@src]"
@@ -267,49 +430,86 @@ class SongBookGenerator(object):
         for song_path in self.tixi.xPathExpressionGetAllXPaths(xPathSrc):
             source_file = self.tixi.getTextAttribute(song_path, "src")
 
-            song_tixi = Tixi()
-            song_tixi.open(os.path.join(os.path.dirname(self.tixi.getDocumentPath()), source_file))
-            song_title = song_tixi.getTextAttribute("/song", "title")
-            for link_path in song_tixi.xPathExpressionGetAllXPaths("/song/link"):
-                try:
-                    link_title = song_tixi.getTextAttribute(link_path, "title")
-                except TixiException as e:
-                    e.error += " at path {}".format(song_path)
+            document = self.documents.get(os.path.join(os.path.dirname(self.tixi.getDocumentPath()), source_file))
+            linked = set(self.tixi.getTextAttribute(path, "title")
+                         for path in self.tixi.xPathExpressionGetAllXPaths(song_path + "/link[@title]"))
+            for link_title in document.links:
+                if link_title is None:
+                    e = TixiException(ReturnCode.ATTRIBUTE_NOT_FOUND)
+                    e.error = "<link> without title in {} at path {}".format(document.fileName, song_path)
                     raise e
-                if not self.tixi.checkElement('{}/link[@title="{}"]'.format(song_path, link_title)):
+                if link_title not in linked:
+                    linked.add(link_title)
                     new_link = self.tixi.createElement(song_path, "link")
                     self.tixi.addTextAttribute(new_link, "title", link_title)
 
-                # Make sure, that the paired song also has a link to myself
-                for paired_link in self.tixi.xPathExpressionGetAllXPaths(
-                        '//song[@title="{}"]'.format(link_title)):
-                    if not self.tixi.checkElement('{}/link[@title="{}"]'.format(paired_link, song_title)):
-                        new_olink = self.tixi.createElement(paired_link, "link")
-                        self.tixi.addTextAttribute(new_olink, "title", song_title)
-
     #
     def write_indexes(self):
-        writer = AuthorsWriter(self.tixi, self.settings)
-        writer.write_index()
-        writer.saveFile(os.path.join(self.settings.dir_text, "idx_authors.xhtml"))
-
-        writer = SongsIndexWriter(self.tixi, self.settings)
-        writer.write_index()
-        writer.saveFile(os.path.join(self.settings.dir_text, "idx_songs.xhtml"))
+        if not self.settings.writeIndexes:
+            logging.info("Preview build - skipping the indexes")
+            return
+        outline = self._outline() if self.manifest is not None else None
+        catalog = self._catalog()
+
+        if self._outdated(self._outputName("idx_authors.xhtml"), outline):
+            writer = AuthorsWriter(self.tixi, self.settings, catalog)
+            writer.write_index()
+            writer.saveFile(os.path.join(self.settings.dir_text, "idx_authors.xhtml"))
+
+        # The index of songs contains the date of generation
+        if self._outdated(self._outputName("idx_songs.xhtml"), outline, date.today()):
+            writer = SongsIndexWriter(self.tixi, self.settings, catalog)
+            writer.write_index()
+            writer.saveFile(os.path.join(self.settings.dir_text, "idx_songs.xhtml"))
+        self.settings.sink.flush()
 
     #
-    def write_songs(self):
+    def write_songs(self, jobs=1, paths=None):
         """
         Read the source file and for each song defined, write a properly formatted
         song xml file in the required location
+        :param jobs: number of processes rendering the songs. 1 renders the songs in this process, 0 uses all
+                     available CPUs. The output files are identical in any case
+        :param paths: paths to the song elements to be written. All songs by default
         """
 
         xPath = "//song"
-        for xml in self.tixi.xPathExpressionGetAllXPaths(xPath):
+        songs = []
+        catalog = self._catalog()
+        xsdSongHash = BuildManifest.fileHash(self.settings.xsd_song) if self.manifest is not None else None
+        for xml in self.tixi.xPathExpressionGetAllXPaths(xPath) if paths is None else paths:
             file = self.tixi.getTextAttribute(xml, "xhtml")
+            payload = songPayload(self.tixi, xml, catalog) if jobs != 1 or self.manifest is not None else None
+            if self.manifest is not None:
+                # The payload contains the song element, its content and everything the song page takes from the
+                # linked songs. The content of the separate song file and the song schema defaults are added
+                if not self._outdated(self._outputName(file), payload, self._songSourceHash(xml), xsdSongHash):
+                    continue
+            songs.append((file, xml, payload))
+
+        if jobs != 1 and len(songs) > 1:
+            pool = SongRenderPool(self.settings, jobs)
+            for file, text in pool.render([(file, payload) for file, xml, payload in songs]):
+                HtmlWriter.writeHtml(self.settings, os.path.join(self.settings.dir_text, file), text)
+            for file, (wall, cpu) in pool.timings.items():
+                self.profiler.addSong(file, wall, cpu)
+        else:
+            for file, xml, payload in songs:
+                with self.profiler.song(file):
+                    writer = SongWriter(self.tixi, self.settings, xml, self.documents, catalog)
+                    writer.write_song_file(file)
+        self.settings.sink.flush()
 
-            writer = SongWriter(self.tixi, self.settings, xml)
-            writer.write_song_file(file)
+    #
+    def _songSourceHash(self, xmlPath: str) -> str:
+        """Return the hash of the separate song file referenced in the src attribute of the song at xmlPath, or an
+        empty string if the song is defined in the master XML"""
+        if not self.tixi.checkAttribute(xmlPath, "src"):
+            return ""
+        src = self.tixi.getTextAttribute(xmlPath, "src")
+        if not os.path.isabs(src):
+            src = os.path.join(os.path.dirname(self.tixi.getDocumentPath()), src)
+        return BuildManifest.fileHash(src)
 
     def setHTMLtitle(self, xmlPath: str) -> str:
         """Get the title of a html document that should also be included in the songbook and place it in the attribute
@@ -357,34 +557,19 @@ class SongBookGenerator(object):
             return False
         # copy the html file
         target = os.path.join(self.settings.dir_text, "htm_" + os.path.basename(htmlFile))
-        logging.info(f"Copying {htmlFile} to {target}...")
-        try:
-            if os.path.isfile(target):
-                try:
-                    os.remove(target)
-                except:
-                    logging.error("File exists. Failed to overwrite")
-            shutil.copy(htmlFile, target)
-            logging.info("OK.")
-            success = True
-        except PermissionError:
-            logging.error("FAILED - Permission denied!")
-            success = False
-        except:
-            logging.error("FAILED")
-            success = False
+        if self.resources.add(self.settings.outputName(target), htmlFile):
+            logging.info(f"Copying {htmlFile} to {target}...")
 
+        if not self.settings.copyResources:
+            return True
         allRequired = self.tixi.getInheritedTextAttribute(xmlPath, "allRequired") != 'false'
-        return success and self._copyHTML_resources(htixi, htmlFile, allRequired)
+        return self._copyHTML_resources(htixi, htmlFile, allRequired)
 
-    def _copyHTML_resources(self, tixi: Tixi, html_path=None, all_required=True) -> str:
+    def _copyHTML_resources(self, tixi: Tixi, html_path=None, all_required=True) -> bool:
         """
         Check if the subdocument HTML file uses some resources and verify their availability. If the resource file is
-        available, copy it to the output directory keeping the relative path
-
-
-        REMARK: Only relative paths are supported, as the HTML files are copied to the output directory, and so will
-        be their resource files
+        available, copy it to the output directory keeping the relative path. The linked pages are checked, too
+        (see ResourceCrawler)
 
         REMARK: Only images, html links and stylesheets are checked as of now
         :param tixi: an opened Tixi object containing the html subdocument definition
@@ -392,61 +577,16 @@ class SongBookGenerator(object):
                           will fail, if the Tixi was created from a string
         :param all_required: if True, the any missing resource file will cause an error. Otherwise a a warning will be
                             thrown
-        :return:  Empty string if everything is fine. Otherwise string containing the error information
+        :return: True if everything is fine
         """
-        success = True
         if html_path is None:
             html_path = tixi.getDocumentPath()
-        html_path = os.path.abspath(html_path)
-        if html_path in self.htmlsWithResourcesCopied:
-            return True
-        css = tixi.xPathExpressionGetAllXPaths("//link[@rel='stylesheet' and @href]")
-        images = tixi.xPathExpressionGetAllXPaths("//img[@src]")
-        links = tixi.xPathExpressionGetAllXPaths("//a[@href]")
-        for path in css + images + links:
-            if path in css + links:
-                src_attr = "href"
-            elif path in images:
-                src_attr = "src"
-            src = tixi.getTextAttribute(path, src_attr)
-            if path in links:
-                subhtml = os.path.abspath(os.path.join(os.path.dirname(html_path), src))
-                if subhtml == html_path:
-                    # Avoid infinite loops if the file has a link to itself
-                    continue
-                try:
-                    htixi = tixi_noXMLNS(subhtml)
-                except TixiException as e:
-                    logging.error(f'- {html_path} {src_attr}="{subhtml}" - source is not a valid HTML file!')
-                    return False
-                self.htmlsWithResourcesCopied.add(html_path)
-                self._copyHTML_resources(htixi, subhtml, all_required)
-
-            file = os.path.normpath(os.path.join(os.path.dirname(html_path), src))
-            filename = os.path.split(file)[1]
-            if not os.path.isfile(file):
-                if all_required:
-                    logging.error("Resource file {} not found".format(src))
-                    success = False
-                else:
-                    logging.warning("Resource file {} not found".format(src))
-                continue
+        success = self.crawler.crawl(html_path, tixi, all_required)
 
-            # Seems like the file exists. Copy it to the destination output directory, keeping the relative location
-            target_dir = os.path.normpath(os.path.join(self.settings.dir_text, os.path.dirname(src)))
-            os.makedirs(target_dir, exist_ok=True)
-            target_file = os.path.join(target_dir, filename)
-            try:
-                logging.info("Copying {} to {}".format(file, target_file))
-                shutil.copy(file, target_file)
-            except shutil.SameFileError:
-                pass
-            except PermissionError:
-                logging.error("Could not copy {} to {} - Permission denied".format(file, target_file))
-                success = False
-            except:
-                logging.error("Could not copy {} to {}".format(file, target_file))
-                success = False
+        for resource in self.crawler.resources.values():
+            target_file = os.path.normpath(os.path.join(self.settings.dir_text, resource.name))
+            if self.resources.add(self.settings.outputName(target_file), resource.file):
+                logging.info("Copying {} to {}".format(resource.file, target_file))
         return success
 
     #
@@ -459,9 +599,12 @@ class SongBookGenerator(object):
         xPath = "//section"
         for xml in self.tixi.xPathExpressionGetAllXPaths(xPath):
             file = self.tixi.getTextAttribute(xml, "xhtml")
+            if self.manifest is not None and not self._outdated(self._outputName(file), self._outline(xml)):
+                continue
 
             writer = SectionWriter(self.tixi, self.settings, xml)
             writer.write_section_file(file)
+        self.settings.sink.flush()
 
     #
     def createTwoWayLinks(self):
@@ -480,54 +623,25 @@ class SongBookGenerator(object):
             <song title="B">
                 <link title="A">
             </song>
-        """
 
-        xPathFrom = "//song/link[@title]"
-
-        linksToCreate = True
-        while linksToCreate:
-            n = self.tixi.xPathEvaluateNodeNumber(xPathFrom)
-            linksToCreate = list()
-            linksToRemove = list()
-            for i in range(1, n + 1):
-                path_link = self.tixi.xPathExpressionGetXPath(xPathFrom, i)
-                xpath_parent_song = path_link + "/ancestor::song"
-                path_song = self.tixi.xPathExpressionGetXPath(xpath_parent_song, 1)
-                title_parent = self.tixi.getTextAttribute(path_song, "title")
-                title_link = self.tixi.getTextAttribute(path_link, "title")
-
-                # Find all songs that have title mentioned in the link
-                xPath = "//song[@title=\"{}\"]".format(title_link)
-                m = self.tixi.xPathEvaluateNodeNumber(xPath)
-                if m == 0:
-                    # The indexing in the path_link may change after the new links are created.
-                    # It is safer to replace the element index
-                    # (e.g. [3]) with linked title (e.g. [@title='Dead link song']
-                    # Using regex, because there may be no index at the end
-                    path_link = re.sub('\[\d+\]$', '', path_link)
-                    linksToRemove.append("{}[@title='{}']".format(path_link, title_link))
-
-                for j in range(1, m + 1):
-                    target_path = self.tixi.xPathExpressionGetXPath(xPath, j)
-                    # Do not create link, if there already is one
-                    if self.tixi.xPathEvaluateNodeNumber(target_path + "/link[@title='{}']".format(title_parent)):
-                        continue
-                    nlinks = self.tixi.getNamedChildrenCount(target_path, "link")
-                    linksToCreate.append((target_path, nlinks + 1, title_parent))
-            for link in linksToCreate:
-                self.tixi.createElementAtIndex(link[0], "link", link[1])
-                newPath = "{}/link[{}]".format(link[0], link[1])
-                self.tixi.addTextAttribute(newPath, "title", link[2])
-            for link in reversed(linksToRemove):
-                self.tixi.removeElement(link)
+            If several songs have the same title, each of them gets the links. Links to songs that do not exist
+            are removed.
+        """
+        graph = LinkGraph(self.tixi)
+        graph.apply()
+        logging.info("Links: {links} found, {created} created, {dangling} dangling removed, "
+                     "{components} groups of linked songs".format(**graph.stats()))
 
     #
     def write_metadata(self):
         """Cleanup and rewrite the metadata.opf"""
+        resources = self.crawler.manifest()
+        if self.manifest is not None and not self._outdated("metadata.opf", self._outline(), self.settings.metadata,
+                                                            [(r["name"], r["media-type"]) for r in resources]):
+            return
         tixi = Tixi()
-        opf = os.path.join(self.settings.dir_out, "metadata.opf")
         opfuri = "http://www.idpf.org/2007/opf"
-        tixi.open(opf)
+        tixi.openString(self.settings.metadata)
         tixi.registerNamespacesFromDocument()
         tixi.registerNamespace(opfuri, "opf")
         tixi.registerNamespace("http://purl.org/dc/elements/1.1/", "dc")
@@ -546,6 +660,7 @@ class SongBookGenerator(object):
         spine = "/opf:package/opf:spine"
 
         tixi.addTextAttribute(spine, "toc", "ncx")
+        hrefs = set()
 
         itemAttributes = [{"href": "toc.ncx", "id": "ncx", "media-type": "application/x-dtbncx+xml"},
                           {"href": "songbook.css", "id": "css", "media-type": "text/css"}]
@@ -555,6 +670,7 @@ class SongBookGenerator(object):
             path = manifest + "/opf:item[{}]".format(i + 1)
             for key, value in d.items():
                 tixi.addTextAttribute(path, key, value)
+            hrefs.add(d["href"])
 
         xPath = "//*[self::song " \
                 "or self::section " \
@@ -576,6 +692,7 @@ class SongBookGenerator(object):
             tixi.addTextAttribute(path, "href", file)
             tixi.addTextAttribute(path, "id", id_attr)
             tixi.addTextAttribute(path, "media-type", "application/xhtml+xml")
+            hrefs.add(file)
 
             tixi.createElementNS(spine, "itemref", opfuri)
             n = tixi.getNamedChildrenCount(spine, "opf:itemref")
@@ -601,22 +718,32 @@ class SongBookGenerator(object):
         path = spine + "/opf:itemref[{}]".format(n)
         tixi.addTextAttribute(path, "idref", id_attr)
 
-        tixi.saveDocument(opf)
+        # The stylesheets, images and pages referenced from the html documents (see ResourceCrawler)
+        for i, resource in enumerate(resources):
+            file = os.path.normpath(os.path.join(os.path.basename(self.settings.dir_text), resource["name"]))
+            file = file.replace("\\", "/")
+            if file in hrefs:
+                continue
+            hrefs.add(file)
+            tixi.createElement(manifest, "item")
+            n = tixi.getNamedChildrenCount(manifest, "item")
+            path = manifest + f'/item[{n}]'
+            tixi.addTextAttribute(path, "href", file)
+            tixi.addTextAttribute(path, "id", f'res{i + 1}')
+            tixi.addTextAttribute(path, "media-type", resource["media-type"])
+
+        self.settings.sink.write("metadata.opf", exportWithEncoding(tixi).encode("utf8"))
+        self.settings.sink.flush()
 
     #
     def write_toc(self):
         """Cleanup and rewrite the toc.ncx"""
-        tixi = Tixi()
-        toc = os.path.join(self.settings.dir_out, "toc.ncx")
-        toc_exists = os.path.isfile(toc)
-        if toc_exists:
-            try:
-                tixi.open(toc)
-            except TixiException as e:
-                if e.code != ReturnCode.OPEN_FAILED:
-                    raise e
-                toc_exists = False
-        if not toc_exists:
+        if self.manifest is not None and not self._outdated("toc.ncx", self._outline()):
+            return
+        if self.settings.toc is not None:
+            tixi = Tixi()
+            tixi.openString(self.settings.toc)
+        else:
             tixi = self._createEmptyToC()
         tixi.registerNamespacesFromDocument()
         uri = "http://www.daisy.org/z3986/2005/ncx/"
@@ -634,7 +761,8 @@ class SongBookGenerator(object):
         self.id = 1
         self._createNavPoint("/songbook", navMap, tixi)
 
-        tixi.saveDocument(toc)
+        self.settings.sink.write("toc.ncx", exportWithEncoding(tixi).encode("utf8"))
+        self.settings.sink.flush()
 
     #
     def _createNavPoint(self, secsongPath: str, npPath: str, tixi_ncx: Tixi) -> None:
@@ -673,6 +801,67 @@ class SongBookGenerator(object):
         for path in self.tixi.xPathExpressionGetAllXPaths(xPath):
             self._createNavPoint(path, my_npPath, tixi_ncx)
 
+    #
+    def finish(self):
+        """Finalize the build. In the incremental mode, remove the files that are not a part of the songbook anymore
+        and save the manifest for the next build. Close the output sink, which raises the errors of the background
+        writers, if any"""
+        logging.debug("Song source files cache: {hits} hits, {misses} misses, {evictions} evictions".format(
+            **self.documents.stats()))
+        if self.manifest is not None:
+            self.manifest.prune()
+            self.manifest.save()
+            logging.info("Incremental build: {} files written, {} up to date".format(self.manifest.rebuilt,
+                                                                                     self.manifest.skipped))
+        self.settings.sink.close()
+
+    #
+    def _outdated(self, fileName: str, *inputs) -> bool:
+        """
+        In the incremental mode, register the output file in the manifest with the fingerprint of its inputs.
+        :param fileName: name of the output file, relative to the output directory
+        :param inputs: everything that the content of the file depends on, apart from the settings
+        :return: True if the file must be written. Always True if not in the incremental mode
+        """
+        if self.manifest is None:
+            return True
+        if self.manifest.update(fileName, BuildManifest.fingerprint(self.settings.fingerprint(), *inputs)):
+            return True
+        # The file from the previous build is reused
+        self.settings.sink.keep(fileName)
+        return False
+
+    #
+    def _catalog(self) -> SongCatalog:
+        """Return the catalog of the songs. Without the preprocessing, it is created from the current tixi"""
+        return self.catalog if self.catalog is not None else SongCatalog(self.tixi)
+
+    #
+    def _outputName(self, fileName: str) -> str:
+        """Return the name of the xhtml file as used by the output sink"""
+        return self.settings.outputName(os.path.join(self.settings.dir_text, fileName))
+
+    #
+    def _outline(self, path: str = "/songbook") -> str:
+        """
+        Return the text describing the structure of the songbook (or its part at path): the titles, authors and file
+        names of the songs, sections and other documents. These are the inputs of the sections, indexes, toc and
+        metadata files
+        """
+        xPath = "{}/descendant-or-self::*[self::song " \
+                "or self::section " \
+                "or self::html " \
+                "or self::next " \
+                "or self::index_of_authors " \
+                "or self::index_of_songs]".format(path)
+        lines = []
+        for xml in self.tixi.xPathExpressionGetAllXPaths(xPath):
+            attributes = self.tixi.getAttributes(xml)
+            used = {name: attributes[name] for name in ["title", "xhtml", "src", "lyrics", "music", "band"]
+                    if name in attributes}
+            lines.append(xml + " " + json.dumps(used, sort_keys=True))
+        return "\n".join(lines)
+
     #
     def _createEmptyToC(self):
         """Create the empty template for the toc.ncx"""
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18.10.2026 17:20
+
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-18'
+__all__ = ['SongCatalog', 'SongRecord']
+
+import unicodedata
+
+from src.xml_backend import Tixi
+
+
+class SongRecord(object):
+    """Attributes of a single <song> element of the songbook, as needed by the links and indexes"""
+    __slots__ = ["path", "title", "xhtml", "lyrics", "music", "band"]
+
+    def __init__(self, path: str, attributes: dict):
+        """
+        :param path: path to the song element in the songbook tixi
+        :param attributes: attributes of the song element
+        """
+        self.path = path
+        self.title = attributes.get("title")
+        self.xhtml = attributes.get("xhtml")
+        self.lyrics = attributes.get("lyrics")
+        self.music = attributes.get("music")
+        self.band = attributes.get("band")
+
+    #
+    def __repr__(self):
+        return "SongRecord({!r}, {!r})".format(self.title, self.xhtml)
+
+
+class SongCatalog(object):
+    """
+    Lookup of the songs of the (preprocessed) songbook by their titles. The songbook tree is read only once, while
+    creating the catalog, so the writers do not need to search the whole tree for every link or index entry.
+    The catalog must be created again if the songs in the tixi are changed.
+    """
+
+    def __init__(self, tixi: Tixi):
+        """
+        :param tixi: the songbook tixi
+        """
+        self.songs = list()  # SongRecord objects, in the document order
+        self.byTitle = dict()  # normalized title -> list of SongRecord objects with that title
+        for path in tixi.xPathExpressionGetAllXPaths("//song[@title]"):
+            record = SongRecord(path, tixi.getAttributes(path))
+            self.songs.append(record)
+            self.byTitle.setdefault(SongCatalog.normalize(record.title), list()).append(record)
+
+    #
+    @staticmethod
+    def normalize(title: str) -> str:
+        """Return the key used to look up the title: in the NFC unicode form, without the surrounding whitespace"""
+        return unicodedata.normalize("NFC", title).strip()
+
+    #
+    def find(self, title: str) -> list:
+        """Return the list of records of songs having the given title"""
+        return self.byTitle.get(SongCatalog.normalize(title), [])
+
+    #
+    def published(self) -> list:
+        """Return the records of the songs that have the xhtml file assigned, in the document order"""
+        return [record for record in self.songs if record.xhtml is not None]
+
+    #
+    def __len__(self):
+        return len(self.songs)
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18.10.2026 10:12
+
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-18'
+__all__ = ['SongRenderPool', 'songPayload']
+
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from src.config import EpubSongbookConfig
+from src.xml_backend import Tixi
+from .document_cache import DocumentCache
+from .song_catalog import SongCatalog
+from .song_writer import SongWriter
+from .validation_cache import ValidationCache
+
+# Settings and song source files cache shared by all songs rendered in a worker process. Set by the pool initializer
+_workerSettings = None
+_workerDocuments = None
+
+# Attributes of the linked songs that are read by the SongWriter.write_links
+_linkedSongAttributes = ["title", "xhtml", "lyrics", "music"]
+
+
+def songPayload(tixi: Tixi, path: str, catalog: SongCatalog = None) -> str:
+    """
+    Build a minimal, standalone songbook XML containing everything that a SongWriter needs to render the song at path:
+    the song element itself (with the inherited chord_mode resolved and the src made absolute) and the songs
+    it links to.
+    :param tixi: the preprocessed master tixi
+    :param path: path to the song element in the tixi
+    :param catalog: catalog of the songs in the tixi, used to find the linked songs. If None, it is created
+    :return: XML text that can be opened with Tixi.openString in another process
+    """
+    payload = Tixi()
+    payload.create("songbook")
+    song = payload.createElement("/songbook", "song")
+
+    attributes = tixi.getAttributes(path)
+    if "chord_mode" not in attributes:
+        chordMode = tixi.getInheritedTextAttribute(path, "chord_mode")
+        if chordMode is not None:
+            attributes["chord_mode"] = chordMode
+    if "src" in attributes and not os.path.isabs(attributes["src"]):
+        attributes["src"] = os.path.normpath(os.path.join(os.path.dirname(tixi.getDocumentPath()), attributes["src"]))
+    for name, value in attributes.items():
+        payload.addTextAttribute(song, name, value)
+
+    titles = []
+    for child in tixi.xPathExpressionGetAllXPaths(path + "/*"):
+        name = Tixi.elementName(child)
+        if name == "link":
+            childPath = payload.createElement(song, name)
+        else:
+            childPath = payload.addTextElement(song, name, tixi.getTextElement(child))
+        for attrName, attrValue in tixi.getAttributes(child).items():
+            payload.addTextAttribute(childPath, attrName, attrValue)
+        if name == "link" and tixi.checkAttribute(child, "title"):
+            title = tixi.getTextAttribute(child, "title")
+            if title not in titles:
+                titles.append(title)
+
+    # The linked songs. Only the attributes used to write the links are needed
+    if titles and catalog is None:
+        catalog = SongCatalog(tixi)
+    for title in titles:
+        for record in catalog.find(title):
+            if record.xhtml is None or record.path == path:
+                continue
+            linked = payload.createElement("/songbook", "song")
+            for attrName in _linkedSongAttributes:
+                value = getattr(record, attrName)
+                if value is not None:
+                    payload.addTextAttribute(linked, attrName, value)
+
+    return payload.exportDocumentAsString()
+
+
+class _RecordCollector(logging.Handler):
+    """Keep the log records emitted in a worker process so that they can be replayed in the main process"""
+
+    def __init__(self):
+        super(_RecordCollector, self).__init__()
+        self.records = []
+
+    def emit(self, record):
+        data = record.__dict__.copy()
+        data["msg"] = record.getMessage()
+        data["args"] = None
+        data["exc_info"] = None
+        self.records.append(data)
+
+
+def _initWorker(settings: EpubSongbookConfig, level: int, validationCache: str):
+    """Initializer of the worker processes"""
+    global _workerSettings, _workerDocuments
+    _workerSettings = settings
+    ValidationCache.directory = validationCache
+    _workerDocuments = DocumentCache()
+    root = logging.getLogger()
+    # Records are passed to the main process, which writes them with its own handlers
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(level)
+
+
+def _renderSong(task):
+    """Render a single song in a worker process.
+    :param task: tuple (file name, payload XML)
+    :return: tuple (file name, rendered text or None, list of log records, error string or None,
+             (wall time, CPU time) of the rendering)
+    """
+    fileName, payload = task
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    root = logging.getLogger()
+    collector = _RecordCollector()
+    root.addHandler(collector)
+    text = None
+    error = None
+    try:
+        tixi = Tixi()
+        tixi.openString(payload)
+        path = tixi.xPathExpressionGetXPath("/songbook/song", 1)
+        writer = SongWriter(tixi, _workerSettings, path, _workerDocuments)
+        text = writer.render_song_file(fileName)
+    except Exception as e:
+        error = "{}: {}".format(type(e).__name__, getattr(e, "error", None) or e)
+    finally:
+        root.removeHandler(collector)
+    return fileName, text, collector.records, error, (time.perf_counter() - wall, time.process_time() - cpu)
+
+
+class SongRenderPool(object):
+    """Render song pages in a pool of worker processes. The results and the log records are returned in the same
+    order, as the songs were submitted, so the output does not differ from the one rendered serially"""
+
+    def __init__(self, settings: EpubSongbookConfig, jobs: int):
+        """
+        :param settings: songbook settings, sent to each of the workers
+        :param jobs: number of worker processes. 0 or less means all available CPUs
+        """
+        self.settings = settings
+        self.jobs = jobs if jobs > 0 else os.cpu_count() or 1
+        self.timings = dict()  # file name: (wall time, CPU time) of the rendering in the worker
+
+    #
+    def render(self, tasks):
+        """
+        Render the songs.
+        :param tasks: list of tuples (file name, payload XML created with songPayload)
+        :return: generator of tuples (file name, rendered text), in the order of tasks
+        """
+        chunksize = max(1, len(tasks) // (self.jobs * 4))
+        level = logging.getLogger().getEffectiveLevel()
+        with ProcessPoolExecutor(max_workers=self.jobs, initializer=_initWorker,
+                                 initargs=(self.settings, level, ValidationCache.directory)) as pool:
+            for fileName, text, records, error, timing in pool.map(_renderSong, tasks, chunksize=chunksize):
+                self.timings[fileName] = timing
+                for record in records:
+                    logging.getLogger(record["name"]).handle(logging.makeLogRecord(record))
+                if error is not None:
+                    raise RuntimeError("Failed to render {}: {}".format(fileName, error))
+                yield fileName, text
@@ -7,38 +7,44 @@ Created on Sat Nov 14 17:56:39 2020
 
 __authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
 __date__ = '2020-11-14'
-__all__ = ['LineWithChords', 'SongWriter']
+__all__ = ['SongWriter']
 
 import logging
 import os
-from collections import namedtuple
-
 from src.config import EpubSongbookConfig, ChordMode
-from src.tixi import Tixi, TixiException, ReturnCode
+from src.xml_backend import Tixi, TixiException, ReturnCode
 from .html_writer import HtmlWriter
-from .general import escapeQuoteMarks, getDefaultSongAttributes
-
-LineWithChords = namedtuple("LineWithChords", ["text", "chords"])
+from .author_names import AuthorNames
+from .document_cache import DocumentCache
+from .song_catalog import SongCatalog
+from .chord_tokenizer import ChordTokenizer, SongPart
+from .general import getDefaultSongAttributes
 
 
 class SongWriter(HtmlWriter):
-    def __init__(self, tixi: Tixi, settings: EpubSongbookConfig, path: str):
+    def __init__(self, tixi: Tixi, settings: EpubSongbookConfig, path: str, documents: DocumentCache = None,
+                 catalog: SongCatalog = None):
+        """
+        :param tixi: the songbook tixi
+        :param settings: songbook settings
+        :param path: path to the song element in the tixi
+        :param documents: cache of the parsed song source files. If None, the source file is parsed by this writer
+        :param catalog: catalog of the songs in the tixi, used to resolve the links. If None, it is created when needed
+        """
         super(SongWriter, self).__init__(tixi, settings)
+        self.catalog = catalog
+        self.linksPath = None  # path to the list of links, once created
 
         self.src_path = path
         if self.src_tixi.checkAttribute(self.src_path, "src"):
-            songFilePath = os.path.join(os.path.dirname(self.src_tixi.getDocumentPath()),
-                                        self.src_tixi.getTextAttribute(self.src_path, "src"))
+            songFilePath = self.src_tixi.getTextAttribute(self.src_path, "src")
+            if not os.path.isabs(songFilePath):
+                songFilePath = os.path.join(os.path.dirname(self.src_tixi.getDocumentPath()), songFilePath)
             assert os.path.isfile(songFilePath)
-            self.song_tixi = Tixi()
-            self.song_tixi.open(songFilePath)
-            escapeQuoteMarks(self.song_tixi)
+            if documents is None:
+                documents = DocumentCache()
+            self.song_tixi = documents.get(songFilePath).validated(self.settings.xsd_song)
             self.song_path = "/song"
-            try:
-                self.song_tixi.schemaValidateWithDefaultsFromFile(self.settings.xsd_song)
-            except TixiException as e:
-                e.error += " in file {}".format(songFilePath)
-                raise e
 
         else:
             self.song_tixi = self.src_tixi
@@ -46,6 +52,8 @@ class SongWriter(HtmlWriter):
 
         self.CS = self.settings.CS
         self.CI = self.settings.CI
+        self.tokenizer = ChordTokenizer(self.CS, self.CI)
+        self.parts = dict()  # path to the verse or chorus in the song_tixi -> SongPart
 
         result = self._compareAttributes()
         if result.code != ReturnCode.SUCCESS:
@@ -58,6 +66,16 @@ class SongWriter(HtmlWriter):
         """
         Read the xml node in song_path and write a valid HTML file out of it in the desired location
         """
+        text = self.render_song_file(fileName)
+        HtmlWriter.writeHtml(self.settings, os.path.join(self.settings.dir_text, fileName), text)
+
+    #
+    def render_song_file(self, fileName) -> str:
+        """
+        Read the xml node in song_path and return the formatted HTML text of the song, without saving it.
+        :param fileName: name of the target file. Only used for logging
+        :return: text ready to be written to the file
+        """
         title = self.src_tixi.getTextAttribute(self.src_path, "title")
         logging.info("Saving song: \"{}\" to \"{}\"".format(title, fileName))
 
@@ -71,7 +89,7 @@ class SongWriter(HtmlWriter):
 
         self.write_links()
 
-        self.saveFile(os.path.join(self.settings.dir_text, fileName))
+        return self.exportHtml()
 
     #
     def write_song_header(self, title):
@@ -109,8 +127,7 @@ class SongWriter(HtmlWriter):
                 text += " ({})".format(band)
 
         # <body/>
-        self.tixi.createElement(self.root, "body")
-        bpath = self.root + "/body"
+        bpath = self.tixi.createElement(self.root, "body")
 
         # <h1>[title]</h1>
         self.tixi.addTextElement(bpath, "h1", title)
@@ -127,10 +144,7 @@ class SongWriter(HtmlWriter):
         voc = voc.split("[")[0]  # Get rid of the index, if there is one
 
         mode = ChordMode.get(self.song_tixi.getInheritedTextAttribute(srcPath, "chord_mode"))
-        path = self.root + "/body"
-        self.format_song_part(srcPath, path, mode)
-        n = self.tixi.getNamedChildrenCount(self.root + "/body", "div")
-        path = "{}/div[{}]".format(path, n)
+        path = self.format_song_part(srcPath, self.root + "/body", mode)
         self.tixi.addTextAttribute(path, "class", voc)
 
     #
@@ -144,7 +158,8 @@ class SongWriter(HtmlWriter):
                                This will be achieved by placing the whole verse/chorus in a two-column table, 
                                with the 1st column containing the text, and the 2nd containing the chords
         ChordMode.NO_CHORD - the chords will not be written at all. The text will be as a whole, replacing newline characters with newline markers
-            
+
+        :return: path to the created <div/> element
         """
 
         if mode is None:
@@ -154,17 +169,19 @@ class SongWriter(HtmlWriter):
             mode = ChordMode.CHORDS_ABOVE
 
         if mode == ChordMode.CHORDS_ABOVE:
-            if not self.write_chords_above(srcPath, targetPath):
-                # Input data was invalid for chords-above formatting
-                mode = ChordMode.CHORDS_BESIDE
+            dPath = self.write_chords_above(srcPath, targetPath)
+            if dPath:
+                return dPath
+            # Input data was invalid for chords-above formatting
+            mode = ChordMode.CHORDS_BESIDE
 
         if mode == ChordMode.CHORDS_BESIDE:
-            if not self.write_chords_beside(srcPath, targetPath):
-                # Input data was invalid for chords-beside formatting
-                mode = ChordMode.NO_CHORDS
+            dPath = self.write_chords_beside(srcPath, targetPath)
+            if dPath:
+                return dPath
+            # Input data was invalid for chords-beside formatting
 
-        if mode == ChordMode.NO_CHORDS:
-            self.write_without_chords(srcPath, targetPath)
+        return self.write_without_chords(srcPath, targetPath)
 
     #
     def write_chords_above(self, srcPath, targetPath):
@@ -172,25 +189,22 @@ class SongWriter(HtmlWriter):
         In this format, the <div/> element contains N <table/> elements, where
         N is the number of lines. Every table has two rows: one for the chords above,
         one for the line of text
+        :return: path to the created <div/> element or False, if the text has no chords
         """
-        text = self.song_tixi.getTextElement(srcPath).strip()
-        if not self.CS in text:
+        part = self._songPart(srcPath)
+        if not part.hasChords:
             return False
 
         dPath = self.tixi.createElement(targetPath, "div")
-        for line in self._identifyLinesWithChords(text):
-            if isinstance(line, list):
-                while line:
-                    l = line.pop(0)
-                    self.tixi.addTextElement(dPath, "span", l)
-                    if line:
-                        self.tixi.createElement(dPath, "br")
-            elif isinstance(line, LineWithChords):
+        for block in part.blocks:
+            if isinstance(block, list):
+                self._writeLines(dPath, block)
+            else:
                 tbPath = self.tixi.createElement(dPath, "table")
 
                 # with the empty element [''] in front, the chords should have the same length as the textChunks
-                chords = [''] + line.chords[0].split(" ")
-                textChunks = line.text.split(self.CI)
+                chords = [''] + list(block.chords)
+                textChunks = list(block.chunks)
 
                 self.tixi.createElement(tbPath, "tr")
                 self.tixi.createElement(tbPath, "tr")
@@ -227,44 +241,38 @@ class SongWriter(HtmlWriter):
                     else:
                         lastText_td = self.tixi.createElement(txtPath, "td")
 
-        return True
+        return dPath
 
     #
     def write_chords_beside(self, srcPath, targetPath):
         """
         In this format, the <div/> element contains one <table/> element, where
         every row has two columns: one for the line of text, the other for chords
+        :return: path to the created <div/> element or False, if the text has no chords
         """
-        text = self.song_tixi.getTextElement(srcPath).strip()
-        if not self.CS in text:
+        part = self._songPart(srcPath)
+        if not part.hasChords:
             return False
 
         dPath = self.tixi.createElement(targetPath, "div")
 
         previousWasTable = False
-        for line in self._identifyLinesWithChords(text):
-            if isinstance(line, list):
-                while line:
-                    l = line.pop(0)
-                    self.tixi.addTextElement(dPath, "span", l)
-                    if line:
-                        self.tixi.createElement(dPath, "br")
+        for block in part.blocks:
+            if isinstance(block, list):
+                self._writeLines(dPath, block)
                 previousWasTable = False
-            elif isinstance(line, LineWithChords):
+            else:
                 if not previousWasTable:
                     tbPath = self.tixi.createElement(dPath, "table")
                 previousWasTable = True
                 self.tixi.addTextAttribute(tbPath, "class", "chords_beside")
 
                 trPath = self.tixi.createElement(tbPath, "tr")
-                self.tixi.addTextElement(trPath, "td", line[0].replace(self.CI, ""))
-                try:
-                    self.tixi.addTextElement(trPath, "td", line[1][0])
-                    self.tixi.addTextAttribute(trPath + "/td[2]", "class", "chords")
-                except IndexError:
-                    pass
+                self.tixi.addTextElement(trPath, "td", "".join(block.chunks))
+                tdPath = self.tixi.addTextElement(trPath, "td", " ".join(block.chords))
+                self.tixi.addTextAttribute(tdPath, "class", "chords")
 
-        return True
+        return dPath
 
     #
     def write_without_chords(self, srcPath, targetPath):
@@ -272,17 +280,30 @@ class SongWriter(HtmlWriter):
         Get rid of all chord markers and ignore the presence of chords. 
         Write the whole part as a single text element, replacing the newlines
         with newline HTML markers
+        :return: path to the created <div/> element
         """
+        dPath = self.tixi.createElement(targetPath, "div")
+        self._writeLines(dPath, self._songPart(srcPath).lines, plain=True)
+        return dPath
+
+    #
+    def _songPart(self, srcPath: str) -> SongPart:
+        """Return the verse or chorus at srcPath of the song_tixi, split into lines and chords. Each part is read
+        and parsed only once, whatever chord modes are tried"""
+        part = self.parts.get(srcPath)
+        if part is None:
+            part = self.tokenizer.tokenize(self.song_tixi.getTextElement(srcPath))
+            self.parts[srcPath] = part
+        return part
 
-        text = self.song_tixi.getTextElement(srcPath).strip()
-        lines = [line.strip().split(self.CS)[0].replace(self.CI, "") for line in text.split('\n')]
-        dPath = self.tixi.createElement(self.root + "/body", "div")
-        while lines:
-            line = lines.pop(0)
-            self.tixi.addTextElement(dPath, "span", line)
-            if lines:
+    #
+    def _writeLines(self, dPath: str, lines: list, plain: bool = False):
+        """Write the lines (ChordLine) as <span/> elements separated with <br/>, ignoring the chords
+        :param plain: write the text without the chord insertion characters"""
+        for i, line in enumerate(lines):
+            if i:
                 self.tixi.createElement(dPath, "br")
-        return True
+            self.tixi.addTextElement(dPath, "span", line.plain if plain else line.text)
 
     #
     def write_links(self):
@@ -291,10 +312,15 @@ class SongWriter(HtmlWriter):
         """
         xPath = self.src_path + "/link[@title]"
         titles_found = []
-        targetPath = "/html/body"
-        linkPcreated = bool(self.tixi.xPathEvaluateNodeNumber(targetPath + "/p[@class='links']"))
-        for path in self.src_tixi.xPathExpressionGetAllXPaths(xPath):
-            if not linkPcreated:
+        targetPath = self.linksPath if self.linksPath is not None else self.root + "/body"
+        links = self.src_tixi.xPathExpressionGetAllXPaths(xPath)
+        catalog = self.catalog
+        if links and catalog is None:
+            catalog = SongCatalog(self.src_tixi)
+        if links:
+            authorNames = AuthorNames.get(self.settings.author_aliases)
+        for path in links:
+            if self.linksPath is None:
                 # Create the new paragraph to store the links
 
                 #  <h3>See also</h3>
@@ -308,7 +334,7 @@ class SongWriter(HtmlWriter):
                 #    <ul/>
                 #  </p>
                 targetPath = self.tixi.createElement(targetPath, "ul")
-                linkPcreated = True
+                self.linksPath = targetPath
 
             title = self.src_tixi.getTextAttribute(path, "title")
             if title in titles_found:
@@ -319,21 +345,19 @@ class SongWriter(HtmlWriter):
             # Find all songs that have this linked title - each will create a separate
             # <li><a href="...xhtml">Title</a><span> (authors)</span></li> item
             #
-            xPath = "//song[@title='{}' and @xhtml]".format(title)
-            for songPath in self.src_tixi.xPathExpressionGetAllXPaths(xPath):
-                if songPath == self.src_path:
+            for song in catalog.find(title):
+                if song.xhtml is None or song.path == self.src_path:
                     # Don't want to create link for ourselves
                     continue
 
-                file = self.src_tixi.getTextAttribute(songPath, "xhtml")
-                title = self.src_tixi.getTextAttribute(songPath, "title")
+                file = song.xhtml
+                title = song.title
 
                 authors = []
-                for attr in ["lyrics", "music"]:
-                    if self.src_tixi.checkAttribute(songPath, attr):
-                        author = self.src_tixi.getTextAttribute(songPath, attr)
-                        if author not in authors:
-                            authors.append(author)
+                for author in [song.lyrics, song.music]:
+                    for written, name in authorNames.split(author):
+                        if name not in authors:
+                            authors.append(name)
 
                 #  <p class="links>
                 #    <ul>
@@ -360,40 +384,6 @@ class SongWriter(HtmlWriter):
                     sPath = self.tixi.addTextElement(liPath, "span", authors)
                     self.tixi.addTextAttribute(sPath, "style", "font-size:12px")
 
-    #
-    def _identifyLinesWithChords(self, text: str) -> list:
-        """
-        Split the text on newlines and return a list of items.
-        If a line contains chords, return it as namedtuple LineWithChords
-        Otherwise, merge all neighboring lines that do not have chords.
-        :param text: input text
-        :return: list of LineWithChords and/or plain string elements
-        """
-        output = list()
-        lines = [line.strip() for line in text.split("\n")]
-        noChordLines = None
-
-        for line in lines:
-            chords = [[s.strip()] for s in line.split(self.CS)]
-            text = chords.pop(0)[0]
-            if not chords:
-                if noChordLines is None:
-                    noChordLines = [text]
-                else:
-                    noChordLines.append(text)
-            else:
-                if noChordLines is not None:
-                    # Append the chunk of text to the output and reset the noChordLines collector
-                    output.append(noChordLines)
-                    noChordLines = None
-                output.append(LineWithChords(text, chords[0]))
-
-        if noChordLines is not None:
-            # Append the chunk of text to the output and reset the noChordLines collector
-            output.append(noChordLines)
-
-        return output
-
     def _compareAttributes(self) -> TixiException:
         """
         If the song is written in a separate tixi than the src_tixi, make sure that none of the attributes in the
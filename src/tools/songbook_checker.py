@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19.10.2026 12:30
+
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-19'
+__all__ = ['SongbookChecker']
+
+import json
+import logging
+import os
+from contextlib import contextmanager
+
+from src.xml_backend import Tixi, TixiException
+from .document_cache import DocumentCache
+from .link_graph import LinkGraph
+from .song_book_generator import SongBookGenerator
+from .validation_cache import ValidationCache
+
+
+class _ProblemCollector(logging.Handler):
+    """Keep the warnings and errors logged by the checks, with the name of the check running at the moment"""
+
+    def __init__(self):
+        super(_ProblemCollector, self).__init__(logging.WARNING)
+        self.check = None
+        self.problems = list()
+
+    def emit(self, record):
+        self.add(record.levelname.lower(), record.getMessage())
+
+    def add(self, severity: str, message: str):
+        self.problems.append({"check": self.check, "severity": severity, "message": message})
+
+
+class SongbookChecker(object):
+    """
+    Run all consistency checks of the songbook without writing anything, and report all problems at once:
+
+    - schema            - the master XML and the song source files are valid against the schemas
+    - ambiguous_content - songs defined both in the master XML and in a source file
+    - sources           - missing song source files and conflicting attributes of the songs
+    - html              - missing or invalid html documents, title mismatches and missing resources
+    - xhtml_names       - output file names used more than once
+    - links             - links without a title and links to songs that do not exist
+
+    The song source files are parsed and validated in parallel, if the XML backend allows it (see
+    DocumentCache.preload). Nothing is rendered.
+    """
+    CHECKS = ["schema", "ambiguous_content", "sources", "html", "xhtml_names", "links"]
+
+    def __init__(self, input_file: str, xsd_file: str = None, jobs: int = None, edition: str = None):
+        """
+        :param input_file: master XML file
+        :param xsd_file: XSD schema file to validate the input_file
+        :param jobs: number of threads validating the song source files (lxml backend only). None or 0: depends on
+                     the number of CPUs
+        :param edition: name of the edition to check. Its settings (e.g. max_songs) decide which songs are checked
+        """
+        self.input_file = input_file
+        self.xsd_file = xsd_file
+        self.jobs = jobs or None
+        self.edition = edition
+        self.documents = DocumentCache()
+        self._collector = None
+
+    #
+    def run(self) -> list:
+        """
+        Run the checks
+        :return: list of the problems found: dictionaries with the name of the check, severity ("error" or "warning")
+                 and the message
+        """
+        self._collector = _ProblemCollector()
+        root = logging.getLogger()
+        root.addHandler(self._collector)
+        try:
+            self._run()
+        finally:
+            root.removeHandler(self._collector)
+        report = self.report()
+        logging.info("Check of {}: {} errors, {} warnings".format(self.input_file, report["errors"],
+                                                                 report["warnings"]))
+        return self._collector.problems
+
+    #
+    def report(self) -> dict:
+        """Return the result of the last run as a dictionary"""
+        problems = self._collector.problems if self._collector is not None else []
+        return {"input": os.path.abspath(self.input_file),
+                "checks": SongbookChecker.CHECKS,
+                "errors": sum(1 for p in problems if p["severity"] in ["error", "critical"]),
+                "warnings": sum(1 for p in problems if p["severity"] == "warning"),
+                "problems": problems}
+
+    #
+    def save(self, fileName: str = None):
+        """Write the report as JSON to the file, or to the standard output if fileName is None or "-" """
+        text = json.dumps(self.report(), indent=1, ensure_ascii=False)
+        if fileName is None or fileName == "-":
+            print(text)
+            return
+        with open(fileName, "w", encoding="utf8") as f:
+            f.write(text)
+
+    #
+    def _run(self):
+        sg = None
+        with self._check("schema"):
+            try:
+                tixi = ValidationCache.open(self.input_file, self.xsd_file, recursive=True)
+            except TixiException as e:
+                self._collector.add("error", "{}: {}".format(self.input_file, getattr(e, "error", None) or e))
+                # Nothing else can be checked reliably
+                return
+
+            sg = SongBookGenerator(self.input_file, master=tixi, preprocess=False, dryRun=True,
+                                   documents=self.documents, edition=self.edition)
+            sg._removeIgnoredContent()
+
+            masterDir = os.path.dirname(sg.tixi.getDocumentPath())
+            files = []
+            for path in sg.tixi.xPathExpressionGetAllXPaths("//song[@src]"):
+                src = sg.tixi.getTextAttribute(path, "src")
+                file = src if os.path.isfile(os.path.abspath(src)) else os.path.join(masterDir, src)
+                if os.path.isfile(file):
+                    files.append(file)
+            for file, e in self.documents.preload(files, sg.settings.xsd_song, self.jobs).items():
+                self._collector.add("error", getattr(e, "error", None) or str(e))
+        if sg is None:
+            return
+
+        with self._check("ambiguous_content"):
+            sg._findAmbiguousSongsContent()
+
+        with self._check("sources"):
+            sg._pullAttributesFromSRCs()
+
+        with self._check("html"):
+            for path in sg.tixi.xPathExpressionGetAllXPaths("//html"):
+                sg.setHTMLtitle(path)
+
+        with self._check("xhtml_names"):
+            # The html documents whose title could not be read still need one to continue
+            for path in sg.tixi.xPathExpressionGetAllXPaths("//html[not(@title)]"):
+                sg.tixi.addTextAttribute(path, "title", sg.tixi.getTextAttribute(path, "src"))
+            sg._assignXHTMLattributes()
+
+        with self._check("links"):
+            self._checkLinks(sg.tixi)
+
+    #
+    def _checkLinks(self, tixi: Tixi):
+        """Report the links without a title as errors and the links to songs that do not exist as warnings. The
+        latter are removed from the songbook during the build. The links from the song source files are copied to the
+        tixi first, as in the build, and the dead links are found by the LinkGraph, so that the same rules apply"""
+        masterDir = os.path.dirname(tixi.getDocumentPath())
+        songs = tixi.xPathExpressionGetAllXPaths("//song[@title]")
+        untitled = dict()  # song path -> where the link without a title is
+        for song in songs:
+            if tixi.xPathExpressionGetAllXPaths(song + "/link[not(@title)]"):
+                untitled[song] = song
+            if not tixi.checkAttribute(song, "src"):
+                continue
+            src = tixi.getTextAttribute(song, "src")
+            try:
+                links = self.documents.get(os.path.join(masterDir, src)).links
+            except (OSError, TixiException):
+                # Already reported by the other checks
+                continue
+            linked = set(tixi.getTextAttribute(path, "title")
+                         for path in tixi.xPathExpressionGetAllXPaths(song + "/link[@title]"))
+            for link in links:
+                if link is None:
+                    untitled[song] = src
+                elif link not in linked:
+                    linked.add(link)
+                    tixi.addTextAttribute(tixi.createElement(song, "link"), "title", link)
+
+        graph = LinkGraph(tixi)
+        dead = dict()  # song path -> titles of its dead links
+        for path in graph.toRemove:
+            dead.setdefault(Tixi.parent(path), list()).append(tixi.getTextAttribute(path, "title"))
+        for song in songs:
+            if song in untitled:
+                self._collector.add("error", "<link> without title in {} ({})".format(untitled[song],
+                                                                                     graph.titles[song]))
+            for link in dict.fromkeys(dead.get(song, [])):
+                self._collector.add("warning", "Song \"{}\" links to \"{}\", which is not in the songbook".format(
+                    graph.titles[song], link))
+
+    #
+    @contextmanager
+    def _check(self, name: str):
+        """Attribute the problems logged in the block to the check"""
+        self._collector.check = name
+        try:
+            yield
+        except (TixiException, RuntimeError, ValueError) as e:
+            self._collector.add("error", "{}: {}".format(type(e).__name__, getattr(e, "error", None) or e))
+        finally:
+            self._collector.check = None
@@ -9,6 +9,7 @@ __date__ = '2020-11-14'
 __all__ = ['UtfUtils']
 
 import re
+import unicodedata
 
 
 class UtfUtils():
@@ -45,22 +46,35 @@ class UtfUtils():
         "ß": "ss",
     }
 
+    # Translation table of the characters replaced according to the maps. Built once
+    _table = str.maketrans(dict(map_pl, **map_de))
+    # Characters removed from the result
+    _otherChars = re.compile(r"[^A-Za-z0-9 .]")
+    # Already transliterated strings: input -> output
+    _memo = dict()
+
     @staticmethod
     def toAscii(input: str) -> str:
         """
         Simplifies the input string by replacing diacritic letters with ASCII characters taken from the maps.
+        The letters not found in the maps are decomposed (e.g. "é" to "e" and the combining accent), and the
+        characters that are still not ASCII letters, digits, spaces or dots are removed.
         Can be used, for example, to create reasonable file names that will not confuse the OS
         """
-        output = ""
-        otherchars = re.compile("[^A-Za-z0-9 \.]")
-
-        for char in input:
-            if char in UtfUtils.map_pl.keys():
-                output += UtfUtils.map_pl[char]
-            elif char in UtfUtils.map_de.keys():
-                output += UtfUtils.map_de[char]
-            else:
-                output += char
-        # Simply remove characters that do not match the regexp otherchars
-        output = otherchars.sub("", output)
+        output = UtfUtils._memo.get(input)
+        if output is None:
+            output = input.translate(UtfUtils._table)
+            if not output.isascii():
+                output = unicodedata.normalize("NFKD", output)
+            # Simply remove characters that do not match the regexp otherChars
+            output = UtfUtils._otherChars.sub("", output)
+            UtfUtils._memo[input] = output
         return output
+
+    @staticmethod
+    def toAsciiAll(inputs) -> list:
+        """
+        Return the list of the inputs simplified with toAscii, e.g. all titles of the songbook for the file names.
+        Each distinct string is only transliterated once
+        """
+        return [UtfUtils.toAscii(input) for input in inputs]
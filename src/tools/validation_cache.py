@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19.10.2026 11:15
+
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-19'
+__all__ = ['ValidationCache']
+
+import hashlib
+import logging
+import os
+import re
+import tempfile
+
+from src.xml_backend import Tixi
+from .general import TixiCopy
+
+
+class ValidationCache(object):
+    """
+    Validate the documents with the defaults of the XSD schemas, and remember the result on the disk: the validated
+    document, including the default values added by the validation. The result is identified by the hash of the
+    document content and of the schema (with all schemas it includes), so an unchanged document is not validated again,
+    as long as the schema does not change either. Failed validations are not stored - they are repeated, so that
+    the errors are reported.
+
+    The documents opened with ValidationCache.open are identified by the content of their file, so the stored result
+    is found before the file is parsed. The file is only hashed again if its modification time or size changes. The
+    documents linking other files (<externaldata>) are still identified by their content after parsing.
+
+    The schemas are read and hashed only once per process, unless they change. This cache does not keep the compiled
+    schemas: only the lxml backend reuses them between the validations (see Tixi._schema in
+    src/xml_backend/lxml_tixi.py). TiXI reads and compiles the schema on every validation that is not skipped.
+    """
+
+    # Directory of the stored results. Set (e.g. by the main script) to enable the cache
+    directory = None
+
+    _schemaHashes = dict()  # absolute path to the xsd -> ((mtime, size), hash of the schema and its includes)
+    _fileHashes = dict()  # absolute path to a document -> ((mtime, size), hash of the content, links other files)
+
+    #
+    @staticmethod
+    def open(fileName: str, xsd: str = None, recursive: bool = False) -> Tixi:
+        """
+        Open the document and validate it with the defaults of the xsd schema. Raise TixiException if it cannot be
+        opened or is not valid. The stored result is looked up before the file is parsed
+        :param fileName: path to the document
+        :param xsd: path to the schema. None only opens the document
+        :param recursive: replace the <externaldata> nodes with the content of the files they link to (see Tixi.open)
+        :return: the validated document, either opened from the file, or read from the cache with the path of the file
+        """
+        source = None  # the file identifying the result, unless the content of the linked files matters too
+        if xsd is not None and ValidationCache.directory is not None:
+            fileHash, linksFiles = ValidationCache.fileHash(fileName)
+            if fileHash is not None and not (recursive and linksFiles):
+                source = fileName
+                text = ValidationCache._load(ValidationCache._cacheFile(xsd, fileHash))
+                if text is not None:
+                    return TixiCopy(text, os.path.abspath(fileName))
+
+        tixi = Tixi()
+        tixi.open(fileName, recursive=recursive)
+        if xsd is None:
+            return tixi
+        return ValidationCache.validated(tixi, xsd, source)
+
+    #
+    @staticmethod
+    def validated(tixi: Tixi, xsd: str, source: str = None) -> Tixi:
+        """
+        Validate the document with the defaults of the xsd schema. Raise TixiException if it is not valid
+        :param tixi: the document. If validated, it is modified in place
+        :param xsd: path to the schema
+        :param source: the file from which the document has been opened, and not modified since. If given, the result
+                       is identified by the content of the file (see fileHash) and the document is not exported
+        :return: the validated document: either the tixi, or a copy of it read from the cache, with the same path
+        """
+        if ValidationCache.directory is None:
+            tixi.schemaValidateWithDefaultsFromFile(xsd)
+            return tixi
+
+        content = ValidationCache.fileHash(source)[0] if source is not None else None
+        if content is None:
+            content = hashlib.sha1(tixi.exportDocumentAsString().encode("utf8")).hexdigest()
+        fileName = ValidationCache._cacheFile(xsd, content)
+        text = ValidationCache._load(fileName)
+        if text is not None:
+            return TixiCopy(text, tixi.getDocumentPath())
+
+        tixi.schemaValidateWithDefaultsFromFile(xsd)
+        ValidationCache._store(fileName, tixi.exportDocumentAsString())
+        return tixi
+
+    #
+    @staticmethod
+    def schemaHash(xsd: str) -> str:
+        """Return the hash of the schema and of all schemas included or imported by it"""
+        xsd = os.path.abspath(xsd)
+        stat = os.stat(xsd)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = ValidationCache._schemaHashes.get(xsd)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        h = hashlib.sha1()
+        with open(xsd, "rb") as f:
+            content = f.read()
+        h.update(content)
+        for location in re.findall(rb'schemaLocation="([^"]+)"', content):
+            included = os.path.join(os.path.dirname(xsd), location.decode("utf8"))
+            if os.path.abspath(included) != xsd:
+                h.update(ValidationCache.schemaHash(included).encode())
+        ValidationCache._schemaHashes[xsd] = (stamp, h.hexdigest())
+        return h.hexdigest()
+
+    #
+    @staticmethod
+    def fileHash(fileName: str) -> tuple:
+        """
+        Return the hash of the file content and whether the file links other files (<externaldata>). None as the hash,
+        if the file cannot be read
+        """
+        fileName = os.path.abspath(fileName)
+        try:
+            stat = os.stat(fileName)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            cached = ValidationCache._fileHashes.get(fileName)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+            with open(fileName, "rb") as f:
+                content = f.read()
+        except OSError:
+            return None, False
+        result = (hashlib.sha1(content).hexdigest(), b"<externaldata" in content)
+        ValidationCache._fileHashes[fileName] = (stamp, result)
+        return result
+
+    #
+    @staticmethod
+    def _cacheFile(xsd: str, contentHash: str) -> str:
+        """Return the path to the stored result of the validation of the content with the schema"""
+        key = hashlib.sha1()
+        key.update(ValidationCache.schemaHash(xsd).encode())
+        key.update(contentHash.encode())
+        return os.path.join(ValidationCache.directory, key.hexdigest() + ".xml")
+
+    #
+    @staticmethod
+    def _load(fileName: str) -> str:
+        """Return the stored validated document, or None if there is none"""
+        try:
+            with open(fileName, "r", encoding="utf8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    #
+    @staticmethod
+    def _store(fileName: str, text: str):
+        """Write the validated document. The file is replaced at once, so that parallel builds never read a partial
+        one. Failure (e.g. a read-only directory) is not an error"""
+        try:
+            os.makedirs(ValidationCache.directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=ValidationCache.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf8") as f:
+                f.write(text)
+            os.replace(tmp, fileName)
+        except OSError as e:
+            logging.debug("Could not store the validated document {}: {}".format(fileName, e))
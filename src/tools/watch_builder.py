@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18.10.2026 22:40
+
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-18'
+__all__ = ['SourceWatcher', 'WatchBuilder']
+
+import logging
+import os
+import time
+
+from src.config import DirectorySink
+from src.xml_backend import Tixi, TixiException
+from .document_cache import DocumentCache
+from .song_book_generator import SongBookGenerator
+
+
+class SourceWatcher(object):
+    """Detect changes of a set of files by polling their modification times and sizes"""
+
+    def __init__(self, interval: float = 0.5, debounce: float = 0.5):
+        """
+        :param interval: time (in seconds) between two checks of the files
+        :param debounce: the changes are reported once the files have not changed for this time (in seconds), so that
+                         a burst of saves results in a single rebuild
+        """
+        self.interval = interval
+        self.debounce = debounce
+        self.stamps = dict()  # absolute path -> (mtime, size), None if the file does not exist
+
+    #
+    def watch(self, files):
+        """Set the files to be watched. Their current state is the reference for the next checks"""
+        self.stamps = {os.path.abspath(file): SourceWatcher.stamp(file) for file in files}
+
+    #
+    def poll(self) -> set:
+        """Return the set of the files changed (or removed, or created) since the previous check"""
+        changed = set()
+        for file, stamp in self.stamps.items():
+            current = SourceWatcher.stamp(file)
+            if current != stamp:
+                self.stamps[file] = current
+                changed.add(file)
+        return changed
+
+    #
+    def wait(self, timeout: float = None) -> set:
+        """
+        Wait until some files change and stay unchanged for the debounce time.
+        :param timeout: maximum time (in seconds) to wait for the first change. None waits forever
+        :return: set of the changed files. Empty, if the timeout has passed
+        """
+        start = time.monotonic()
+        changed = self.poll()
+        while not changed:
+            if timeout is not None and time.monotonic() - start >= timeout:
+                return changed
+            time.sleep(self.interval)
+            changed = self.poll()
+
+        quiet = time.monotonic()
+        while time.monotonic() - quiet < self.debounce:
+            time.sleep(min(self.interval, self.debounce))
+            more = self.poll()
+            if more:
+                changed |= more
+                quiet = time.monotonic()
+        return changed
+
+    #
+    @staticmethod
+    def stamp(file: str):
+        try:
+            stat = os.stat(file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+
+class WatchBuilder(object):
+    """
+    Build the songbook and rebuild it whenever its sources change: the master XML, the song source files, the html
+    documents and the author alias file. The generator with the preprocessed master tree and the parsed song source
+    files are kept in memory between the builds.
+
+    If only the content of some song source files has changed (their attributes and links are the same), only the
+    pages of these songs are rendered again - the section pages, indexes, toc and OPF do not depend on the content.
+    Otherwise, the songbook is preprocessed again and built incrementally, so that only the output files whose inputs
+    have changed are written.
+
+    The EPUB file cannot be written in the watch mode: it is only complete after a full build, so every change would
+    require packing all files again.
+    """
+
+    def __init__(self, input_file: str, xsd_file: str = None, jobs: int = 1, watcher: SourceWatcher = None,
+                 **options):
+        """
+        :param input_file: master XML file
+        :param xsd_file: XSD schema file to validate the input_file
+        :param jobs: number of processes rendering the songs in the full builds
+        :param watcher: SourceWatcher detecting the changes. The default one polls the files twice a second
+        :param options: other arguments of the SongBookGenerator. The incremental mode is always used
+        :raises ValueError: if the EPUB file is requested
+        """
+        if options.get("epub") is not None:
+            raise ValueError("The EPUB file cannot be written in the watch mode. Build it once the sources are ready")
+        self.input_file = os.path.abspath(input_file)
+        self.xsd_file = xsd_file
+        self.jobs = jobs
+        self.watcher = watcher if watcher is not None else SourceWatcher()
+        self.options = options
+        self.options["incremental"] = True
+        self.documents = DocumentCache()
+        self.sg = None
+        self.songFiles = dict()  # absolute path of a song source file -> paths to the song elements using it
+        self.snapshots = dict()  # absolute path of a song source file -> its attributes and links in the last build
+
+    #
+    def build(self):
+        """Preprocess the master XML and build the songbook (incrementally, if there is a previous build)"""
+        # Until the build succeeds, any change leads to a full rebuild
+        self.songFiles = dict()
+        self.sg = SongBookGenerator(self.input_file, self.xsd_file, documents=self.documents, **self.options)
+        self.sg.write_songs(jobs=self.jobs)
+        self.sg.write_sections()
+        self.sg.write_indexes()
+        self.sg.write_toc()
+        self.sg.write_metadata()
+        self.sg.finish()
+        self._collectSources()
+
+    #
+    def update(self, changed: set) -> str:
+        """
+        Rebuild the songbook after the files have changed.
+        :param changed: absolute paths of the changed files
+        :return: "songs" if only the pages of the changed songs were written, "full" if the songbook was rebuilt
+        """
+        paths = []
+        for file in sorted(changed):
+            if not self._contentOnly(file):
+                self.build()
+                return "full"
+            paths.extend(self.songFiles[file])
+
+        # The pages written since the manifest was read must not be taken for up to date, if a song is changed back
+        self.sg.manifest.previous = dict(self.sg.manifest.current)
+        self.sg.write_songs(paths=paths)
+        self.sg.manifest.save()
+        return "songs"
+
+    #
+    def run(self, builds: int = None, timeout: float = None):
+        """
+        Build the songbook and keep rebuilding it on every change of its sources.
+        :param builds: stop after this number of rebuilds. None watches until interrupted
+        :param timeout: stop, if nothing changes for this time (in seconds). None waits forever
+        """
+        t0 = time.perf_counter()
+        try:
+            self.build()
+        except (TixiException, RuntimeError, OSError, ValueError) as e:
+            # Keep watching, the editor will fix the sources
+            logging.error("Build failed: {}".format(getattr(e, "error", None) or e))
+            self._watchMaster()
+            logging.info("Watching {} files for changes...".format(len(self.watcher.stamps)))
+        else:
+            logging.info("Songbook built in {:.2f} s. Watching {} files for changes...".format(
+                time.perf_counter() - t0, len(self.watcher.stamps)))
+
+        n = 0
+        while builds is None or n < builds:
+            changed = self.watcher.wait(timeout)
+            if not changed:
+                return
+            t0 = time.perf_counter()
+            for file in sorted(changed):
+                logging.info("Changed: {}".format(file))
+            try:
+                mode = self.update(changed)
+            except (TixiException, RuntimeError, OSError, ValueError) as e:
+                # Keep watching, the editor will fix the sources
+                logging.error("Rebuild failed: {}".format(getattr(e, "error", None) or e))
+            else:
+                logging.info("Rebuilt ({}) in {:.3f} s".format(
+                    "changed songs only" if mode == "songs" else "all sources", time.perf_counter() - t0))
+            n += 1
+
+    #
+    def _collectSources(self):
+        """Find the source files of the current build and start watching them"""
+        tixi = self.sg.tixi
+        masterDir = os.path.dirname(tixi.getDocumentPath())
+        self.songFiles = dict()
+        self.snapshots = dict()
+        for path in tixi.xPathExpressionGetAllXPaths("//song[@src]"):
+            file = os.path.abspath(os.path.join(masterDir, tixi.getTextAttribute(path, "src")))
+            self.songFiles.setdefault(file, []).append(path)
+            document = self.documents.get(file)
+            self.snapshots[file] = (document.attributes, document.links)
+        htmls = [os.path.abspath(os.path.join(masterDir, tixi.getTextAttribute(path, "src")))
+                 for path in tixi.xPathExpressionGetAllXPaths("//html[@src]")]
+        # A change of the alias file changes the author names in the indexes and links: it leads to the full rebuild
+        aliases = [self.sg.settings.author_aliases] if self.sg.settings.author_aliases is not None else []
+        self.watcher.watch([self.input_file] + list(self.songFiles.keys()) + htmls + aliases)
+
+    #
+    def _watchMaster(self):
+        """Start watching the master XML and the files referenced in it, if there is no successful build to find the
+        sources of. The master is read without validation. If even that fails, only the master is watched"""
+        files = [self.input_file]
+        try:
+            tixi = Tixi()
+            tixi.open(self.input_file, recursive=True)
+            masterDir = os.path.dirname(self.input_file)
+            for path in tixi.xPathExpressionGetAllXPaths("//*[self::song or self::html][@src]"):
+                files.append(os.path.abspath(os.path.join(masterDir, tixi.getTextAttribute(path, "src"))))
+        except TixiException:
+            pass
+        self.watcher.watch(files)
+
+    #
+    def _contentOnly(self, file: str) -> bool:
+        """Check if only the content of the song source file has changed, so only its page needs to be written. The
+        pages can only be written alone to the output directory: with any other sink, the songbook is rebuilt"""
+        if file not in self.songFiles or not isinstance(self.sg.settings.sink, DirectorySink):
+            return False
+        try:
+            document = self.documents.get(file)
+        except (OSError, TixiException):
+            return False
+        return (document.attributes, document.links) == self.snapshots[file]
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18.10.2026 19:40
+
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-18'
+__all__ = ['XhtmlDocument']
+
+import re
+
+
+class _Element(object):
+    """A node of the XhtmlDocument"""
+    __slots__ = ["name", "path", "attributes", "text", "children", "counts"]
+
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
+        self.attributes = dict()
+        self.text = None
+        self.children = list()
+        self.counts = dict()  # element name -> number of children with that name
+
+
+class _Output(object):
+    """
+    Collector of the serialized text. Drops the whitespace between the table tags (<tr>, <td>, </td>, </tr>),
+    with the same result as the regular expressions folding the table rows in HtmlWriter.exportHtml
+    """
+    TABLE_TAG = re.compile(r"</?t[dr]")
+
+    def __init__(self):
+        self.parts = list()
+        self.line = ""  # text written since the last newline, without the pending whitespace
+        self.pending = ""  # whitespace following a ">", written only if not followed by a table tag
+
+    #
+    def write(self, text: str):
+        if not text:
+            return
+        if text.isspace() and (self.pending or self.line.endswith(">")):
+            self.pending += text
+            return
+        if self.pending and _Output.TABLE_TAG.match(text) and _Output.TABLE_TAG.search(self.line):
+            self.pending = ""
+        core = text.rstrip()
+        trailing = text[len(core):]
+        if not core.endswith(">"):
+            core, trailing = text, ""
+        self._emit(self.pending + core)
+        self.pending = trailing
+
+    #
+    def getvalue(self) -> str:
+        self._emit(self.pending)
+        self.pending = ""
+        return "".join(self.parts)
+
+    #
+    def _emit(self, text: str):
+        self.parts.append(text)
+        if "\n" in text:
+            self.line = text.rsplit("\n", 1)[1]
+        else:
+            self.line += text
+
+
+class XhtmlDocument(object):
+    """
+    Lightweight replacement of the Tixi used by the HtmlWriter and its subclasses to build the pages. Offers the
+    subset of the Tixi API that the writers use. The elements are addressed with the paths returned by createElement
+    and addTextElement, which are resolved with a dictionary lookup instead of an XPath query.
+
+    The document is written directly in the final formatting of HtmlWriter.exportHtml: the same output as formatted
+    by libxml2, with the same replacements and the same table rows folding, so no post-processing is needed.
+    """
+    INDENT = "  "
+
+    def __init__(self, name: str = "html"):
+        """
+        :param name: name of the root element
+        """
+        self.root = _Element(name, "/" + name)
+        self.elements = {self.root.path: self.root}
+
+    #
+    def createElement(self, parentPath: str, name: str) -> str:
+        """Append a new element and return its path"""
+        parent = self.elements[parentPath]
+        n = parent.counts.get(name, 0) + 1
+        parent.counts[name] = n
+        element = _Element(name, "{}/{}[{}]".format(parent.path, name, n))
+        parent.children.append(element)
+        self.elements[element.path] = element
+        if n == 1:
+            # Like in XPath, the path without an index addresses the first element with the name
+            self.elements["{}/{}".format(parent.path, name)] = element
+        return element.path
+
+    #
+    def addTextElement(self, parentPath: str, name: str, text: str) -> str:
+        """Append a new element with the text and return its path"""
+        path = self.createElement(parentPath, name)
+        self.elements[path].text = text
+        return path
+
+    #
+    def addTextAttribute(self, path: str, name: str, value: str):
+        self.elements[path].attributes[name] = value
+
+    #
+    def getTextElement(self, path: str) -> str:
+        return self.elements[path].text or ""
+
+    #
+    def updateTextElement(self, path: str, text: str):
+        self.elements[path].text = text
+
+    #
+    def getNamedChildrenCount(self, path: str, name: str) -> int:
+        return self.elements[path].counts.get(name, 0)
+
+    #
+    def checkElement(self, path: str) -> bool:
+        return path in self.elements
+
+    #
+    def exportHtml(self, encoding: str = None) -> str:
+        """
+        Return the text of the document, ready to be saved
+        :param encoding: encoding declared in the XML declaration. None omits the declaration of the encoding
+        """
+        out = _Output()
+        if encoding is None:
+            out.write('<?xml version="1.0"?>\n')
+        else:
+            out.write("<?xml version=\"1.0\" encoding='{}'?>\n".format(encoding))
+        self._write(out, self.root, 0, True)
+        out.write("\n")
+        return out.getvalue()
+
+    #
+    def _write(self, out: _Output, element: _Element, level: int, formatted: bool):
+        """Write the element with the children. Formatting (indentation) is switched off inside the elements
+        containing text, as libxml2 does"""
+        start = "<" + element.name + "".join(' {}="{}"'.format(name, XhtmlDocument.escape(value, True))
+                                             for name, value in element.attributes.items())
+        if element.text is None and not element.children:
+            out.write(start + "/>")
+            return
+
+        out.write(start + ">")
+        formatted = formatted and element.text is None
+        if formatted:
+            out.write("\n")
+        else:
+            out.write(XhtmlDocument.escape(element.text or ""))
+        indent = XhtmlDocument.INDENT * min(level + 1, 60) if formatted else ""
+        for child in element.children:
+            out.write(indent)
+            self._write(out, child, level + 1, formatted)
+            if formatted:
+                out.write("\n")
+        if formatted:
+            out.write(XhtmlDocument.INDENT * min(level, 60))
+        out.write("</" + element.name + ">")
+
+    #
+    @staticmethod
+    def escape(text: str, attribute: bool = False) -> str:
+        """Escape the text like libxml2 does when exporting a document without encoding, then apply the replacements
+        of HtmlWriter.exportHtml: the "<br/>" markers and the entities (e.g. "&#xA0;") are written as they are"""
+        text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        if attribute:
+            text = text.replace('"', "&quot;").replace("\n", "&#10;").replace("\r", "&#13;").replace("\t", "&#9;")
+        else:
+            text = text.replace("\r", "&#xD;")
+        text = text.replace("&lt;br/&gt;", "<br/>").replace("&amp;", "&")
+        if not text.isascii():
+            text = "".join(c if ord(c) < 128 else "&#x{:X};".format(ord(c)) for c in text)
+        return text
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19.10.2026 13:30
+
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+
+XML backend of the songbook tools. All modules import Tixi, TixiException and ReturnCode from here, not from a
+particular implementation:
+
+- tixi - the TiXI library with the XTixi extensions (src.tixi). Used by default, if it can be imported
+- lxml - pure Python implementation on top of lxml (src.xml_backend.lxml_tixi). Used when TiXI is not available
+
+The backend is selected once, at the first import, with the environment variable SONGBOOK_XML_BACKEND (set e.g. by
+the --xml-backend option of the main script).
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-19'
+__all__ = ['Tixi', 'TixiException', 'ReturnCode', 'BACKEND', 'BACKENDS', 'OPERATIONS']
+
+import logging
+import os
+
+BACKENDS = ["tixi", "lxml"]
+
+# The operations of the Tixi class used by the songbook tools. Every backend must provide all of them
+OPERATIONS = ["open", "openDocument", "openString", "create", "close", "getDocumentPath", "exportDocumentAsString",
+              "saveDocument", "saveCompleteDocument", "clearComments", "addExternalLink", "removeExternalLinks",
+              "registerNamespace", "registerNamespacesFromDocument", "setElementNamespace", "elementName", "parent",
+              "checkElement", "xPathExpressionGetAllXPaths", "xPathEvaluateNodeNumber", "xPathExpressionGetXPath",
+              "getNamedChildrenCount", "getChildNodeName", "createElement", "createElementNS", "createElementAtIndex",
+              "addTextElement", "getTextElement", "updateTextElement", "removeElement", "addTextAttribute",
+              "getTextAttribute", "checkAttribute", "removeAttribute", "getNumberOfAttributes", "getAttributeName",
+              "getAttributes", "getInheritedTextAttribute", "schemaValidateFromFile",
+              "schemaValidateWithDefaultsFromFile"]
+
+BACKEND = os.environ.get("SONGBOOK_XML_BACKEND", "").lower() or None
+if BACKEND is not None and BACKEND not in BACKENDS:
+    raise ImportError("Unknown XML backend {}. Available: {}".format(BACKEND, ", ".join(BACKENDS)))
+
+if BACKEND in [None, "tixi"]:
+    try:
+        from src.tixi import Tixi, TixiException, ReturnCode
+
+        BACKEND = "tixi"
+    except ImportError:
+        if BACKEND == "tixi":
+            raise
+        logging.debug("TiXI is not available, using the lxml XML backend")
+        BACKEND = "lxml"
+
+if BACKEND == "lxml":
+    from .lxml_tixi import Tixi, TixiException, ReturnCode
+
+_missing = [name for name in OPERATIONS if not hasattr(Tixi, name)]
+if _missing:
+    raise ImportError("The {} XML backend does not implement: {}".format(BACKEND, ", ".join(_missing)))
@@ -0,0 +1,472 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19.10.2026 13:45
+
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-19'
+__all__ = ['Tixi', 'TixiException', 'ReturnCode']
+
+import os
+import re
+from enum import Enum
+
+from lxml import etree
+
+
+class ReturnCode(Enum):
+    """Return codes of the TiXI library, as used in the TixiException"""
+    SUCCESS = 0
+    FAILED = 1
+    INVALID_XML_NAME = 2
+    NOT_WELL_FORMED = 3
+    NOT_SCHEMA_COMPLIANT = 4
+    NUMBER_FORMAT_ERROR = 5
+    INVALID_HANDLE = 6
+    INVALID_SCHEMA = 7
+    OPEN_FAILED = 8
+    ELEMENT_NOT_FOUND = 9
+    ELEMENT_PATH_NOT_UNIQUE = 10
+    ATTRIBUTE_NOT_FOUND = 11
+    NO_CHILD_ELEMENTS = 12
+    INDEX_OUT_OF_RANGE = 13
+    NOT_AN_ELEMENT = 14
+
+
+class TixiException(Exception):
+    def __init__(self, code: ReturnCode, error: str = ""):
+        super(TixiException, self).__init__(code)
+        self.code = code
+        self.error = error
+
+    #
+    def __str__(self):
+        return "{}: {}".format(self.code, self.error)
+
+
+# Last step of a path: name with an optional index or predicate
+_predicate = re.compile(r"\[[^\[\]]*\]$")
+# Paths that only consist of element names and positions. Only these are kept in the cache of element handles,
+# because they do not depend on the attributes or text of the elements
+_simplePath = re.compile(r"^(/[\w.:-]+(\[\d+\])?)+$")
+
+_xmlNamespace = "http://www.w3.org/XML/1998/namespace"
+
+
+class Tixi(object):
+    """
+    Implementation of the Tixi interface used by the songbook tools (see src.xml_backend) on top of lxml.
+
+    The elements are addressed by paths, as in Tixi, but each path is resolved only once: the element handles are
+    kept in a cache until the structure of the document changes. The paths returned by this class are the same as
+    the ones returned by Tixi: the position of an element is only given if its parent has more children of the same
+    name.
+    """
+
+    def __init__(self):
+        self._tree = None
+        self._documentPath = None
+        self._encoding = None
+        self._namespaces = dict()  # prefix -> uri
+        self._elements = dict()  # simple path -> element
+
+    #
+    def create(self, name: str):
+        self._setRoot(etree.Element(name))
+
+    #
+    def open(self, fileName: str, recursive: bool = False):
+        """
+        :param fileName: XML file
+        :param recursive: replace the <externaldata> nodes with the root elements of the files they link to
+        """
+        try:
+            with open(fileName, "rb") as f:
+                data = f.read()
+        except OSError as e:
+            raise TixiException(ReturnCode.OPEN_FAILED, "{}: {}".format(fileName, e.strerror or e))
+        root = self._parse(data, ReturnCode.OPEN_FAILED)
+        self._setRoot(root, os.path.abspath(fileName), Tixi._declaredEncoding(data))
+        if recursive:
+            self._openExternalData(os.path.dirname(os.path.abspath(fileName)))
+
+    openDocument = open
+
+    #
+    def openString(self, text: str):
+        data = text.encode("utf8") if isinstance(text, str) else text
+        root = self._parse(data, ReturnCode.NOT_WELL_FORMED)
+        self._setRoot(root, None, Tixi._declaredEncoding(data))
+
+    #
+    def close(self):
+        self._tree = None
+        self._elements = dict()
+
+    #
+    def getDocumentPath(self) -> str:
+        return self._documentPath
+
+    #
+    def exportDocumentAsString(self, encoding: str = None) -> str:
+        """Return the document formatted as by Tixi: indented, with the non-ASCII characters as hexadecimal
+        references, unless the document declares its encoding"""
+        encoding = encoding or self._encoding
+        text = etree.tostring(self._tree, pretty_print=True, encoding=encoding or "ASCII",
+                              xml_declaration=False).decode(encoding or "ascii")
+        text = re.sub(r"&#(\d+);", lambda m: "&#x{:X};".format(int(m.group(1))), text)
+        declaration = '<?xml version="1.0" encoding="{}"?>'.format(encoding) if encoding else '<?xml version="1.0"?>'
+        return declaration + "\n" + text
+
+    #
+    def saveDocument(self, fileName: str):
+        with open(fileName, "w", encoding="utf8") as f:
+            f.write(self.exportDocumentAsString("utf-8"))
+        self._documentPath = os.path.abspath(fileName)
+
+    saveCompleteDocument = saveDocument
+
+    #
+    def clearComments(self):
+        for comment in self._tree.xpath("//comment()"):
+            comment.getparent().remove(comment)
+
+    #
+    def addExternalLink(self, path: str, url: str, fileFormat: str):
+        """Add the <externaldata> node, replaced with the content of the linked file when opened recursively"""
+        node = etree.SubElement(self._element(path), "externaldata")
+        etree.SubElement(node, "path").text = "file://" + os.path.dirname(os.path.abspath(url))
+        etree.SubElement(node, "filename").text = os.path.basename(url)
+        self._changed()
+
+    #
+    def removeExternalLinks(self):
+        """The linked files are merged into the document when it is opened, without any trace of the links.
+        Nothing to remove"""
+        pass
+
+    #
+    def registerNamespace(self, uri: str, prefix: str):
+        self._namespaces[prefix] = uri
+
+    #
+    def registerNamespacesFromDocument(self):
+        for element in self._tree.iter(tag=etree.Element):
+            for prefix, uri in element.nsmap.items():
+                if prefix:
+                    self._namespaces[prefix] = uri
+
+    #
+    def setElementNamespace(self, path: str, uri: str, prefix: str):
+        element = self._element(path)
+        replacement = etree.Element("{{{}}}{}".format(uri, etree.QName(element).localname), nsmap={prefix: uri},
+                                    attrib=dict(element.attrib))
+        replacement.text = element.text
+        replacement.extend(list(element))
+        parent = element.getparent()
+        if parent is None:
+            self._tree._setroot(replacement)
+        else:
+            parent.replace(element, replacement)
+        self._changed()
+
+    #
+    @staticmethod
+    def elementName(path: str) -> str:
+        """Return the name of the element at the path, without the index"""
+        return _predicate.sub("", path.rstrip("/").split("/")[-1])
+
+    #
+    @staticmethod
+    def parent(path: str) -> str:
+        """Return the path to the parent of the element at the path"""
+        return path.rstrip("/").rsplit("/", 1)[0]
+
+    #
+    def checkElement(self, path: str) -> bool:
+        try:
+            self._element(path)
+        except TixiException as e:
+            if e.code == ReturnCode.ELEMENT_NOT_FOUND:
+                return False
+            raise
+        return True
+
+    #
+    def xPathExpressionGetAllXPaths(self, xPathExpression: str) -> list:
+        """Return the paths to all elements matching the expression, in the document order"""
+        elements = [e for e in self._xPath(xPathExpression) if isinstance(e, etree._Element)]
+        positions = dict()  # parent element -> {child element: position among the children of the same name}
+        paths = []
+        for element in elements:
+            path = self._pathOf(element, positions)
+            self._elements[path] = element
+            paths.append(path)
+        return paths
+
+    #
+    def xPathEvaluateNodeNumber(self, xPathExpression: str) -> int:
+        return len(self._xPath(xPathExpression))
+
+    #
+    def xPathExpressionGetXPath(self, xPathExpression: str, index: int) -> str:
+        paths = self.xPathExpressionGetAllXPaths(xPathExpression)
+        if not 0 < index <= len(paths):
+            raise TixiException(ReturnCode.INDEX_OUT_OF_RANGE, "{}: {}".format(xPathExpression, index))
+        return paths[index - 1]
+
+    #
+    def getNamedChildrenCount(self, path: str, name: str) -> int:
+        element = self._element(path)
+        return sum(1 for child in element.iterchildren(tag=etree.Element) if self._name(child) == name)
+
+    #
+    def getChildNodeName(self, path: str, index: int) -> str:
+        if path == "/":
+            return etree.QName(self._tree.getroot()).localname
+        children = list(self._element(path).iterchildren(tag=etree.Element))
+        if not 0 < index <= len(children):
+            raise TixiException(ReturnCode.INDEX_OUT_OF_RANGE, "{}: {}".format(path, index))
+        return etree.QName(children[index - 1]).localname
+
+    #
+    def createElement(self, parentPath: str, name: str) -> str:
+        return self._added(parentPath, etree.SubElement(self._element(parentPath), name))
+
+    #
+    def createElementNS(self, parentPath: str, name: str, uri: str) -> str:
+        tag = "{{{}}}{}".format(uri, name) if uri else name
+        return self._added(parentPath, etree.SubElement(self._element(parentPath), tag))
+
+    #
+    def createElementAtIndex(self, parentPath: str, name: str, index: int) -> str:
+        parent = self._element(parentPath)
+        children = list(parent.iterchildren(tag=etree.Element))
+        element = etree.Element(name)
+        if index > len(children):
+            parent.append(element)
+        else:
+            children[index - 1].addprevious(element)
+        return self._added(parentPath, element)
+
+    #
+    def addTextElement(self, parentPath: str, name: str, text: str) -> str:
+        element = etree.SubElement(self._element(parentPath), name)
+        element.text = text
+        return self._added(parentPath, element)
+
+    #
+    def getTextElement(self, path: str) -> str:
+        return self._element(path).text or ""
+
+    #
+    def updateTextElement(self, path: str, text: str):
+        self._element(path).text = text
+
+    #
+    def removeElement(self, path: str):
+        element = self._element(path)
+        element.getparent().remove(element)
+        self._changed()
+
+    #
+    def addTextAttribute(self, path: str, name: str, value: str):
+        self._element(path).set(self._attributeName(name), value)
+
+    #
+    def getTextAttribute(self, path: str, name: str) -> str:
+        value = self._element(path).get(self._attributeName(name))
+        if value is None:
+            raise TixiException(ReturnCode.ATTRIBUTE_NOT_FOUND, "{}@{}".format(path, name))
+        return value
+
+    #
+    def checkAttribute(self, path: str, name: str) -> bool:
+        return self._attributeName(name) in self._element(path).attrib
+
+    #
+    def removeAttribute(self, path: str, name: str):
+        self._element(path).attrib.pop(self._attributeName(name), None)
+
+    #
+    def getNumberOfAttributes(self, path: str) -> int:
+        return len(self._element(path).attrib)
+
+    #
+    def getAttributeName(self, path: str, index: int) -> str:
+        return list(self._element(path).attrib.keys())[index - 1]
+
+    #
+    def getAttributes(self, path: str) -> dict:
+        return dict(self._element(path).attrib)
+
+    #
+    def getInheritedTextAttribute(self, path: str, name: str) -> str:
+        """Return the value of the attribute of the element, or of its closest ancestor that has it. None if none has"""
+        name = self._attributeName(name)
+        element = self._element(path)
+        while element is not None:
+            if name in element.attrib:
+                return element.attrib[name]
+            element = element.getparent()
+        return None
+
+    #
+    def schemaValidateFromFile(self, xsdFile: str):
+        self._validate(Tixi._schema(xsdFile, False))
+
+    #
+    def schemaValidateWithDefaultsFromFile(self, xsdFile: str):
+        self._validate(Tixi._schema(xsdFile, True))
+
+    #
+    def _setRoot(self, root, documentPath: str = None, encoding: str = None):
+        self._tree = root.getroottree()
+        self._documentPath = documentPath
+        self._encoding = encoding
+        self._namespaces = dict()
+        self._elements = dict()
+
+    #
+    def _changed(self):
+        """The structure of the document has changed. The paths of the elements may be different now"""
+        self._elements = dict()
+
+    #
+    def _added(self, parentPath: str, element) -> str:
+        """Return the path to the newly created element. Only the paths of its siblings of the same name change"""
+        unique = next(element.itersiblings(tag=element.tag, preceding=True), None) is None and \
+            next(element.itersiblings(tag=element.tag), None) is None
+        if not unique:
+            # The paths of the siblings of the same name get an index now
+            self._changed()
+        if unique and _simplePath.match(parentPath):
+            path = "{}/{}".format(parentPath, self._name(element))
+        else:
+            path = self._pathOf(element)
+        self._elements[path] = element
+        return path
+
+    #
+    def _element(self, path: str):
+        """Return the handle of the element at the path. Raise TixiException if there is no such element, or more"""
+        element = self._elements.get(path)
+        if element is not None:
+            return element
+        if path == "/":
+            return self._tree.getroot()
+        elements = [e for e in self._xPath(path) if isinstance(e, etree._Element)]
+        if not elements:
+            raise TixiException(ReturnCode.ELEMENT_NOT_FOUND, path)
+        if len(elements) > 1:
+            raise TixiException(ReturnCode.ELEMENT_PATH_NOT_UNIQUE, path)
+        if _simplePath.match(path):
+            self._elements[path] = elements[0]
+        return elements[0]
+
+    #
+    def _xPath(self, xPathExpression: str) -> list:
+        try:
+            result = self._tree.xpath(xPathExpression, namespaces=self._namespaces)
+        except etree.XPathError as e:
+            raise TixiException(ReturnCode.FAILED, "{}: {}".format(xPathExpression, e))
+        return result if isinstance(result, list) else []
+
+    #
+    def _name(self, element) -> str:
+        """Return the name of the element as used in the paths: with the prefix of its namespace, if registered"""
+        name = etree.QName(element)
+        if name.namespace is None:
+            return name.localname
+        for prefix, uri in self._namespaces.items():
+            if uri == name.namespace:
+                return "{}:{}".format(prefix, name.localname)
+        return "*[local-name()='{}']".format(name.localname)
+
+    #
+    def _pathOf(self, element, positions: dict = None) -> str:
+        """
+        Return the path to the element
+        :param positions: cache of the positions of the children of their parents, shared by the calls for the elements
+                          of the same document, as long as it is not modified
+        """
+        if positions is None:
+            positions = dict()
+        steps = []
+        while element is not None:
+            parent = element.getparent()
+            step = self._name(element)
+            if parent is not None:
+                if parent not in positions:
+                    counts = dict()
+                    children = dict()
+                    for child in parent.iterchildren(tag=etree.Element):
+                        counts[child.tag] = counts.get(child.tag, 0) + 1
+                        children[child] = counts[child.tag]
+                    positions[parent] = (counts, children)
+                counts, children = positions[parent]
+                if counts[element.tag] > 1:
+                    step += "[{}]".format(children[element])
+            steps.append(step)
+            element = parent
+        return "/" + "/".join(reversed(steps))
+
+    #
+    def _attributeName(self, name: str) -> str:
+        """Return the name of the attribute as used by lxml: {uri}name for the names with a namespace prefix"""
+        if ":" not in name or name.startswith("xmlns"):
+            return name
+        prefix, localName = name.split(":", 1)
+        uri = _xmlNamespace if prefix == "xml" else self._namespaces.get(prefix)
+        if uri is None:
+            raise TixiException(ReturnCode.FAILED, "Namespace prefix {} is not registered".format(prefix))
+        return "{{{}}}{}".format(uri, localName)
+
+    #
+    def _openExternalData(self, directory: str):
+        """Replace the <externaldata> nodes with the root elements of the linked files"""
+        for node in self._tree.xpath("//externaldata"):
+            path = node.findtext("path", "")
+            if path.startswith("file://"):
+                path = path[len("file://"):]
+            fileName = os.path.join(directory, path, node.findtext("filename", ""))
+            linked = Tixi()
+            linked.open(fileName, recursive=True)
+            node.getparent().replace(node, linked._tree.getroot())
+        self._changed()
+
+    #
+    def _validate(self, schema):
+        if not schema.validate(self._tree):
+            raise TixiException(ReturnCode.NOT_SCHEMA_COMPLIANT, str(schema.error_log))
+
+    #
+    @staticmethod
+    def _parse(data: bytes, code: ReturnCode):
+        try:
+            return etree.fromstring(data, etree.XMLParser(remove_blank_text=True))
+        except (etree.XMLSyntaxError, ValueError) as e:
+            raise TixiException(code, str(e))
+
+    #
+    @staticmethod
+    def _declaredEncoding(data: bytes) -> str:
+        match = re.match(rb"\s*<\?xml[^>]*encoding=[\"']([^\"']+)", data)
+        return match.group(1).decode("ascii") if match else None
+
+    _schemas = dict()  # (path to the xsd, (mtime, size), with defaults) -> compiled XMLSchema
+
+    #
+    @staticmethod
+    def _schema(xsdFile: str, defaults: bool):
+        """Return the compiled schema. Each schema is compiled only once per process, unless the file changes"""
+        try:
+            stat = os.stat(xsdFile)
+            key = (os.path.abspath(xsdFile), (stat.st_mtime_ns, stat.st_size), defaults)
+            if key not in Tixi._schemas:
+                Tixi._schemas[key] = etree.XMLSchema(etree.parse(xsdFile), attribute_defaults=defaults)
+            return Tixi._schemas[key]
+        except (OSError, etree.XMLSchemaParseError, etree.XMLSyntaxError) as e:
+            raise TixiException(ReturnCode.INVALID_SCHEMA, str(e))
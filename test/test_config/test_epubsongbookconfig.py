@@ -10,7 +10,7 @@ import os
 import shutil
 import unittest
 
-from src.tixi import Tixi
+from src.xml_backend import Tixi
 from src.config import ChordMode, EpubSongbookConfig, epubsongbookconfig
 
 
@@ -107,6 +107,47 @@ class TestEpubSongbookConfig(unittest.TestCase):
         self.assertEqual(14, cfg.maxsongs)
         self.assertIsNone(cfg.encoding)
 
+    def test_edition(self):
+        self.assertEqual([], EpubSongbookConfig.editions(self.tixi))
+        editions = self.tixi.createElement("/songbook", "editions")
+        for name, mode, max_songs in [("lyrics", "NO_CHORDS", None), ("short", None, "5")]:
+            edition = self.tixi.createElement(editions, "edition")
+            self.tixi.addTextAttribute(edition, "name", name)
+            if mode is not None:
+                self.tixi.addTextElement(edition, "prefered_chord_mode", mode)
+            if max_songs is not None:
+                self.tixi.addTextElement(edition, "max_songs", max_songs)
+        self.assertEqual(["lyrics", "short"], EpubSongbookConfig.editions(self.tixi))
+
+        cfg = EpubSongbookConfig(self.tixi, "lyrics")
+        self.assertEqual("lyrics", cfg.edition)
+        self.assertEqual(ChordMode.NO_CHORDS, cfg.chordType)
+        self.assertEqual(0, cfg.maxsongs)
+        # Settings not overriden by the edition are taken from <settings>
+        self.assertEqual("../test_dir", cfg.dir_out)
+
+        cfg = EpubSongbookConfig(self.tixi, "short")
+        self.assertEqual(ChordMode.CHORDS_ABOVE, cfg.chordType)
+        self.assertEqual(5, cfg.maxsongs)
+
+        self.assertRaises(ValueError, EpubSongbookConfig, self.tixi, "missing")
+
+    def test_author_aliases(self):
+        os.makedirs(self.test_dir_rel)
+        aliases = os.path.join(self.test_dir_rel, "aliases.xml")
+        self.tixi.addTextElement("/songbook/settings", "author_aliases", "../test_dir/aliases.xml")
+        with self.assertRaisesRegex(ValueError, "aliases.xml not found"):
+            EpubSongbookConfig(self.tixi)
+
+        with open(aliases, "w", encoding="utf8") as f:
+            f.write("<authors><author name=")
+        with self.assertRaisesRegex(ValueError, "aliases.xml is not a valid XML file"):
+            EpubSongbookConfig(self.tixi)
+
+        with open(aliases, "w", encoding="utf8") as f:
+            f.write('<authors><author name="John Doe"><alias>J. Doe</alias></author></authors>')
+        self.assertEqual(aliases, EpubSongbookConfig(self.tixi).author_aliases)
+
     def test_createOutputDir(self):
         cfg = EpubSongbookConfig(self.tixi)
 
@@ -134,11 +175,15 @@ class TestEpubSongbookConfig(unittest.TestCase):
             mimefile = f.read()
         self.assertEqual("application/epub+zip", mimefile)
 
+        for file in ["songbook.css", "acknowledgements.xhtml", os.path.join("META-INF", "container.xml")]:
+            self.assertTrue(os.path.isfile(os.path.join(self.test_dir_abs, file)), file)
+
+        # The metadata.opf is only kept in memory, until the songbook generator completes it
         path = os.path.abspath(os.path.join(self.test_dir_abs, "metadata.opf"))
-        self.assertTrue(os.path.isfile(path))
+        self.assertFalse(os.path.isfile(path))
 
         tixi_actual = Tixi()
-        tixi_actual.open(path)
+        tixi_actual.openString(cfg.metadata)
 
         expected_meta = """<?xml version="1.0" encoding="utf-8"?>
             <package xmlns="http://www.idpf.org/2007/opf">
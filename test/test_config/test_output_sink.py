@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18.10.2026 14:30
+ 
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-18'
+
+import os
+import shutil
+import unittest
+import zipfile
+
+from src.config import DirectorySink, MemorySink, ZipSink, TeeSink, AsyncSink
+
+
+class TestOutputSink(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = os.path.join(os.path.abspath(os.path.dirname(__file__)), "test_dir")
+        self.epub = os.path.join(os.path.abspath(os.path.dirname(__file__)), "test_sink.epub")
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+        if os.path.isfile(self.epub):
+            os.remove(self.epub)
+
+    def test_directory_sink(self):
+        sink = DirectorySink(self.test_dir)
+        sink.write("text/a.xhtml", b"abc")
+        self.assertTrue(sink.exists("text/a.xhtml"))
+        self.assertEqual(b"abc", sink.read("text/a.xhtml"))
+        sink.copyFile("b.xhtml", os.path.join(self.test_dir, "text", "a.xhtml"))
+        with open(os.path.join(self.test_dir, "b.xhtml"), "rb") as f:
+            self.assertEqual(b"abc", f.read())
+        sink.remove("text/a.xhtml")
+        self.assertFalse(os.path.isfile(os.path.join(self.test_dir, "text", "a.xhtml")))
+
+    def test_directory_sink_copy(self):
+        source = os.path.join(self.test_dir, "source", "a.css")
+        os.makedirs(os.path.dirname(source))
+        with open(source, "wb") as f:
+            f.write(b"p {}")
+
+        sink = DirectorySink(os.path.join(self.test_dir, "out"))
+        sink.copyFile("a.css", source)
+        target = sink.path("a.css")
+        self.assertTrue(DirectorySink.identical(source, target))
+        # An identical file is not copied again
+        os.utime(target, ns=(0, 0))
+        sink.copyFile("a.css", source)
+        self.assertEqual(0, os.stat(target).st_mtime_ns)
+
+        with open(source, "wb") as f:
+            f.write(b"p { }")
+        self.assertFalse(DirectorySink.identical(source, target))
+        sink.copyFile("a.css", source)
+        self.assertEqual(b"p { }", sink.read("a.css"))
+
+        linked = DirectorySink(os.path.join(self.test_dir, "linked"), link="hardlink")
+        linked.copyFile("a.css", source)
+        self.assertTrue(os.path.samefile(source, linked.path("a.css")))
+        # Writing never modifies the source through the link
+        linked.write("a.css", b"div {}")
+        with open(source, "rb") as f:
+            self.assertEqual(b"p { }", f.read())
+
+        # Reflinks are not supported by every file system. The file is copied then
+        cloned = DirectorySink(os.path.join(self.test_dir, "cloned"), link="reflink")
+        cloned.copyFile("a.css", source)
+        self.assertEqual(b"p { }", cloned.read("a.css"))
+
+    def test_memory_sink(self):
+        sink = MemorySink()
+        sink.write("text/a.xhtml", b"abc")
+        sink.copyFile("test.py", __file__)
+        self.assertEqual(["text/a.xhtml", "test.py"], list(sink.files.keys()))
+        self.assertTrue(sink.exists("test.py"))
+        sink.remove("test.py")
+        self.assertFalse(sink.exists("test.py"))
+        self.assertFalse(os.path.isdir(self.test_dir))
+
+    def test_zip_sink(self):
+        primary = DirectorySink(self.test_dir)
+        primary.write("kept.xhtml", b"from the previous build")
+        sink = TeeSink(primary, ZipSink(self.epub, 9))
+        sink.write("text/a.xhtml", b"abc" * 100)
+        sink.write("mimetype", b"application/epub+zip")
+        sink.keep("kept.xhtml")
+        sink.close()
+
+        self.assertTrue(os.path.isfile(os.path.join(self.test_dir, "text", "a.xhtml")))
+        with zipfile.ZipFile(self.epub) as z:
+            infos = z.infolist()
+            self.assertEqual(["mimetype", "text/a.xhtml", "kept.xhtml"], [i.filename for i in infos])
+            self.assertEqual(zipfile.ZIP_STORED, infos[0].compress_type)
+            self.assertEqual(zipfile.ZIP_DEFLATED, infos[1].compress_type)
+            self.assertEqual(b"abc" * 100, z.read("text/a.xhtml"))
+            self.assertEqual(b"from the previous build", z.read("kept.xhtml"))
+
+    def test_zip_sink_keep(self):
+        sink = ZipSink(self.epub)
+        sink.write("text/kept.xhtml", b"from the previous build")
+        sink.write("text/changed.xhtml", b"old")
+        sink.write("text/removed.xhtml", b"old")
+        sink.close()
+
+        # The next build keeps one file and writes another one again
+        sink = ZipSink(self.epub)
+        self.assertTrue(sink.exists("text/removed.xhtml"))
+        sink.write("text/changed.xhtml", b"new")
+        sink.keep("text/kept.xhtml")
+        sink.keep("text/changed.xhtml")
+        sink.close()
+
+        self.assertFalse(os.path.isfile(self.epub + ".part"))
+        with zipfile.ZipFile(self.epub) as z:
+            self.assertEqual(["mimetype", "text/changed.xhtml", "text/kept.xhtml"], z.namelist())
+            self.assertEqual(b"new", z.read("text/changed.xhtml"))
+            self.assertEqual(b"from the previous build", z.read("text/kept.xhtml"))
+            self.assertEqual(zipfile.ZIP_STORED, z.getinfo("mimetype").compress_type)
+
+    def test_async_sink(self):
+        sink = AsyncSink(DirectorySink(self.test_dir), threads=3, queueSize=4)
+        self.assertEqual(3, len(sink.threads))
+        for i in range(50):
+            sink.write("text/song_{}.xhtml".format(i), str(i).encode())
+        # The last write of a file wins
+        sink.write("text/song_0.xhtml", b"rewritten")
+        self.assertTrue(sink.exists("text/song_49.xhtml"))
+        sink.flush()
+        self.assertEqual(50, len(os.listdir(os.path.join(self.test_dir, "text"))))
+        self.assertEqual(b"rewritten", sink.read("text/song_0.xhtml"))
+        self.assertEqual(b"49", sink.read("text/song_49.xhtml"))
+
+        # A directory is in the way of a file. The error is raised when the sink is closed
+        os.makedirs(os.path.join(self.test_dir, "text", "blocked.xhtml"))
+        sink.write("text/blocked.xhtml", b"abc")
+        sink.write("text/other.xhtml", b"abc")
+        sink.flush()
+        self.assertTrue(os.path.isfile(os.path.join(self.test_dir, "text", "other.xhtml")))
+        with self.assertLogs(level="ERROR") as logs:
+            self.assertRaises(OSError, sink.close)
+        self.assertEqual(1, len(logs.output))
+        self.assertIn("Could not write text/blocked.xhtml", logs.output[0])
+        self.assertRaises(RuntimeError, sink.write, "text/late.xhtml", b"abc")
+
+    def test_async_sink_zip(self):
+        # The zip container is not thread safe. One writer keeps the order of the files
+        sink = AsyncSink(TeeSink(MemorySink(), ZipSink(self.epub, 9)), threads=4)
+        self.assertEqual(1, len(sink.threads))
+        sink.write("mimetype", b"application/epub+zip")
+        for i in range(20):
+            sink.write("text/song_{}.xhtml".format(i), b"abc")
+        sink.close()
+        with zipfile.ZipFile(self.epub) as z:
+            self.assertEqual(["mimetype"] + ["text/song_{}.xhtml".format(i) for i in range(20)], z.namelist())
+
+
+if __name__ == '__main__':
+    unittest.main()
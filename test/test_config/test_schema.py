@@ -13,7 +13,7 @@ import unittest
 
 
 from src.config import epubsongbookconfig
-from src.tixi import Tixi, TixiException, ReturnCode
+from src.xml_backend import Tixi, TixiException, ReturnCode
 
 
 class TestSchema(unittest.TestCase):
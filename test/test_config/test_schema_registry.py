@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18.10.2026 16:45
+ 
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-18'
+
+import json
+import os
+import shutil
+import unittest
+
+from src.config import SchemaRegistry, epubsongbookconfig
+
+
+class TestSchemaRegistry(unittest.TestCase):
+    def setUp(self):
+        config_dir = os.path.dirname(os.path.abspath(epubsongbookconfig.__file__))
+        self.test_dir = os.path.join(os.path.abspath(os.path.dirname(__file__)), "test_dir")
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+        os.makedirs(self.test_dir)
+        # Work on copies, so that the snapshot is not written next to the real schemas
+        self.source_xsd = shutil.copy(os.path.join(config_dir, "source_schema.xsd"), self.test_dir)
+        self.song_xsd = shutil.copy(os.path.join(config_dir, "song_schema.xsd"), self.test_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+        SchemaRegistry._registries.pop((self.source_xsd, self.song_xsd), None)
+        SchemaRegistry.useSnapshots = False
+
+    def test_get(self):
+        registry = SchemaRegistry.get(self.source_xsd, self.song_xsd)
+        self.assertIs(registry, SchemaRegistry.get(self.source_xsd, self.song_xsd))
+        self.assertIs(SchemaRegistry.get(), SchemaRegistry.get())
+        self.assertFalse(os.path.isfile(registry.snapshot))
+
+    def test_parse(self):
+        registry = SchemaRegistry.get(self.source_xsd, self.song_xsd)
+
+        self.assertEqual({"include": "true", "lyrics": "trad.", "music": "trad."}, registry.songDefaults)
+        self.assertEqual("required", registry.songAttributes["title"]["use"])
+        self.assertEqual(["CHORDS_ABOVE", "CHORDS_BESIDE", "NO_CHORDS"], registry.enumerations["chord_mode"])
+
+        self.assertEqual("max_songs", list(registry.settings.keys())[0])
+        self.assertEqual({"type": "chord_mode", "default": "CHORDS_BESIDE"}, registry.settings["prefered_chord_mode"])
+        self.assertEqual("string", registry.settings["title"]["type"])
+        self.assertIsNone(registry.settings["username"]["default"])
+
+    def test_snapshot(self):
+        SchemaRegistry.useSnapshots = True
+        registry = SchemaRegistry.get(self.source_xsd, self.song_xsd)
+        self.assertTrue(os.path.isfile(registry.snapshot))
+
+        loaded = SchemaRegistry(self.source_xsd, self.song_xsd)
+        self.assertTrue(loaded.loadSnapshot())
+        self.assertEqual(registry.settings, loaded.settings)
+        self.assertEqual(registry.songAttributes, loaded.songAttributes)
+        self.assertEqual(registry.enumerations, loaded.enumerations)
+
+        # A changed schema invalidates the snapshot
+        with open(self.song_xsd, "a", encoding="utf8") as f:
+            f.write("\n")
+        self.assertFalse(SchemaRegistry(self.source_xsd, self.song_xsd).loadSnapshot())
+
+        # So does a broken snapshot
+        with open(registry.snapshot, "w", encoding="utf8") as f:
+            f.write("{")
+        self.assertFalse(SchemaRegistry(self.source_xsd, self.song_xsd).loadSnapshot())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19.10.2026 17:10
+ 
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-19'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.tools.author_names import AuthorNames
+from src.tools.song_catalog import SongRecord
+
+ALIASES = """<?xml version="1.0" encoding="utf-8"?>
+<authors>
+    <author name="John Doe">
+        <alias>J. Doe</alias>
+        <alias>Johnny Doe</alias>
+    </author>
+    <author name="The Developers">
+        <alias>Developers</alias>
+    </author>
+</authors>
+"""
+
+
+class TestAuthorNames(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.aliasFile = os.path.join(self.dir, "aliases.xml")
+        with open(self.aliasFile, "w", encoding="utf8") as f:
+            f.write(ALIASES)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_read(self):
+        self.assertEqual({"J. Doe": "John Doe", "Johnny Doe": "John Doe", "Developers": "The Developers"},
+                         AuthorNames.read(self.aliasFile))
+
+    def test_get(self):
+        names = AuthorNames.get(self.aliasFile)
+        self.assertIs(names, AuthorNames.get(os.path.join(self.dir, ".", "aliases.xml")))
+        self.assertIs(AuthorNames.get(), AuthorNames.get(None))
+        self.assertIsNot(names, AuthorNames.get())
+
+        # Changed alias file is read again
+        with open(self.aliasFile, "w", encoding="utf8") as f:
+            f.write(ALIASES.replace("Johnny Doe", "Johnny B. Doe"))
+        self.assertIsNot(names, AuthorNames.get(self.aliasFile))
+        self.assertEqual("John Doe", AuthorNames.get(self.aliasFile).canonical("Johnny B. Doe"))
+
+    def test_canonical(self):
+        names = AuthorNames(AuthorNames.read(self.aliasFile))
+        for variant in ["J. Doe", "J.Doe", "j. doe", "Doe, J.", "John Doe", "Doe, John", "Johnny Doe"]:
+            self.assertEqual("John Doe", names.canonical(variant), variant)
+            self.assertEqual("Doe, John", names.indexName(variant), variant)
+        self.assertEqual("Mike Moo", names.canonical("Mike Moo"))
+        self.assertEqual("Moo, Mike", names.indexName("Mike Moo"))
+        self.assertEqual("The Developers", names.indexName("Developers", isBand=True))
+        self.assertEqual("Led Zeppelin", names.indexName("Led Zeppelin", isBand=True))
+
+    def test_split(self):
+        names = AuthorNames(AuthorNames.read(self.aliasFile))
+        self.assertEqual([("J. Doe", "John Doe"), ("Mike Moo", "Mike Moo"), ("John Doe", "John Doe")],
+                         names.split(" J. Doe; Mike Moo ;John Doe;J. Doe"))
+        self.assertIs(names.split("J. Doe; Mike Moo"), names.split("J. Doe; Mike Moo"))
+        self.assertEqual([("Doe; Moo", "Doe; Moo")], names.split("Doe; Moo", isBand=True))
+        self.assertEqual([], names.split(None))
+
+    def test_songsByAuthor(self):
+        names = AuthorNames(AuthorNames.read(self.aliasFile))
+        songs = [SongRecord("/a", {"title": "A", "xhtml": "a.xhtml", "lyrics": "J. Doe", "music": "Mike Moo"}),
+                 SongRecord("/b", {"title": "B", "xhtml": "b.xhtml", "lyrics": "Doe, John; Mike Moo",
+                                   "band": "Developers"}),
+                 SongRecord("/c", {"title": "C", "xhtml": "c.xhtml", "music": "Johnny Doe"})]
+        standardized = dict()
+        self.assertEqual({"Doe, John": {"A": "a.xhtml", "B": "b.xhtml", "C": "c.xhtml"},
+                          "Moo, Mike": {"A": "a.xhtml", "B": "b.xhtml"},
+                          "The Developers": {"B": "b.xhtml"}},
+                         names.songsByAuthor(songs, standardized))
+        self.assertEqual({"J. Doe": "Doe, John", "Doe, John": "Doe, John", "Johnny Doe": "Doe, John",
+                          "Mike Moo": "Moo, Mike", "Developers": "The Developers"}, standardized)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18.10.2026 21:30
+ 
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-18'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmark.compare import compareResults
+from benchmark.corpus import generateCorpus
+from benchmark.run import PHASES, runBenchmark
+
+
+class TestBenchmark(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_generateCorpus(self):
+        master = generateCorpus(self.dir, 60)
+        with open(master, "r", encoding="utf8") as f:
+            content = f.read()
+        other = os.path.join(self.dir, "other")
+        with open(generateCorpus(other, 60), "r", encoding="utf8") as f:
+            self.assertEqual(content, f.read())
+        self.assertTrue(os.listdir(os.path.join(self.dir, "songs")))
+        self.assertTrue(os.path.isfile(os.path.join(self.dir, "html", "attachment_1.xhtml")))
+
+    def test_runBenchmark(self):
+        result = runBenchmark(40, self.dir)
+        self.assertEqual(40, result["songs"])
+        self.assertEqual(PHASES, list(result["phases"].keys()))
+        self.assertAlmostEqual(sum(result["phases"].values()), result["total"], places=3)
+        self.assertTrue(os.path.isfile(os.path.join(self.dir, "output", "toc.ncx")))
+
+        lines = compareResults({"runs": [result]}, {"runs": [result]})
+        self.assertEqual(len(PHASES) + 2, len([line for line in lines if "RSS" not in line]))
+
+
+if __name__ == '__main__':
+    unittest.main()
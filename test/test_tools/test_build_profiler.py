@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18.10.2026 22:10
+ 
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-18'
+
+import json
+import os
+import shutil
+import tempfile
+import tracemalloc
+import unittest
+
+from src.tools.build_profiler import BuildProfiler
+
+
+class TestBuildProfiler(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_phases(self):
+        profiler = BuildProfiler(cprofileDir=os.path.join(self.dir, "prof"))
+        with profiler.phase("outer"):
+            with profiler.phase("inner"):
+                data = [0] * 100000
+            del data
+            with profiler.song("song.xhtml"):
+                pass
+        with profiler.phase("second"):
+            pass
+        profiler.addSong("other.xhtml", 2.0, 1.0)
+        profiler.stop()
+
+        report = profiler.report()
+        self.assertEqual(["outer", "second"], [phase["name"] for phase in report["phases"]])
+        outer = report["phases"][0]
+        self.assertEqual(["inner"], [phase["name"] for phase in outer["children"]])
+        inner = outer["children"][0]
+        # The peak of the sub-step is included in the peak of the phase
+        self.assertGreater(inner["peak_bytes"], 100000 * 8)
+        self.assertGreaterEqual(outer["peak_bytes"], inner["peak_bytes"])
+        self.assertGreaterEqual(outer["wall"], inner["wall"])
+        self.assertNotIn("children", report["phases"][1])
+
+        # Songs are sorted from the slowest one
+        self.assertEqual(["other.xhtml", "song.xhtml"], [song["name"] for song in report["songs"]])
+        self.assertIsNone(report["songs"][0]["peak_bytes"])
+        self.assertEqual(2, report["songs_total"]["count"])
+        self.assertEqual(["other.xhtml"], [song["name"] for song in profiler.report(slowest=1)["songs"]])
+
+        # cProfile only for the top level phases
+        self.assertEqual(["outer.prof", "second.prof"], sorted(os.listdir(os.path.join(self.dir, "prof"))))
+
+        fileName = os.path.join(self.dir, "report.json")
+        profiler.save(fileName)
+        with open(fileName, "r", encoding="utf8") as f:
+            self.assertEqual(report, json.load(f))
+
+    def test_without_reset_peak(self):
+        # tracemalloc.reset_peak is only available since Python 3.9
+        resetPeak = getattr(tracemalloc, "reset_peak", None)
+        if resetPeak is not None:
+            del tracemalloc.reset_peak
+        try:
+            profiler = BuildProfiler()
+            with profiler.phase("outer"):
+                with profiler.phase("inner"):
+                    data = [0] * 100000
+                del data
+            profiler.stop()
+        finally:
+            if resetPeak is not None:
+                tracemalloc.reset_peak = resetPeak
+
+        outer = profiler.report()["phases"][0]
+        inner = outer["children"][0]
+        self.assertGreater(inner["peak_bytes"], 100000 * 8)
+        self.assertGreaterEqual(outer["peak_bytes"], inner["peak_bytes"])
+
+    def test_disabled(self):
+        profiler = BuildProfiler(enabled=False)
+        with profiler.phase("phase"):
+            with profiler.song("song.xhtml"):
+                pass
+        profiler.addSong("other.xhtml", 1.0, 1.0)
+        self.assertEqual({"phases": [], "songs": [], "songs_total": {"count": 0, "wall": 0, "cpu": 0}},
+                         profiler.report())
+
+
+if __name__ == '__main__':
+    unittest.main()
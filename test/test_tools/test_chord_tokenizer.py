@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19.10.2026 09:40 
+ 
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-19'
+
+import unittest
+
+from src.tools.chord_tokenizer import ChordTokenizer, ChordLine
+
+
+class TestChordTokenizer(unittest.TestCase):
+    def setUp(self):
+        self.tokenizer = ChordTokenizer(">", "|")
+
+    def test_tokenize_without_chords(self):
+        part = self.tokenizer.tokenize("\n".join(["Line 1",
+                                                  "  Line 2",
+                                                  "Line 3",
+                                                  "Line 4"]))
+        self.assertFalse(part.hasChords)
+        self.assertEqual(["Line 1", "Line 2", "Line 3", "Line 4"], [line.text for line in part.lines])
+        # Neighboring lines without chords are merged
+        self.assertEqual([part.lines], part.blocks)
+
+    def test_tokenize(self):
+        part = self.tokenizer.tokenize("\n".join(["  |Line |1 > F E  ",
+                                                  "Line 2>a",
+                                                  "Line 3 ",
+                                                  "Line 4"]))
+        self.assertTrue(part.hasChords)
+        expected = [ChordLine("|Line |1", "Line 1 ", ("", "Line ", "1"), ("F", "E")),
+                    ChordLine("Line 2", "Line 2", ("Line 2",), ("a",)),
+                    ChordLine("Line 3", "Line 3", ("Line 3",), None),
+                    ChordLine("Line 4", "Line 4", ("Line 4",), None)]
+        self.assertEqual(expected, part.lines)
+        self.assertEqual([expected[0], expected[1], expected[2:]], part.blocks)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19.10.2026 16:05
+ 
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-19'
+
+import unittest
+
+from src.tools.collation import Collation
+
+
+class TestCollation(unittest.TestCase):
+    def test_get(self):
+        self.assertIs(Collation.get("pl"), Collation.get("pl-PL"))
+        self.assertIsNot(Collation.get("pl"), Collation.get("de"))
+        self.assertEqual(Collation.LATIN, Collation.get(None).alphabet)
+
+    def test_sorted_pl(self):
+        collation = Collation.get("pl")
+        titles = ["Żurawie", "Zima", "Łza", "Lato", "Mama", "Ćma", "czas", "Cicha noc", "Śpij", "Sen", "Óda", "Ogień",
+                  "10 lat", "A to ci", "Aaa", "(Nie) wiem", "niebo", "Źródło"]
+        self.assertEqual(["10 lat", "A to ci", "Aaa", "Cicha noc", "czas", "Ćma", "Lato", "Łza", "Mama", "(Nie) wiem",
+                          "niebo", "Ogień", "Óda", "Sen", "Śpij", "Zima", "Źródło", "Żurawie"],
+                         collation.sorted(titles))
+        self.assertEqual(["1", "A", "A", "C", "C", "Ć", "L", "Ł", "M", "N", "N", "O", "Ó", "S", "Ś", "Z", "Ź", "Ż"],
+                         [collation.heading(t) for t in collation.sorted(titles)])
+        self.assertEqual("?", collation.heading("?!"))
+
+    def test_sorted_de(self):
+        collation = Collation.get("de")
+        titles = ["Zug", "Über den Wolken", "Uhr", "Ärger", "Apfel", "Straße", "Strand"]
+        self.assertEqual(["Apfel", "Ärger", "Strand", "Straße", "Über den Wolken", "Uhr", "Zug"],
+                         collation.sorted(titles))
+        self.assertEqual(["A", "A", "S", "S", "U", "U", "Z"], [collation.heading(t) for t in collation.sorted(titles)])
+
+    def test_key_cached(self):
+        collation = Collation("en")
+        key = collation.key("Yesterday")
+        self.assertIs(key, collation.key("Yesterday"))
+        self.assertEqual(["Yesterday"], list(collation._keys.keys()))
+
+
+if __name__ == '__main__':
+    unittest.main()
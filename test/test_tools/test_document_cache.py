@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18.10.2026 15:45
+ 
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-18'
+
+import os
+import shutil
+import unittest
+
+import src.xml_backend
+from src.config import EpubSongbookConfig
+from src.xml_backend import Tixi, TixiException
+from src.tools.document_cache import DocumentCache
+
+
+class TestDocumentCache(unittest.TestCase):
+    def setUp(self):
+        self.references = os.path.join(os.path.abspath(os.path.dirname(__file__)), "resources")
+        self.test_song = os.path.join(self.references, "test_song.xml")
+        self.test_song_copy = os.path.join(self.references, "test_song_copy.xml")
+        shutil.copy(self.test_song, self.test_song_copy)
+        cfgTixi = Tixi()
+        cfgTixi.create("songbook")
+        self.xsd_song = EpubSongbookConfig(cfgTixi).xsd_song
+
+    def tearDown(self):
+        if os.path.isfile(self.test_song_copy):
+            os.remove(self.test_song_copy)
+
+    def test_get(self):
+        cache = DocumentCache()
+        document = cache.get(self.test_song)
+        self.assertIs(document, cache.get(os.path.join(self.references, "..", "resources", "test_song.xml")))
+        self.assertEqual({"hits": 1, "misses": 1, "evictions": 0, "documents": 1,
+                          "size": os.path.getsize(self.test_song)}, cache.stats())
+
+        self.assertEqual("My Test Song", document.attribute("title"))
+        self.assertNotIn("include", document.attributes)
+        with self.assertRaises(TixiException):
+            document.attribute("nonexistent")
+
+        # Validation adds the default attributes, but does not change the raw snapshot
+        tixi = document.validated(self.xsd_song)
+        self.assertIs(tixi, document.validated(self.xsd_song))
+        self.assertEqual("true", tixi.getTextAttribute("/song", "include"))
+        self.assertNotIn("include", document.attributes)
+
+    def test_modified_file(self):
+        cache = DocumentCache()
+        document = cache.get(self.test_song_copy)
+        tixi = Tixi()
+        tixi.open(self.test_song_copy)
+        tixi.addTextAttribute("/song", "title", "Changed title")
+        tixi.saveDocument(self.test_song_copy)
+        stat = os.stat(self.test_song_copy)
+        os.utime(self.test_song_copy, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        changed = cache.get(self.test_song_copy)
+        self.assertIsNot(document, changed)
+        self.assertEqual("Changed title", changed.attribute("title"))
+        self.assertEqual(2, cache.stats()["misses"])
+        self.assertEqual(1, cache.stats()["documents"])
+
+    def test_preload(self):
+        invalid = os.path.join(self.references, "test_song_invalid.xml")
+        with open(invalid, "w", encoding="utf8") as f:
+            f.write("This is not a song")
+        backend = src.xml_backend.BACKEND
+        try:
+            for name in ["tixi", "lxml"]:
+                src.xml_backend.BACKEND = name
+                # The TiXI documents are not parsed on several threads
+                self.assertEqual(name == "lxml", DocumentCache.threadSafe())
+                cache = DocumentCache()
+                errors = cache.preload([self.test_song, self.test_song_copy, invalid], self.xsd_song, jobs=2)
+                self.assertEqual([os.path.abspath(invalid)], list(errors.keys()))
+                self.assertEqual(2, cache.stats()["documents"])
+        finally:
+            src.xml_backend.BACKEND = backend
+            os.remove(invalid)
+
+    def test_eviction(self):
+        cache = DocumentCache(maxSize=os.path.getsize(self.test_song) + 1)
+        cache.get(self.test_song)
+        cache.get(self.test_song_copy)
+        self.assertEqual(1, cache.stats()["evictions"])
+        self.assertEqual([os.path.abspath(self.test_song_copy)], list(cache.documents.keys()))
+        cache.get(self.test_song)
+        self.assertEqual({"hits": 0, "misses": 3, "evictions": 2, "documents": 1,
+                          "size": os.path.getsize(self.test_song)}, cache.stats())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19.10.2026 10:40 
+ 
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-19'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.config import epubsongbookconfig
+from src.tools.build_profiler import BuildProfiler
+from src.tools.edition_builder import EditionBuilder
+from src.tools.song_book_generator import SongBookGenerator
+
+MASTER = """<?xml version="1.0" encoding="utf-8"?>
+<songbook>
+    <settings>
+        <title>Full Songbook</title>
+        <output_dir>full</output_dir>
+        <prefered_chord_mode>CHORDS_ABOVE</prefered_chord_mode>
+    </settings>
+    <editions>
+        <edition name="full"/>
+        <edition name="lyrics">
+            <title>Lyrics Only</title>
+            <output_dir>lyrics</output_dir>
+            <prefered_chord_mode>NO_CHORDS</prefered_chord_mode>
+        </edition>
+        <edition name="short">
+            <output_dir>short</output_dir>
+            <max_songs>1</max_songs>
+        </edition>
+    </editions>
+    <section title="Section 1">
+        <song title="Inline Song" lyrics="John Doe">
+            <verse>
+                La |la la | C G
+            </verse>
+        </song>
+        <song title="Separate Song" src="song.xml"/>
+    </section>
+</songbook>
+"""
+
+SONG = """<?xml version="1.0" encoding="utf-8"?>
+<song title="Separate Song" lyrics="Mike Moo">
+    <verse>
+        Some \\text | a d
+    </verse>
+</song>
+"""
+
+
+class TestEditionBuilder(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.master = os.path.join(self.dir, "songbook.xml")
+        self.xsd = os.path.join(os.path.dirname(os.path.abspath(epubsongbookconfig.__file__)), "source_schema.xsd")
+        with open(self.master, "w", encoding="utf8") as f:
+            f.write(MASTER)
+        with open(os.path.join(self.dir, "song.xml"), "w", encoding="utf8") as f:
+            f.write(SONG)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def read(self, *path):
+        with open(os.path.join(self.dir, *path), encoding="utf8") as f:
+            return f.read()
+
+    def test_build(self):
+        builder = EditionBuilder(self.master, self.xsd, epub=os.path.join(self.dir, "songbook.epub"))
+        self.assertEqual(["full", "lyrics", "short"], builder.editions)
+        with self.assertLogs(level="INFO") as logs:
+            builder.build()
+        self.assertIn("INFO:root:Building edition lyrics", logs.output)
+
+        # The song source file has been parsed once for all editions
+        self.assertEqual(1, builder.documents.stats()["misses"])
+
+        self.assertIn("chords_above", self.read("full", "text", "sng_inline_song.xhtml"))
+        self.assertIn("<dc:title>Full Songbook</dc:title>", self.read("full", "metadata.opf"))
+        self.assertNotIn("chords", self.read("lyrics", "text", "sng_separate_song.xhtml"))
+        self.assertIn("<dc:title>Lyrics Only</dc:title>", self.read("lyrics", "metadata.opf"))
+        self.assertTrue(os.path.isfile(os.path.join(self.dir, "short", "text", "sng_inline_song.xhtml")))
+        self.assertFalse(os.path.isfile(os.path.join(self.dir, "short", "text", "sng_separate_song.xhtml")))
+        for edition in builder.editions:
+            self.assertTrue(os.path.isfile(os.path.join(self.dir, "songbook_{}.epub".format(edition))))
+
+        # The same output is written by a separate build of an edition
+        short = self.read("short", "text", "sng_inline_song.xhtml")
+        EditionBuilder(self.master, self.xsd, editions=["short"]).build()
+        self.assertEqual(short, self.read("short", "text", "sng_inline_song.xhtml"))
+
+    def test_preprocess_sources_once(self):
+        profiler = BuildProfiler()
+        EditionBuilder(self.master, self.xsd, profiler=profiler).build()
+        profiler.stop()
+
+        def names(phases):
+            result = []
+            for phase in phases:
+                result.append(phase["name"])
+                result.extend(names(phase.get("children", [])))
+            return result
+
+        phases = profiler.report()["phases"]
+        self.assertEqual(1, names(phases).count("pullAttributesFromSRCs"))
+        self.assertEqual(1, names(phases).count("exposeLinks"))
+        # Twice while preprocessing the sources (before and after pulling the attributes), then the limits of the number
+        # of songs for each edition
+        self.assertEqual(5, names(phases).count("removeIgnoredContent"))
+        construct = [phase for phase in phases if phase["name"] == "short.construct"][0]
+        self.assertNotIn("pullAttributesFromSRCs", names([construct]))
+
+    def test_excluded_in_source(self):
+        with open(self.master, "w", encoding="utf8") as f:
+            f.write(MASTER.replace('<song title="Inline Song"',
+                                   '<song title="Excluded Song" src="excluded.xml"/>\n        <song title="Inline Song"'))
+        with open(os.path.join(self.dir, "excluded.xml"), "w", encoding="utf8") as f:
+            f.write(SONG.replace('title="Separate Song"', 'title="Excluded Song" include="false"'))
+
+        EditionBuilder(self.master, self.xsd, editions=["full", "short"]).build()
+        sg = SongBookGenerator(self.master, self.xsd, edition="lyrics", dryRun=True)
+        self.assertEqual([], sg.tixi.xPathExpressionGetAllXPaths("//song[@title='Excluded Song']"))
+        for edition in ["full", "short"]:
+            self.assertFalse(os.path.isfile(os.path.join(self.dir, edition, "text", "sng_excluded_song.xhtml")))
+        self.assertTrue(os.path.isfile(os.path.join(self.dir, "full", "text", "sng_separate_song.xhtml")))
+
+        # An edition applies the limits to the already preprocessed master, so the excluded song is not counted...
+        self.assertTrue(os.path.isfile(os.path.join(self.dir, "short", "text", "sng_inline_song.xhtml")))
+        # ... while a plain build applies them before reading the song source files
+        sg = SongBookGenerator(self.master, self.xsd, edition="short", dryRun=True)
+        self.assertEqual([], sg.tixi.xPathExpressionGetAllXPaths("//song"))
+
+    def test_errors(self):
+        self.assertRaises(ValueError, EditionBuilder, self.master, editions=["missing"])
+        with open(self.master, "w", encoding="utf8") as f:
+            f.write(MASTER.replace("<output_dir>short</output_dir>", ""))
+        self.assertRaises(ValueError, EditionBuilder, self.master)
+        # The editions with the same output directory can be built separately
+        EditionBuilder(self.master, editions=["short", "lyrics"])
+
+
+if __name__ == '__main__':
+    unittest.main()
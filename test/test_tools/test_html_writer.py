@@ -12,7 +12,7 @@ import os
 import unittest
 
 from src.config import EpubSongbookConfig
-from src.tixi import Tixi
+from src.xml_backend import Tixi
 from src.tools.html_writer import HtmlWriter
 
 
@@ -98,6 +98,29 @@ class TestHtmlWriter(unittest.TestCase):
 
         self.assertEqual(html_after, expected.strip())
 
+    def test_saveFile_stream(self):
+        # The same content, built with the stream serializer, must give exactly the same file
+        files = []
+        for serializer in ["tixi", "stream"]:
+            self.settings.serializer = serializer
+            writer = HtmlWriter(self.tixi, self.settings)
+            path = writer.tixi.createElement("/html", "body")
+            writer.tixi.addTextElement(path, "p", "some text<br/>and a new line&nbsp; <b> \"ąę\"")
+            pPath = writer.tixi.addTextElement(path, "p", "")
+            writer.tixi.addTextAttribute(pPath, "title", "a \"quote\" &amp; ó")
+            path = writer.tixi.createElement(path, "table")
+            for i in range(2):
+                trPath = writer.tixi.createElement(path, "tr")
+                writer.tixi.addTextElement(trPath, "td", "blah")
+                writer.tixi.addTextElement(trPath, "td", " <br/> ")
+                writer.tixi.createElement(trPath, "td")
+                writer.tixi.createElement(trPath, "td")
+            writer.saveFile(self.test_output)
+            with open(self.test_output, "rb") as f:
+                files.append(f.read())
+        self.assertIn(b"<tr><td>blah</td><td> <br/></td><td/><td/></tr>", files[0])
+        self.assertEqual(files[0], files[1])
+
 
 if __name__ == '__main__':
     unittest.main()
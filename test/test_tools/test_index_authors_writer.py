@@ -12,7 +12,7 @@ import os
 import unittest
 
 from src.config import EpubSongbookConfig
-from src.tixi import Tixi
+from src.xml_backend import Tixi
 from src.tools.index_authors_writer import AuthorsWriter
 
 
@@ -92,6 +92,18 @@ class TestAuthorsWriter(unittest.TestCase):
         self.assertEqual(tixi.exportDocumentAsString(),
                          self.writer.tixi.exportDocumentAsString())
 
+    def test_write_index_pl(self):
+        tixi = self.writer.src_tixi
+        tixi.addTextAttribute("/songbook/section[1]/section[1]/song[2]", "lyrics", "Łukasz Świerk; Zenon Ździebło")
+        self.settings.lang = "pl"
+        writer = AuthorsWriter(tixi, self.settings)
+        writer.write_index()
+
+        texts = lambda xPath: [writer.tixi.getTextElement(p) for p in writer.tixi.xPathExpressionGetAllXPaths(xPath)]
+        self.assertEqual(["C", "D", "M", "Ś", "T", "Ź"], texts("//h3"))
+        self.assertEqual(["Composer, Sam", "Doe, John", "Moo, Mike", "Świerk, Łukasz", "The Developers",
+                          "Ździebło, Zenon"], texts("//h4"))
+
 
 if __name__ == '__main__':
     unittest.main()
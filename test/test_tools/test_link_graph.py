@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18.10.2026 19:00
+ 
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-18'
+
+import unittest
+
+from src.xml_backend import Tixi
+from src.tools.link_graph import LinkGraph
+
+
+class TestLinkGraph(unittest.TestCase):
+    def setUp(self):
+        self.tixi = Tixi()
+        self.tixi.openString("""<?xml version="1.0"?>
+        <songbook>
+            <song title="A"><link title="B"/></song>
+            <song title="B"/>
+            <song title="A"/>
+            <song title="C"><link title="X"/><link title="D"/><link title="Y"/></song>
+            <song title="D"/>
+            <song title="E"/>
+        </songbook>""")
+
+    def links(self, path):
+        return [self.tixi.getTextAttribute(p, "title") for p in
+                self.tixi.xPathExpressionGetAllXPaths(path + "/link")]
+
+    def test_apply(self):
+        graph = LinkGraph(self.tixi)
+        self.assertEqual([("/songbook/song[2]", "A"),
+                          ("/songbook/song[5]", "C"),
+                          ("/songbook/song[3]", "B")], graph.toCreate)
+        self.assertEqual(["/songbook/song[4]/link[1]", "/songbook/song[4]/link[3]"], graph.toRemove)
+        self.assertEqual({"songs": 6, "links": 4, "created": 3, "dangling": 2, "components": 2}, graph.stats())
+
+        graph.apply()
+        self.assertEqual(["B"], self.links("/songbook/song[1]"))
+        self.assertEqual(["A"], self.links("/songbook/song[2]"))
+        self.assertEqual(["B"], self.links("/songbook/song[3]"))
+        self.assertEqual(["D"], self.links("/songbook/song[4]"))
+        self.assertEqual(["C"], self.links("/songbook/song[5]"))
+        self.assertEqual([], self.links("/songbook/song[6]"))
+
+        # Nothing more to do
+        self.assertEqual({"songs": 6, "links": 5, "created": 0, "dangling": 0, "components": 2},
+                         LinkGraph(self.tixi).stats())
+
+
+if __name__ == '__main__':
+    unittest.main()
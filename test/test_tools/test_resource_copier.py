@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18.10.2026 23:50
+ 
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-18'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.config import DirectorySink, MemorySink
+from src.tools.resource_copier import ResourceCopier
+
+
+class TestResourceCopier(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.sources = []
+        for i in range(5):
+            source = os.path.join(self.dir, "res_{}.png".format(i))
+            with open(source, "wb") as f:
+                f.write(bytes([i]) * 100)
+            self.sources.append(source)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_flush(self):
+        sink = DirectorySink(os.path.join(self.dir, "out"))
+        copier = ResourceCopier(sink, jobs=3)
+        for i, source in enumerate(self.sources):
+            self.assertTrue(copier.add("text/res/{}.png".format(i), source))
+        # The same resource referenced from another document
+        self.assertFalse(copier.add("text/res/0.png", self.sources[0]))
+        with self.assertLogs() as cm:
+            self.assertFalse(copier.add("text/res/1.png", self.sources[2]))
+        self.assertEqual(["WARNING:root:{} and {} are both copied to text/res/1.png. Keeping the first one".format(
+            self.sources[1], self.sources[2])], cm.output)
+
+        self.assertTrue(copier.flush())
+        for i, source in enumerate(self.sources):
+            self.assertEqual(bytes([i]) * 100, sink.read("text/res/{}.png".format(i)))
+        self.assertEqual({}, copier.pending)
+        self.assertFalse(copier.add("text/res/0.png", self.sources[0]))
+
+        self.assertTrue(copier.add("text/res/missing.png", os.path.join(self.dir, "missing.png")))
+        with self.assertLogs() as cm:
+            self.assertFalse(copier.flush())
+        self.assertEqual(1, len(cm.output))
+        self.assertTrue(cm.output[0].startswith("ERROR:root:Could not copy "))
+
+    def test_flush_serial(self):
+        sink = MemorySink()
+        sink.threadSafe = False
+        copier = ResourceCopier(sink)
+        for i, source in enumerate(self.sources):
+            copier.add("{}.png".format(i), source)
+        self.assertTrue(copier.flush())
+        self.assertEqual(["0.png", "1.png", "2.png", "3.png", "4.png"], list(sink.files.keys()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19.10.2026 08:50
+ 
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-19'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.tools.resource_crawler import ResourceCrawler
+
+PAGE = """<?xml version="1.0"?>
+<html xmlns="http://www.w3.org/1999/xhtml">
+    <head>
+        <title>{}</title>
+        {}
+    </head>
+    <body>
+        {}
+    </body>
+</html>
+"""
+
+
+class TestResourceCrawler(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.dir, "sub"))
+        self.root = self.write("root.xhtml", PAGE.format(
+            "Root", '<link rel="stylesheet" type="text/css" href="style.css"/>',
+            '<img src="sub/pic.png"/><a href="sub/page.xhtml#part">Page</a><a href="#top">Top</a>'
+            '<a href="http://example.com">Out</a><a href="root.xhtml">Self</a>'))
+        self.write("sub/page.xhtml", PAGE.format(
+            "Page", '<link rel="stylesheet" type="text/css" href="../style.css"/>',
+            '<img src="pic.png"/><img src="missing.png"/><a href="../root.xhtml">Back</a>'))
+        self.write("style.css", "p {}")
+        self.write("sub/pic.png", "not really a picture")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def write(self, name, content):
+        file = os.path.join(self.dir, name)
+        with open(file, "w", encoding="utf8") as f:
+            f.write(content)
+        return file
+
+    def test_crawl(self):
+        crawler = ResourceCrawler()
+        with self.assertLogs() as cm:
+            self.assertFalse(crawler.crawl(self.root))
+        self.assertEqual(["ERROR:root:Resource file missing.png not found"], cm.output)
+
+        page = os.path.join(self.dir, "sub", "page.xhtml")
+        self.assertEqual([{"name": "style.css", "file": os.path.join(self.dir, "style.css"), "type": "stylesheet",
+                           "media-type": "text/css", "referrers": [self.root, page]},
+                          {"name": "sub/pic.png", "file": os.path.join(self.dir, "sub", "pic.png"), "type": "image",
+                           "media-type": "image/png", "referrers": [self.root, page]},
+                          {"name": "sub/page.xhtml", "file": page, "type": "page",
+                           "media-type": "application/xhtml+xml", "referrers": [self.root]},
+                          {"name": "root.xhtml", "file": self.root, "type": "page",
+                           "media-type": "application/xhtml+xml", "referrers": [page]}],
+                         crawler.manifest())
+        self.assertEqual({self.root, page}, set(crawler.pages.keys()))
+
+        # Already visited pages are not searched again for the documents in the same directory
+        with self.assertLogs() as cm:
+            crawler.crawl(self.write("other.xhtml", PAGE.format("Other", "", '<img src="missing.png"/>'
+                                                                             '<a href="root.xhtml">Root</a>')),
+                          all_required=False)
+        self.assertEqual(["WARNING:root:Resource file missing.png not found"], cm.output)
+
+        # A document in another directory refers to the same files with other names
+        with self.assertLogs() as cm:
+            self.assertTrue(crawler.crawl(page, all_required=False))
+        self.assertEqual(["WARNING:root:Resource file missing.png not found"], cm.output)
+        self.assertEqual(os.path.join(self.dir, "sub", "pic.png"), crawler.resources["pic.png"].file)
+        self.assertEqual(self.root, crawler.resources["../root.xhtml"].file)
+
+    def test_invalid_page(self):
+        self.write("sub/page.xhtml", "This is not a html document")
+        crawler = ResourceCrawler()
+        with self.assertLogs() as cm:
+            self.assertFalse(crawler.crawl(self.root))
+        self.assertEqual(['ERROR:root:- {} href="{}" - source is not a valid HTML file!'.format(
+            self.root, os.path.join(self.dir, "sub", "page.xhtml"))], cm.output)
+        self.assertEqual(["style.css", "sub/pic.png"], list(crawler.resources.keys()))
+
+        # The linked pages of an optional document are optional too
+        with self.assertLogs() as cm:
+            self.assertTrue(ResourceCrawler().crawl(self.root, all_required=False))
+        self.assertEqual(['WARNING:root:- {} href="{}" - source is not a valid HTML file!'.format(
+            self.root, os.path.join(self.dir, "sub", "page.xhtml"))], cm.output)
+
+    def test_same_name(self):
+        os.makedirs(os.path.join(self.dir, "other"))
+        self.write("other/pic.png", "another picture")
+        other = self.write("other/other.xhtml", PAGE.format("Other", "", '<img src="pic.png"/>'))
+        crawler = ResourceCrawler()
+        self.assertTrue(crawler.crawl(os.path.join(self.dir, "sub", "page.xhtml"), all_required=False))
+        with self.assertLogs() as cm:
+            self.assertFalse(crawler.crawl(other))
+        self.assertEqual(["ERROR:root:Resources {} and {} have the same name pic.png".format(
+            os.path.join(self.dir, "sub", "pic.png"), os.path.join(self.dir, "other", "pic.png"))], cm.output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,7 +9,7 @@ __authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
 __date__ = '2020-11-22'
 
 import unittest
-from src.tixi import Tixi
+from src.xml_backend import Tixi
 import os
 from src.tools import SectionWriter
 from src.tools.song_book_generator import SongBookGenerator
@@ -13,10 +13,11 @@ import os
 import shutil
 import sys
 import unittest
+import zipfile
 from collections import namedtuple
 
-from src.config import EpubSongbookConfig
-from src.tixi import Tixi
+from src.config import EpubSongbookConfig, MemorySink, AsyncSink
+from src.xml_backend import Tixi
 from src.tools.song_book_generator import SongBookGenerator
 
 Song = namedtuple("Song", ["file", "title", "xml"])
@@ -155,15 +156,11 @@ class TestSongBookGenerator(unittest.TestCase):
             with self.assertRaises(RuntimeError) as e:
                 self.sg._preprocess()
 
-        test_html_src = os.path.join(self.references, "test_html.xhtml")
-        test_html_trg = os.path.join(self.test_dir, "text", "htm_test_html.xhtml")
-        test_css_src = os.path.join(self.references, "songbook_text.css")
-        test_css_trg = os.path.join(self.test_dir, "text", "songbook_text.css")
         expected = ['INFO:root:Found 6 songs',
                     'INFO:root:Max song number set to 3. Ignoring '
                     '/songbook/section[1]/section[2]/song[2]',
                     'INFO:root:Max song number set to 3. Ignoring /songbook/section[2]/song[1]',
-                    'INFO:root:Max song number set to 3. Ignoring /songbook/section[2]/song',
+                    'INFO:root:Max song number set to 3. Ignoring /songbook/section[2]/song[4]',
                     'INFO:root:Ignoring empty section /songbook/section[3]',
                     'ERROR:root:This title will not match is defined in both master XML and a '
                     'source file (/songbook/section[1]/section[1]/song[1]/verse[1])',
@@ -173,7 +170,7 @@ class TestSongBookGenerator(unittest.TestCase):
                     'INFO:root:Max song number set to 3. Ignoring '
                     '/songbook/section[1]/section[2]/song[2]',
                     'INFO:root:Max song number set to 3. Ignoring /songbook/section[2]/song[1]',
-                    'INFO:root:Max song number set to 3. Ignoring /songbook/section[2]/song',
+                    'INFO:root:Max song number set to 3. Ignoring /songbook/section[2]/song[4]',
                     'INFO:root:Ignoring empty section /songbook/section[3]',
                     'ERROR:root:Ambiguous attribute values for '
                     "/songbook/section[1]/section[1]/song[1]/@title: 'My Test Song' vs 'This "
@@ -182,16 +179,8 @@ class TestSongBookGenerator(unittest.TestCase):
                     "/songbook/section[1]/section[1]/song[1]/@band: 'The Developers' vs 'Another "
                     "band'",
                     'ERROR:root:Source file ./non_existent_file not found '
-                    '(/songbook/section[1]/section[1]/song[2])',
-                    'INFO:root:Copying ' + \
-                    test_html_src + ' ' + \
-                    'to ' + \
-                    test_html_trg + '...',
-                    'INFO:root:OK.',
-                    'INFO:root:Copying ' + \
-                    test_css_src + \
-                    ' to ' + \
-                    test_css_trg
+                    '(/songbook/section[1]/section[1]/song[2])'
+                    # The html document and its stylesheet have already been copied by the first _preprocess
                     ]
         self.assertEqual(expected, cm.output)
 
@@ -220,6 +209,33 @@ class TestSongBookGenerator(unittest.TestCase):
 
         self.assertEqual(55 - (sum(titles_to_exclude.values()) + 1), self.sg.tixi.xPathEvaluateNodeNumber("//*"))
 
+    def test_removeIgnoredContent_preview(self):
+        sg = SongBookGenerator(self.test_song_src, preprocess=False, preview=2)
+        sg._removeIgnoredContent()
+        self.assertEqual(["My Test Song", "Song A"],
+                         [sg.tixi.getTextAttribute(p, "title") for p in
+                          sg.tixi.xPathExpressionGetAllXPaths("//song[@title]")])
+        # Section 1.2 has no songs left. Section 2 still has the html document
+        self.assertEqual(["Section 1", "Section 1.1", "Section 2"],
+                         [sg.tixi.getTextAttribute(p, "title")
+                          for p in sg.tixi.xPathExpressionGetAllXPaths("//section")])
+        self.assertEqual(2, sg.N)
+        self.assertFalse(sg.settings.copyResources)
+        self.assertFalse(sg.settings.writeIndexes)
+
+        sg = SongBookGenerator(self.test_song_src, preprocess=False, sample=1, previewIndexes=True)
+        with self.assertLogs() as cm:
+            sg._removeIgnoredContent()
+        self.assertEqual(["My Test Song", "Song B", "Song A"],
+                         [sg.tixi.getTextAttribute(p, "title") for p in
+                          sg.tixi.xPathExpressionGetAllXPaths("//song[@title]")])
+        self.assertEqual(['INFO:root:Found 6 songs',
+                          'INFO:root:Sampling 1 songs per section. Ignoring /songbook/section[1]/section[1]/song[3]',
+                          'INFO:root:Sampling 1 songs per section. Ignoring /songbook/section[1]/section[2]/song[2]',
+                          'INFO:root:Sampling 1 songs per section. Ignoring /songbook/section[2]/song[4]',
+                          'INFO:root:Ignoring empty section /songbook/section[3]'], cm.output)
+        self.assertTrue(sg.settings.writeIndexes)
+
     def test_findAmbiguousSongsContent(self):
 
         self.assertTrue(self.sg._findAmbiguousSongsContent())
@@ -353,6 +369,31 @@ class TestSongBookGenerator(unittest.TestCase):
         for file in expected_files:
             self.assertEqual(file[:3] == "sng", os.path.isfile(os.path.join(self.test_dir, "text", file)))
 
+        # The only song source file has been parsed once
+        self.assertEqual(1, self.sg.documents.stats()["misses"])
+        self.assertEqual(2, self.sg.documents.stats()["hits"])
+
+    def test_write_songs_parallel(self):
+        self.sg._preprocess()
+        with self.assertLogs() as cm:
+            self.sg.write_songs()
+        serialLogs = cm.output
+        serial = dict()
+        for file in [f for f in os.listdir(self.sg.settings.dir_text) if f.startswith("sng_")]:
+            with open(os.path.join(self.sg.settings.dir_text, file), encoding="utf8") as f:
+                serial[file] = f.read()
+            os.remove(os.path.join(self.sg.settings.dir_text, file))
+        self.assertTrue(serial)
+
+        with self.assertLogs() as cm:
+            self.sg.write_songs(jobs=2)
+        self.assertEqual(serialLogs, cm.output)
+        self.assertEqual(sorted(serial.keys()),
+                         sorted(f for f in os.listdir(self.sg.settings.dir_text) if f.startswith("sng_")))
+        for file, text in serial.items():
+            with open(os.path.join(self.sg.settings.dir_text, file), encoding="utf8") as f:
+                self.assertEqual(text, f.read(), file)
+
     def test_setHTMLtitle(self):
         # Prepare some files
         badfile = os.path.join(self.test_dir, "bad.html")
@@ -541,8 +582,8 @@ class TestSongBookGenerator(unittest.TestCase):
         opf_expected = os.path.join(self.references, "expected_opf.opf")
         opf_created = os.path.join(self.test_dir, "metadata.opf")
         self.assertTrue(os.path.isfile(opf_expected))
-        # Should have already copied the file from template by the initializer
-        self.assertTrue(os.path.isfile(opf_created))
+        # The initializer only prepares the content of the file. It is written once complete
+        self.assertFalse(os.path.isfile(opf_created))
 
         self.sg.write_metadata()
 
@@ -560,6 +601,190 @@ class TestSongBookGenerator(unittest.TestCase):
                          tixi_result.exportDocumentAsString())
         os.remove(opf_created)
 
+    def test_incremental(self):
+        def build(src):
+            sg = SongBookGenerator(src, incremental=True)
+            sg.write_songs()
+            sg.write_sections()
+            sg.write_indexes()
+            sg.write_toc()
+            sg.write_metadata()
+            sg.finish()
+            return sg
+
+        sg = build(self.test_song_src)
+        self.assertEqual(0, sg.manifest.skipped)
+        written = sg.manifest.rebuilt
+        self.assertTrue(os.path.isfile(os.path.join(self.test_dir, sg.manifest.FILE_NAME)))
+        song_file = os.path.join(self.test_dir, "text", "sng_my_test_song.xhtml")
+        with open(song_file, encoding="utf8") as f:
+            song_text = f.read()
+
+        # Nothing changed - nothing is written
+        sg = build(self.test_song_src)
+        self.assertEqual(0, sg.manifest.rebuilt)
+        self.assertEqual(written, sg.manifest.skipped)
+
+        # Change the separate song file. Only that song is written again
+        tixi = Tixi()
+        tixi.open(self.test_song)
+        tixi.addTextElement("/song", "verse", "One more verse")
+        tixi.saveDocument(self.test_song)
+        sg = build(self.test_song_src)
+        self.assertEqual(1, sg.manifest.rebuilt)
+        with open(song_file, encoding="utf8") as f:
+            self.assertNotEqual(song_text, f.read())
+
+        # Remove a song - its file is deleted, the files listing the songs are rewritten
+        tixi = Tixi()
+        tixi.open(self.test_song_src, recursive=True)
+        tixi.removeElement("/songbook/section[2]/song[@title='Song ABBA']")
+        tixi.saveCompleteDocument(self.test_src2)
+        sg = build(self.test_src2)
+        self.assertFalse(os.path.isfile(os.path.join(self.test_dir, "text", "sng_song_abba.xhtml")))
+        self.assertTrue(os.path.isfile(os.path.join(self.test_dir, "text", "sng_song_a_1.xhtml")))
+        self.assertIn("toc.ncx", sg.manifest.current)
+        self.assertNotIn("text/sng_song_abba.xhtml", sg.manifest.current)
+
+    def test_incremental_author_aliases(self):
+        aliases = os.path.join(self.references, "test_aliases.xml")
+        tixi = Tixi()
+        tixi.open(self.test_song_src, recursive=True)
+        tixi.addTextElement("/songbook/settings", "author_aliases", "test_aliases.xml")
+        tixi.saveCompleteDocument(self.test_src2)
+        index_file = os.path.join(self.test_dir, "text", "idx_authors.xhtml")
+
+        def build(alias):
+            with open(aliases, "w", encoding="utf8") as f:
+                f.write('<authors><author name="John Doe"><alias>{}</alias></author></authors>'.format(alias))
+            sg = SongBookGenerator(self.test_src2, incremental=True)
+            sg.write_songs()
+            sg.write_indexes()
+            sg.finish()
+            with open(index_file, encoding="utf8") as f:
+                return sg, f.read()
+
+        try:
+            sg, index = build("J. Doe")
+            self.assertIn("Moo, Mike", index)
+            sg, index = build("J. Doe")
+            self.assertEqual(0, sg.manifest.rebuilt)
+
+            # Only the content of the alias file changes
+            sg, index = build("Mike Moo")
+            self.assertNotIn("Moo, Mike", index)
+            self.assertIn("text/idx_authors.xhtml", sg.manifest.current)
+            self.assertEqual(0, sg.manifest.skipped)
+        finally:
+            os.remove(aliases)
+
+    def test_epub(self):
+        epub = os.path.abspath(os.path.join(self.test_dir, "..", "test_songbook.epub"))
+        sg = SongBookGenerator(self.test_song_src, epub=epub, epub_level=9)
+        sg.write_songs()
+        sg.write_sections()
+        sg.write_indexes()
+        sg.write_toc()
+        sg.write_metadata()
+        sg.finish()
+
+        with zipfile.ZipFile(epub) as z:
+            infos = z.infolist()
+            self.assertEqual("mimetype", infos[0].filename)
+            self.assertEqual(zipfile.ZIP_STORED, infos[0].compress_type)
+            self.assertEqual(b"application/epub+zip", z.read("mimetype"))
+            names = z.namelist()
+            self.assertEqual(len(names), len(set(names)))
+            for name in ["META-INF/container.xml", "metadata.opf", "toc.ncx", "songbook.css",
+                         "text/sng_song_abba.xhtml", "text/sec_section_1.xhtml", "text/idx_songs.xhtml",
+                         "text/htm_test_html.xhtml", "text/songbook_text.css"]:
+                self.assertIn(name, names)
+            # The packaged files are identical to the ones written to the output directory
+            for name in names[1:]:
+                with open(os.path.join(self.test_dir, name), "rb") as f:
+                    self.assertEqual(f.read(), z.read(name), name)
+        os.remove(epub)
+
+    def test_memory_sink(self):
+        sink = MemorySink()
+        sg = SongBookGenerator(self.test_song_src, sink=sink)
+        sg.write_songs()
+        sg.write_sections()
+        sg.write_indexes()
+        sg.write_toc()
+        sg.write_metadata()
+        sg.finish()
+
+        # Nothing has been written to the disk
+        self.assertFalse(os.path.isdir(self.test_dir))
+        for name in ["mimetype", "META-INF/container.xml", "metadata.opf", "toc.ncx", "songbook.css",
+                     "text/sng_song_abba.xhtml", "text/sec_section_1.xhtml", "text/idx_authors.xhtml",
+                     "text/htm_test_html.xhtml", "text/songbook_text.css"]:
+            self.assertIn(name, sink.files)
+        self.assertEqual(b"application/epub+zip", sink.files["mimetype"])
+        self.assertTrue(sink.files["text/sng_song_abba.xhtml"].startswith(b"<?xml version=\"1.0\" encoding='utf-8'?>"))
+
+    def test_serializer_stream(self):
+        files = []
+        for serializer in ["tixi", "stream"]:
+            sink = MemorySink()
+            sg = SongBookGenerator(self.test_song_src, sink=sink, serializer=serializer)
+            sg.write_songs()
+            sg.write_sections()
+            sg.write_indexes()
+            sg.finish()
+            files.append(sink.files)
+        self.assertIn("text/sng_song_abba.xhtml", files[1])
+        self.assertEqual(files[0].keys(), files[1].keys())
+        for name in files[0]:
+            self.assertEqual(files[0][name], files[1][name], name)
+
+    def test_quote_marks(self):
+        # The titles with quote marks are kept as they are in the tree, and escaped only when written
+        tixi = Tixi()
+        tixi.open(self.test_song_src)
+        quoted = "Say \"You'll never see me\""
+        for path in ["/songbook/section[3]/song[1]", "/songbook/section[3]/song[2]"]:
+            tixi.addTextAttribute(path, "include", "true")
+        tixi.addTextAttribute("/songbook/section[3]/song[1]", "title", quoted)
+        link = tixi.createElementAtIndex("/songbook/section[3]/song[2]", "link", 1)
+        tixi.addTextAttribute(link, "title", quoted)
+        tixi.saveDocument(self.test_src2)
+
+        for serializer in ["tixi", "stream"]:
+            sink = MemorySink()
+            sg = SongBookGenerator(self.test_src2, sink=sink, serializer=serializer)
+            self.assertEqual(quoted, sg.tixi.getTextAttribute("/songbook/section[3]/song[1]", "title"))
+            # The link has been resolved and a link back created
+            self.assertEqual(["You'll never see me again"],
+                             [sg.tixi.getTextAttribute(p, "title")
+                              for p in sg.tixi.xPathExpressionGetAllXPaths("/songbook/section[3]/song[1]/link")])
+            sg.write_songs()
+
+            first = sg.catalog.find(quoted)[0].xhtml
+            second = sg.catalog.find("You'll never see me again")[0].xhtml
+            text = sink.files["text/" + second].decode("utf8")
+            self.assertIn('<a href="{}">Say "You\'ll never see me"</a>'.format(first), text)
+            text = sink.files["text/" + first].decode("utf8")
+            self.assertIn("<h1>Say \"You'll never see me\"</h1>", text)
+            self.assertIn('<a href="{}">You\'ll never see me again</a>'.format(second), text)
+
+    def test_background_writers(self):
+        files = []
+        for writers in [None, 3]:
+            sink = MemorySink()
+            sg = SongBookGenerator(self.test_song_src, sink=sink, writers=writers)
+            self.assertEqual(writers is not None, isinstance(sg.settings.sink, AsyncSink))
+            sg.write_songs()
+            sg.write_sections()
+            sg.write_indexes()
+            sg.write_toc()
+            sg.write_metadata()
+            sg.finish()
+            files.append(sink.files)
+        self.assertIn("text/sng_song_abba.xhtml", files[1])
+        self.assertEqual(files[0], files[1])
+
     def test_write_toc(self):
         self.sg._preprocess()
         # First copy the toc.ncx to the test dir and use it.
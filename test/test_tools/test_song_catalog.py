@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18.10.2026 17:50
+ 
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-18'
+
+import os
+import unittest
+
+from src.xml_backend import Tixi
+from src.tools.song_catalog import SongCatalog, SongRecord
+
+
+class TestSongCatalog(unittest.TestCase):
+    def setUp(self):
+        self.tixi = Tixi()
+        self.tixi.open(os.path.join(os.path.dirname(__file__), "resources", "test_song_src.xml"), recursive=True)
+
+    def test_catalog(self):
+        catalog = SongCatalog(self.tixi)
+        self.assertEqual(self.tixi.xPathEvaluateNodeNumber("//song[@title]"), len(catalog))
+        self.assertEqual(self.tixi.xPathExpressionGetAllXPaths("//song[@title]"), [s.path for s in catalog.songs])
+
+        songsA = catalog.find("Song A")
+        self.assertEqual(["John Doe", "Mike Moo"], [s.lyrics for s in songsA])
+        self.assertEqual("John Doe", songsA[0].music)
+        self.assertIsNone(songsA[1].music)
+        self.assertIs(songsA[0], catalog.find(" Song A ")[0])
+        self.assertEqual([], catalog.find("No Such Title"))
+
+        self.assertEqual("The Developers", catalog.find("My Test Song")[0].band)
+
+        # No xhtml attributes assigned in the raw source
+        self.assertEqual([], catalog.published())
+        self.tixi.addTextAttribute(songsA[1].path, "xhtml", "song_a.xhtml")
+        self.assertEqual(["song_a.xhtml"], [s.xhtml for s in SongCatalog(self.tixi).published()])
+
+    def test_record(self):
+        record = SongRecord("/songbook/song", {"title": "Title", "xhtml": "file.xhtml"})
+        self.assertIsNone(record.lyrics)
+        with self.assertRaises(AttributeError):
+            record.year = 1999
+
+
+if __name__ == '__main__':
+    unittest.main()
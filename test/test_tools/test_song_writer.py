@@ -12,8 +12,8 @@ import unittest
 import os
 
 from src.config import EpubSongbookConfig, ChordMode
-from src.tixi import Tixi, TixiException, ReturnCode
-from src.tools.song_writer import SongWriter, LineWithChords
+from src.xml_backend import Tixi, TixiException, ReturnCode
+from src.tools.song_writer import SongWriter
 
 
 class TestSongWriter(unittest.TestCase):
@@ -316,26 +316,18 @@ class TestSongWriter(unittest.TestCase):
         self.assertEqual(self.expectedTixi.exportDocumentAsString(),
                          writer.tixi.exportDocumentAsString())
 
-    def test_identifyLinesWithChords(self):
-        # Need to initialize the writer to access the self.CS; Tixi and target path to not matter
-        text = "\n".join(["Line 1",
-                          "Line 2",
-                          "Line 3",
-                          "Line 4"])
-        expected = ["Line 1", "Line 2", "Line 3", "Line 4"]
-        # Should basically get the text with <br/> tags in newlines
-        self.assertEqual([expected], self.writer._identifyLinesWithChords(text))
-
-        text = "\n".join(["Line 1" + self.settings.CS + "F E E D",
-                          "Line 2" + self.settings.CS + "F E E D",
-                          "Line 3",
-                          "Line 4"])
-        expected = [
-            LineWithChords("Line 1", ["F E E D"]),
-            LineWithChords("Line 2", ["F E E D"]),
-            ["Line 3", "Line 4"]
-        ]
-        self.assertEqual(expected, self.writer._identifyLinesWithChords(text))
+    def test_songPart(self):
+        self.writer.tixi.createElement("/html", "body")
+        # A verse without chords falls back from the chords above to chords beside to no chords mode
+        self.writer.format_song_part("/song/verse[2]", "/html/body", mode=ChordMode.CHORDS_ABOVE)
+        self.assertEqual(["/song/verse[2]"], list(self.writer.parts.keys()))
+        part = self.writer.parts["/song/verse[2]"]
+        self.assertFalse(part.hasChords)
+
+        # The part is parsed only once, whatever mode is used
+        self.writer.format_song_part("/song/verse[2]", "/html/body", mode=ChordMode.NO_CHORDS)
+        self.assertIs(part, self.writer._songPart("/song/verse[2]"))
+        self.assertTrue(self.writer._songPart("/song/chorus").hasChords)
 
     @staticmethod
     def updateAttributes(tixi: Tixi, path: str, attrs: dict) -> None:
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19.10.2026 13:10 
+ 
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-19'
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.config import epubsongbookconfig
+from src.tools.songbook_checker import SongbookChecker
+
+MASTER = """<?xml version="1.0" encoding="utf-8"?>
+<songbook>
+    <settings>
+        <output_dir>output</output_dir>
+    </settings>
+    <section title="Section 1">
+        <song title="Good Song" lyrics="John Doe" xhtml="same.xhtml">
+            <link title="Nowhere"/>
+            <link title="Other Song "/>
+            <verse>La la la</verse>
+        </song>
+        <song title="Other Song" xhtml="same.xhtml">
+            <verse>La la la</verse>
+        </song>
+        <song title="Missing Song" src="missing.xml"/>
+        <song title="Invalid Song" src="invalid.xml"/>
+        <song title="Conflict Song" src="conflict.xml" lyrics="Somebody"/>
+        <song title="Ambiguous Song" src="ambiguous.xml">
+            <verse>La la la</verse>
+        </song>
+        <html src="missing.html"/>
+    </section>
+</songbook>
+"""
+
+SOURCES = {"invalid.xml": '<song title="Invalid Song"><wrong/></song>',
+           "conflict.xml": '<song title="Conflict Song" lyrics="Nobody"><link/><link title=" Good Song"/><verse>La</verse></song>',
+           "ambiguous.xml": '<song title="Ambiguous Song"><verse>La</verse></song>'}
+
+
+class TestSongbookChecker(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.master = os.path.join(self.dir, "songbook.xml")
+        self.xsd = os.path.join(os.path.dirname(os.path.abspath(epubsongbookconfig.__file__)), "source_schema.xsd")
+        with open(self.master, "w", encoding="utf8") as f:
+            f.write(MASTER)
+        for name, text in SOURCES.items():
+            with open(os.path.join(self.dir, name), "w", encoding="utf8") as f:
+                f.write(text)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_run(self):
+        checker = SongbookChecker(self.master, self.xsd, jobs=2)
+        problems = checker.run()
+        found = dict()
+        for problem in problems:
+            found.setdefault(problem["check"], []).append(problem)
+
+        self.assertEqual(1, len(found["schema"]))
+        self.assertIn("invalid.xml", found["schema"][0]["message"])
+        self.assertEqual(1, len(found["ambiguous_content"]))
+        self.assertIn("Ambiguous Song", found["ambiguous_content"][0]["message"])
+        messages = " ".join(p["message"] for p in found["sources"])
+        self.assertIn("missing.xml not found", messages)
+        self.assertIn("'Nobody' vs 'Somebody'", messages)
+        self.assertIn("missing.html", found["html"][0]["message"])
+        self.assertIn("same.xhtml used more than once", found["xhtml_names"][0]["message"])
+        # The titles are matched exactly, as in the build: the links with extra spaces are dead
+        self.assertEqual([("warning", "Song \"Good Song\" links to \"Nowhere\", which is not in the songbook"),
+                          ("warning", "Song \"Good Song\" links to \"Other Song \", which is not in the songbook"),
+                          ("error", "<link> without title in conflict.xml (Conflict Song)"),
+                          ("warning", "Song \"Conflict Song\" links to \" Good Song\", which is not in the songbook")],
+                         [(p["severity"], p["message"]) for p in found["links"]])
+
+        # All checks have been run and nothing was written
+        self.assertEqual(set(SongbookChecker.CHECKS), set(found.keys()))
+        self.assertFalse(os.path.exists(os.path.join(self.dir, "output")))
+
+        report = os.path.join(self.dir, "report.json")
+        checker.save(report)
+        with open(report, encoding="utf8") as f:
+            data = json.load(f)
+        self.assertEqual(len(problems) - 3, data["errors"])
+        self.assertEqual(3, data["warnings"])
+        self.assertEqual(problems, data["problems"])
+
+    def test_missing_author_aliases(self):
+        with open(self.master, "w", encoding="utf8") as f:
+            f.write(MASTER.replace("</settings>", "<author_aliases>aliases.xml</author_aliases></settings>"))
+        checker = SongbookChecker(self.master, self.xsd)
+        problems = checker.run()
+        self.assertEqual(["schema"], [problem["check"] for problem in problems])
+        self.assertIn("aliases.xml not found", problems[0]["message"])
+        self.assertEqual(1, checker.report()["errors"])
+
+    def test_jobs(self):
+        # One thread, or as many as the CPUs: the same problems are found
+        problems = SongbookChecker(self.master, self.xsd, jobs=1).run()
+        self.assertEqual(problems, SongbookChecker(self.master, self.xsd, jobs=0).run())
+
+    def test_invalid_master(self):
+        with open(self.master, "w", encoding="utf8") as f:
+            f.write(MASTER.replace("<section", "<chapter").replace("</section", "</chapter"))
+        checker = SongbookChecker(self.master, self.xsd)
+        problems = checker.run()
+        self.assertEqual(1, len(problems))
+        self.assertEqual("schema", problems[0]["check"])
+        self.assertEqual(1, checker.report()["errors"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19.10.2026 15:05
+ 
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-19'
+
+import unittest
+
+from src.tools import UtfUtils
+
+
+class TestUtfUtils(unittest.TestCase):
+    def test_toAscii(self):
+        self.assertEqual("Zazolc gesla jazn", UtfUtils.toAscii("Zażółć gęślą jaźń"))
+        self.assertEqual("UEber die Bruecke. Strasse", UtfUtils.toAscii("Über die Brücke. Straße"))
+        # Letters not found in the maps are decomposed
+        self.assertEqual("Cafe Senor Dvorak", UtfUtils.toAscii("Café Señor Dvořák"))
+        # Everything else is removed
+        self.assertEqual("Youll never see me 2", UtfUtils.toAscii("You'll never see me (2)!"))
+        self.assertEqual("", UtfUtils.toAscii("Дом"))
+
+    def test_toAsciiAll(self):
+        titles = ["Łódź", "Köln", "Łódź", "Song A"]
+        self.assertEqual(["Lodz", "Koeln", "Lodz", "Song A"], UtfUtils.toAsciiAll(titles))
+        self.assertIs(UtfUtils.toAscii("Łódź"), UtfUtils.toAscii("Łódź"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19.10.2026 11:50 
+ 
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-19'
+
+import os
+import shutil
+import unittest
+
+from src.config import epubsongbookconfig
+from src.xml_backend import Tixi, TixiException
+from src.tools.validation_cache import ValidationCache
+
+SONG = """<?xml version="1.0" encoding="utf-8"?>
+<song title="Cached Song">
+    <verse>
+        La la la
+    </verse>
+</song>
+"""
+
+
+class TestValidationCache(unittest.TestCase):
+    def setUp(self):
+        config_dir = os.path.dirname(os.path.abspath(epubsongbookconfig.__file__))
+        self.test_dir = os.path.join(os.path.abspath(os.path.dirname(__file__)), "test_dir")
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+        os.makedirs(self.test_dir)
+        self.xsd = shutil.copy(os.path.join(config_dir, "song_schema.xsd"), self.test_dir)
+        self.song = os.path.join(self.test_dir, "song.xml")
+        with open(self.song, "w", encoding="utf8") as f:
+            f.write(SONG)
+        self.cache = os.path.join(self.test_dir, "cache")
+        ValidationCache.directory = self.cache
+
+    def tearDown(self):
+        ValidationCache.directory = None
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def open(self) -> Tixi:
+        tixi = Tixi()
+        tixi.open(self.song)
+        return tixi
+
+    def test_validated(self):
+        tixi = self.open()
+        self.assertIs(tixi, ValidationCache.validated(tixi, self.xsd))
+        # The defaults have been added
+        self.assertTrue(tixi.checkAttribute("/song", "lyrics"))
+        stored = os.listdir(self.cache)
+        self.assertEqual(1, len(stored))
+        with open(os.path.join(self.cache, stored[0]), encoding="utf8") as f:
+            self.assertEqual(tixi.exportDocumentAsString(), f.read())
+
+        # The unchanged document is read from the cache, with the path of the original
+        cached = ValidationCache.validated(self.open(), self.xsd)
+        self.assertIsNot(tixi, cached)
+        self.assertEqual(tixi.exportDocumentAsString(), cached.exportDocumentAsString())
+        self.assertEqual(os.path.abspath(self.song), cached.getDocumentPath())
+
+        # A change of the schema invalidates the cache
+        schemaHash = ValidationCache.schemaHash(self.xsd)
+        with open(self.xsd, "a", encoding="utf8") as f:
+            f.write("\n<!-- changed -->\n")
+        self.assertNotEqual(schemaHash, ValidationCache.schemaHash(self.xsd))
+        ValidationCache.validated(self.open(), self.xsd)
+        self.assertEqual(2, len(os.listdir(self.cache)))
+
+    def test_open(self):
+        tixi = ValidationCache.open(self.song, self.xsd)
+        self.assertTrue(tixi.checkAttribute("/song", "lyrics"))
+        self.assertEqual(1, len(os.listdir(self.cache)))
+
+        # The stored result is found before the file is parsed: a result stored for the content is returned as it is
+        stored = os.path.join(self.cache, os.listdir(self.cache)[0])
+        with open(stored, "w", encoding="utf8") as f:
+            f.write(SONG.replace("Cached Song", "Stored Song"))
+        cached = ValidationCache.open(self.song, self.xsd)
+        self.assertEqual("Stored Song", cached.getTextAttribute("/song", "title"))
+        self.assertEqual(os.path.abspath(self.song), cached.getDocumentPath())
+
+        # The song source files already parsed use the same result
+        document = Tixi()
+        document.open(self.song)
+        self.assertEqual("Stored Song", ValidationCache.validated(document, self.xsd, self.song)
+                         .getTextAttribute("/song", "title"))
+
+        # A changed file is validated again
+        with open(self.song, "w", encoding="utf8") as f:
+            f.write(SONG.replace("La la la", "La la"))
+        self.assertEqual("Cached Song", ValidationCache.open(self.song, self.xsd).getTextAttribute("/song", "title"))
+        self.assertEqual(2, len(os.listdir(self.cache)))
+
+        self.assertRaises(TixiException, ValidationCache.open, os.path.join(self.test_dir, "missing.xml"), self.xsd)
+
+    def test_invalid(self):
+        with open(self.song, "w", encoding="utf8") as f:
+            f.write(SONG.replace("verse", "wrong"))
+        self.assertRaises(TixiException, ValidationCache.validated, self.open(), self.xsd)
+        self.assertFalse(os.listdir(self.cache) if os.path.isdir(self.cache) else [])
+
+    def test_disabled(self):
+        ValidationCache.directory = None
+        tixi = self.open()
+        self.assertIs(tixi, ValidationCache.validated(tixi, self.xsd))
+        self.assertTrue(tixi.checkAttribute("/song", "lyrics"))
+        self.assertFalse(os.path.isdir(self.cache))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18.10.2026 23:05
+ 
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-18'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.tools.watch_builder import SourceWatcher, WatchBuilder
+
+MASTER = """<?xml version="1.0" encoding="utf-8"?>
+<songbook>
+    <settings>
+        <title>Watched Songbook</title>
+        <output_dir>output</output_dir>
+    </settings>
+    <section title="Section 1">
+        <song title="Inline Song" lyrics="John Doe">
+            <verse>
+                La la la
+            </verse>
+        </song>
+        <song title="Separate Song" src="song.xml"/>
+    </section>
+</songbook>
+"""
+
+SONG = """<?xml version="1.0" encoding="utf-8"?>
+<song title="Separate Song" lyrics="{}">
+    <verse>
+        {}
+    </verse>
+</song>
+"""
+
+
+class TestWatchBuilder(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.master = os.path.join(self.dir, "songbook.xml")
+        self.song = os.path.join(self.dir, "song.xml")
+        with open(self.master, "w", encoding="utf8") as f:
+            f.write(MASTER)
+        self.writeSong("Mike Moo", "First version")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def writeSong(self, lyrics, text):
+        with open(self.song, "w", encoding="utf8") as f:
+            f.write(SONG.format(lyrics, text))
+        # Make sure that the change is visible, even if the file system has a coarse time resolution
+        stamp = os.stat(self.song).st_mtime_ns + 10 ** 9
+        os.utime(self.song, ns=(stamp, stamp))
+
+    def page(self, name):
+        with open(os.path.join(self.dir, "output", "text", name), "r", encoding="utf8") as f:
+            return f.read()
+
+    def test_sourceWatcher(self):
+        watcher = SourceWatcher(interval=0.01, debounce=0.01)
+        missing = os.path.join(self.dir, "missing.xml")
+        watcher.watch([self.master, self.song, missing])
+        self.assertEqual(set(), watcher.poll())
+        self.assertEqual(set(), watcher.wait(timeout=0.05))
+
+        self.writeSong("Mike Moo", "Second version")
+        with open(missing, "w") as f:
+            f.write("Now it exists")
+        self.assertEqual({self.song, os.path.abspath(missing)}, watcher.wait())
+        self.assertEqual(set(), watcher.poll())
+
+    def test_update(self):
+        builder = WatchBuilder(self.master)
+        builder.build()
+        self.assertEqual({self.master, self.song}, set(builder.watcher.stamps.keys()))
+        self.assertIn("First version", self.page("sng_separate_song.xhtml"))
+        authors = self.page("idx_authors.xhtml")
+
+        # Only the content has changed
+        self.writeSong("Mike Moo", "Second version")
+        self.assertEqual("songs", builder.update({self.song}))
+        self.assertIn("Second version", self.page("sng_separate_song.xhtml"))
+        self.assertEqual(authors, self.page("idx_authors.xhtml"))
+
+        # Changed back, the page must be written again
+        self.writeSong("Mike Moo", "First version")
+        self.assertEqual("songs", builder.update({self.song}))
+        self.assertIn("First version", self.page("sng_separate_song.xhtml"))
+
+        # The author is shown in the index
+        self.writeSong("Sam Composer", "First version")
+        self.assertEqual("full", builder.update({self.song}))
+        self.assertIn("Composer, Sam", self.page("idx_authors.xhtml"))
+
+        self.assertEqual("full", builder.update({self.master}))
+
+    def test_author_aliases(self):
+        aliases = os.path.join(self.dir, "aliases.xml")
+        with open(aliases, "w", encoding="utf8") as f:
+            f.write('<authors><author name="John Doe"><alias>J. Doe</alias></author></authors>')
+        with open(self.master, "w", encoding="utf8") as f:
+            f.write(MASTER.replace("</settings>", "<author_aliases>aliases.xml</author_aliases></settings>"))
+        builder = WatchBuilder(self.master)
+        builder.build()
+        self.assertEqual({self.master, self.song, aliases}, set(builder.watcher.stamps.keys()))
+        self.assertIn("Moo, Mike", self.page("idx_authors.xhtml"))
+
+        with open(aliases, "w", encoding="utf8") as f:
+            f.write('<authors><author name="John Doe"><alias>Mike Moo</alias></author></authors>')
+        self.assertEqual("full", builder.update({aliases}))
+        self.assertNotIn("Moo, Mike", self.page("idx_authors.xhtml"))
+
+    def test_failed_build(self):
+        with open(self.song, "w", encoding="utf8") as f:
+            f.write("This is not a song")
+        builder = WatchBuilder(self.master, watcher=SourceWatcher(interval=0.01, debounce=0.01))
+        with self.assertLogs() as logs:
+            builder.run(builds=0)
+        self.assertTrue(any(line.startswith("ERROR:root:Build failed") for line in logs.output), logs.output)
+        # The sources are watched, even though they could not be preprocessed
+        self.assertEqual({self.master, self.song}, set(builder.watcher.stamps.keys()))
+
+        self.writeSong("Mike Moo", "Fixed version")
+        self.assertEqual("full", builder.update({self.song}))
+        self.assertIn("Fixed version", self.page("sng_separate_song.xhtml"))
+
+    def test_epub(self):
+        self.assertRaises(ValueError, WatchBuilder, self.master, epub=os.path.join(self.dir, "songbook.epub"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19.10.2026 14:20
+ 
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-19'
+
+from .test_lxml_tixi import TestLxmlTixi
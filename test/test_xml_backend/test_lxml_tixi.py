@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19.10.2026 14:20
+ 
+@author: Piotr Gradkowski <grotsztaksel@o2.pl>
+"""
+
+__authors__ = ['Piotr Gradkowski <grotsztaksel@o2.pl>']
+__date__ = '2026-10-19'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import src.xml_backend
+from src.xml_backend.lxml_tixi import Tixi, TixiException, ReturnCode
+
+
+class TestLxmlTixi(unittest.TestCase):
+    def setUp(self):
+        self.tixi = Tixi()
+        self.tixi.create("songbook")
+        self.tixi.createElement("/songbook", "section")
+
+    def test_operations(self):
+        for name in src.xml_backend.OPERATIONS:
+            self.assertTrue(hasattr(Tixi, name), name)
+        self.assertIn(src.xml_backend.BACKEND, src.xml_backend.BACKENDS)
+
+    def test_paths(self):
+        self.assertEqual("/songbook/section/song", self.tixi.createElement("/songbook/section", "song"))
+        self.tixi.addTextAttribute("/songbook/section/song", "title", "A")
+
+        # The second song changes the path of the first one
+        self.assertEqual("/songbook/section/song[2]", self.tixi.createElement("/songbook/section", "song"))
+        self.assertFalse(self.tixi.checkElement("/songbook/section/song[3]"))
+        with self.assertRaises(TixiException) as cm:
+            self.tixi.getTextAttribute("/songbook/section/song", "title")
+        self.assertEqual(ReturnCode.ELEMENT_PATH_NOT_UNIQUE, cm.exception.code)
+        self.assertEqual("A", self.tixi.getTextAttribute("/songbook/section/song[1]", "title"))
+
+        self.assertEqual("/songbook/section/song[1]",
+                         self.tixi.createElementAtIndex("/songbook/section", "song", 1))
+        self.tixi.addTextAttribute("/songbook/section/song[1]", "title", "B")
+        self.assertEqual(["B", "A", None],
+                         [self.tixi.getTextAttribute(p, "title") if self.tixi.checkAttribute(p, "title") else None
+                          for p in self.tixi.xPathExpressionGetAllXPaths("//song")])
+
+        # After removing, the paths are resolved again
+        self.tixi.removeElement("/songbook/section/song[1]")
+        self.tixi.removeElement("/songbook/section/song[2]")
+        self.assertEqual(["/songbook/section/song"], self.tixi.xPathExpressionGetAllXPaths("//song"))
+        self.assertEqual("A", self.tixi.getTextAttribute("/songbook/section/song", "title"))
+        self.assertEqual("A", self.tixi.getInheritedTextAttribute("/songbook/section/song", "title"))
+        self.assertIsNone(self.tixi.getInheritedTextAttribute("/songbook/section/song", "lyrics"))
+
+        with self.assertRaises(TixiException) as cm:
+            self.tixi.getTextAttribute("/songbook/section/song", "lyrics")
+        self.assertEqual(ReturnCode.ATTRIBUTE_NOT_FOUND, cm.exception.code)
+
+    def test_export(self):
+        self.tixi.addTextElement("/songbook/section", "title", "Żółw")
+        self.assertEqual('<?xml version="1.0"?>\n'
+                         '<songbook>\n'
+                         '  <section>\n'
+                         '    <title>&#x17B;&#xF3;&#x142;w</title>\n'
+                         '  </section>\n'
+                         '</songbook>\n', self.tixi.exportDocumentAsString())
+
+        other = Tixi()
+        other.openString(self.tixi.exportDocumentAsString())
+        self.assertEqual("Żółw", other.getTextElement("/songbook/section/title"))
+
+    def test_open_recursive(self):
+        directory = tempfile.mkdtemp()
+        try:
+            with open(os.path.join(directory, "song.xml"), "w", encoding="utf8") as f:
+                f.write('<?xml version="1.0" encoding="utf-8"?>\n<song title="Żółw"/>')
+            master = os.path.join(directory, "master.xml")
+            self.tixi.addExternalLink("/songbook/section", os.path.join(directory, "song.xml"), "xml")
+            self.tixi.saveCompleteDocument(master)
+
+            tixi = Tixi()
+            tixi.open(master, recursive=True)
+            self.assertEqual(["/songbook/section/song"], tixi.xPathExpressionGetAllXPaths("//song"))
+            self.assertEqual("Żółw", tixi.getTextAttribute("/songbook/section/song", "title"))
+            self.assertEqual(master, tixi.getDocumentPath())
+
+            with self.assertRaises(TixiException) as cm:
+                tixi.open(os.path.join(directory, "missing.xml"))
+            self.assertEqual(ReturnCode.OPEN_FAILED, cm.exception.code)
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()